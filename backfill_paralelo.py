@@ -0,0 +1,292 @@
+"""
+Backfill de las 5 grandes ligas repartido entre varios procesos
+Uso: python backfill_paralelo.py [--procesos N] [--temporadas 3] [--ligas laliga premier ...]
+                                 [--rps 8] [--sqlite-timeout 60] [--verbose] [--force]
+
+Cada (liga, temporada) de TOP_5_LIGAS es una unidad de trabajo y las
+unidades se reparten en un pool de procesos. Cada proceso tiene su propio
+navegador (pool_navegador), su propia conexión a la BD y su checkpoint por
+temporada, pero todos comparten un único presupuesto de peticiones/s
+(LimitadorCompartido): con 4 procesos y --rps 8 se hacen 8 req/s en total,
+no 32. El proceso padre va mostrando el progreso agregado.
+
+Las unidades se ordenan por temporada y después por liga, para que los
+procesos que corren a la vez trabajen en ligas distintas y no se pisen con
+los mismos equipos y jugadores.
+
+SQLite admite un solo escritor: la BD se pasa a modo WAL (los lectores no
+bloquean al escritor) y cada proceso abre las transacciones con BEGIN
+IMMEDIATE y espera hasta --sqlite-timeout segundos al lock en vez de fallar
+con "database is locked".
+
+El progreso se guarda en checkpoints/backfill_paralelo.json (temporadas
+terminadas) y checkpoints/backfill_<season_id>.json (partidos de cada
+temporada a medias): si se corta, la siguiente ejecución sigue donde iba.
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import logging
+import multiprocessing
+import os
+import sys
+import time
+
+from futbol.checkpoints import Checkpoint
+from futbol.limitador import LimitadorCompartido
+
+SQLITE_TIMEOUT = float(os.environ.get('SOFASCORE_SQLITE_TIMEOUT', 60))
+INTERVALO_PROGRESO = 5  # segundos entre líneas de progreso
+
+# Estado de cada proceso del pool (lo rellena _iniciar_worker)
+_PRESUPUESTO = None
+_COLA = None
+_FORZAR = False
+
+
+def configurar_sqlite(settings, timeout: float = SQLITE_TIMEOUT):
+    """Esperar al lock de escritura y pedirlo al abrir la transacción (antes de django.setup)"""
+    for bd in settings.DATABASES.values():
+        if bd['ENGINE'].endswith('sqlite3'):
+            opciones = bd.setdefault('OPTIONS', {})
+            opciones.setdefault('timeout', timeout)
+            # Con BEGIN DEFERRED dos transacciones que leen y luego escriben se
+            # bloquean mutuamente y SQLite falla enseguida sin esperar el timeout
+            opciones.setdefault('transaction_mode', 'IMMEDIATE')
+
+
+def preparar_django(timeout: float = SQLITE_TIMEOUT):
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+    import django
+    from django.conf import settings
+
+    configurar_sqlite(settings, timeout)
+    django.setup()
+
+
+class CheckpointConProgreso(Checkpoint):
+    """Checkpoint de una temporada que además avisa al padre de cada partido hecho"""
+
+    def __init__(self, season_id: int, cola):
+        super().__init__(f"backfill_{season_id}")
+        self.season_id = season_id
+        self.cola = cola
+
+    def marcar(self, clave: str):
+        super().marcar(clave)
+        if self.cola is not None and not clave.startswith('temporada/'):
+            self.cola.put(('partido', self.season_id))
+
+
+# ============================================
+# WORKERS
+# ============================================
+
+def _iniciar_worker(presupuesto, cola, timeout, verbose, forzar):
+    global _PRESUPUESTO, _COLA, _FORZAR
+    _PRESUPUESTO = presupuesto
+    _COLA = cola
+    _FORZAR = forzar
+    preparar_django(timeout)
+    if not verbose:
+        # La salida de varios procesos mezclada no se puede leer: el padre resume
+        sys.stdout = open(os.devnull, 'w')
+        logging.disable(logging.INFO)
+
+
+def procesar_unidad(liga_key: str, temporada: dict) -> dict:
+    """Sincronizar una temporada en este proceso; devuelve su resumen para el padre"""
+    from futbol.pool_navegador import ejecutar_con_pool
+
+    inicio = time.time()
+    _COLA.put(('inicio', temporada['season_id']))
+    completada = asyncio.run(ejecutar_con_pool(_procesar_unidad(liga_key, temporada)))
+    return {
+        'liga': liga_key,
+        'season_id': temporada['season_id'],
+        'completada': completada,
+        'segundos': time.time() - inicio,
+    }
+
+
+async def _procesar_unidad(liga_key: str, temporada: dict) -> bool:
+    from futbol.sofascore_api import SofascoreAPI
+    from sync_top5_ligas import TOP_5_LIGAS, sync_liga_completa_con_estadisticas
+
+    season_id = temporada['season_id']
+    api = SofascoreAPI(limitador=_PRESUPUESTO) if _PRESUPUESTO else SofascoreAPI(peticiones_por_segundo=0)
+    with CheckpointConProgreso(season_id, _COLA) as checkpoint:
+        await sync_liga_completa_con_estadisticas(TOP_5_LIGAS[liga_key], [temporada],
+                                                  checkpoint=checkpoint, api=api, forzar=_FORZAR)
+        completada = checkpoint.hecho(f"temporada/{season_id}")
+        if completada:
+            checkpoint.terminar()
+    return completada
+
+
+# ============================================
+# PADRE
+# ============================================
+
+def unidades_de_trabajo(ligas, temporadas_por_liga: int):
+    """(liga, temporada) ordenadas por temporada y liga: a la vez corren ligas distintas"""
+    from sync_top5_ligas import TOP_5_LIGAS
+
+    unidades = []
+    for indice in range(temporadas_por_liga):
+        for key in ligas:
+            temporadas = TOP_5_LIGAS[key]['temporadas']
+            if indice < len(temporadas):
+                unidades.append((key, temporadas[indice]))
+    return unidades
+
+
+def activar_wal():
+    """WAL: los lectores no bloquean al escritor; el modo queda guardado en el fichero"""
+    from django.db import connection
+
+    if connection.vendor == 'sqlite':
+        with connection.cursor() as cursor:
+            cursor.execute('PRAGMA journal_mode=WAL')
+    connection.close()
+
+
+class Progreso:
+    """Progreso agregado de todos los procesos"""
+
+    def __init__(self, total: int, presupuesto: LimitadorCompartido = None):
+        self.total = total
+        self.presupuesto = presupuesto
+        self.inicio = time.time()
+        self.en_curso = set()
+        self.terminadas = 0
+        self.fallidas = 0
+        self.partidos = 0
+        self.partidos_por_temporada = {}
+
+    def leer_cola(self, cola):
+        while True:
+            try:
+                tipo, season_id = cola.get_nowait()
+            except Exception:
+                return
+            if tipo == 'inicio':
+                self.en_curso.add(season_id)
+            elif tipo == 'partido':
+                self.partidos += 1
+                self.partidos_por_temporada[season_id] = self.partidos_por_temporada.get(season_id, 0) + 1
+
+    def terminar_unidad(self, season_id: int, completada: bool):
+        self.en_curso.discard(season_id)
+        if completada:
+            self.terminadas += 1
+        else:
+            self.fallidas += 1
+
+    def linea(self) -> str:
+        segundos = max(time.time() - self.inicio, 1e-9)
+        linea = (f"⏳ {segundos / 60:5.1f} min · temporadas {self.terminadas}/{self.total} "
+                 f"({len(self.en_curso)} en curso, {self.fallidas} con errores) · "
+                 f"{self.partidos} partidos ({self.partidos / segundos:.1f}/s)")
+        if self.presupuesto:
+            linea += (f" · {self.presupuesto.peticiones} peticiones ({self.presupuesto.peticiones / segundos:.1f}/s, "
+                      f"{self.presupuesto.errores} errores, tasa {self.presupuesto.tasa:.1f} req/s)")
+        return linea
+
+
+def ejecutar_backfill(unidades, procesos: int, rps: float, timeout: float = SQLITE_TIMEOUT,
+                      verbose: bool = False, forzar: bool = False) -> Progreso:
+    contexto = multiprocessing.get_context('spawn')  # ni Playwright ni las conexiones de Django sobreviven a un fork
+    presupuesto = LimitadorCompartido(rps, contexto=contexto) if rps else None
+    cola = contexto.Queue()
+    progreso = Progreso(len(unidades), presupuesto)
+
+    with Checkpoint('backfill_paralelo') as checkpoint:
+        pendientes = [(key, t) for key, t in unidades if not checkpoint.hecho(f"temporada/{t['season_id']}")]
+        if checkpoint.reanudado:
+            print(f"↻ Reanudando desde el checkpoint ({len(unidades) - len(pendientes)} temporadas ya hechas)")
+        progreso.terminadas = len(unidades) - len(pendientes)
+
+        executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=max(1, min(procesos, len(pendientes) or 1)), mp_context=contexto,
+            initializer=_iniciar_worker, initargs=(presupuesto, cola, timeout, verbose, forzar),
+        )
+        try:
+            futuros = {executor.submit(procesar_unidad, key, t): (key, t) for key, t in pendientes}
+            restantes = set(futuros)
+            while restantes:
+                hechos, restantes = concurrent.futures.wait(restantes, timeout=INTERVALO_PROGRESO)
+                progreso.leer_cola(cola)
+                for futuro in hechos:
+                    key, temporada = futuros[futuro]
+                    season_id = temporada['season_id']
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        print(f"✗ {temporada['nombre']}: {str(e)[:100]}")
+                        progreso.terminar_unidad(season_id, False)
+                        continue
+                    progreso.terminar_unidad(season_id, resultado['completada'])
+                    if resultado['completada']:
+                        checkpoint.marcar(f"temporada/{season_id}")
+                    estado = "✓" if resultado['completada'] else "⚠ con errores,"
+                    print(f"{estado} {temporada['nombre']}: {progreso.partidos_por_temporada.get(season_id, 0)} "
+                          f"partidos en {resultado['segundos'] / 60:.1f} min")
+                print(progreso.linea())
+        except KeyboardInterrupt:
+            print("\n⏹ Interrumpido: los checkpoints guardan lo hecho hasta ahora")
+            executor.shutdown(wait=True, cancel_futures=True)
+            raise
+        executor.shutdown(wait=True)
+
+        if progreso.terminadas == len(unidades):
+            checkpoint.terminar()
+    return progreso
+
+
+def parsear_argumentos():
+    from futbol.sofascore_api import PETICIONES_POR_SEGUNDO
+    from sync_top5_ligas import TOP_5_LIGAS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--procesos', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--temporadas', type=int, default=3, help="temporadas por liga (de la más reciente)")
+    parser.add_argument('--ligas', nargs='+', choices=list(TOP_5_LIGAS), default=list(TOP_5_LIGAS))
+    parser.add_argument('--rps', type=float, default=PETICIONES_POR_SEGUNDO,
+                        help="presupuesto de peticiones/s entre todos los procesos (0 = sin límite)")
+    parser.add_argument('--sqlite-timeout', type=float, default=SQLITE_TIMEOUT,
+                        help="segundos que un proceso espera al lock de escritura de SQLite")
+    parser.add_argument('--verbose', action='store_true', help="no ocultar la salida de los procesos")
+    parser.add_argument('--force', action='store_true',
+                        help="volver a pedir los detalles que ya son definitivos")
+    return parser.parse_args()
+
+
+def main():
+    preparar_django()
+    args = parsear_argumentos()
+    unidades = unidades_de_trabajo(args.ligas, args.temporadas)
+    activar_wal()
+
+    print("\n" + "=" * 70)
+    print(f"🌍 BACKFILL PARALELO: {len(unidades)} temporadas, {args.procesos} procesos, "
+          f"{args.rps or 'sin límite de'} req/s en total")
+    print("=" * 70)
+
+    progreso = ejecutar_backfill(unidades, args.procesos, args.rps, args.sqlite_timeout, args.verbose, args.force)
+
+    print("\n" + "=" * 70)
+    print(progreso.linea())
+    if progreso.fallidas:
+        print("⚠ Quedaron temporadas con errores: la próxima ejecución las reintenta")
+    print("=" * 70)
+
+    from futbol.utils import resumen_base_datos
+    resumen = resumen_base_datos()
+    print(f"  Partidos totales: {resumen['partidos']['total']}")
+    print(f"  Con estadísticas: {resumen['estadisticas_partido']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Benchmark de consultas SQL por partido al guardar los detalles (estadísticas,
+incidentes y alineaciones) con poblar_bd_sofascore y estadisticas.py
+Uso: python benchmark_consultas.py [--partidos 20] [--sin-plantillas]
+
+Usa una BD de test temporal y respuestas sintéticas en memoria, así que no
+toca la BD real ni la red. Con --sin-plantillas los jugadores no existen de
+antemano y hay que crearlos al vuelo.
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+os.environ['SOFASCORE_CACHE'] = '0'
+
+import django
+django.setup()
+
+from django.db import connection, connections
+from django.db.backends.signals import connection_created
+from django.test.utils import setup_test_environment
+
+from futbol import datos_sinteticos
+from futbol.escritor import en_escritor
+from futbol.models import Partido, Jugador, Alineacion, EventoPartido
+from futbol.sofascore_api import SofascoreAPI
+
+CONSULTAS = {'n': 0}
+
+
+def _contar(execute, sql, params, many, context):
+    CONSULTAS['n'] += 1
+    return execute(sql, params, many, context)
+
+
+def _instalar_contador(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_contar)
+
+
+def crear_api() -> SofascoreAPI:
+    return SofascoreAPI(datos_sinteticos.TransporteSintetico(), base_url=datos_sinteticos.TransporteSintetico.BASE_URL,
+                        peticiones_por_segundo=0, cache=False)
+
+
+@en_escritor
+def _contar_filas():
+    return Jugador.objects.count(), EventoPartido.objects.count(), Alineacion.objects.count()
+
+
+@en_escritor
+def _partidos(ids):
+    return list(Partido.objects.filter(sofascore_id__in=ids).select_related('equipo_local', 'equipo_visitante'))
+
+
+async def medir(nombre, partidos, sincronizar):
+    CONSULTAS['n'] = 0
+    inicio = time.perf_counter()
+    for partido in partidos:
+        await sincronizar(partido)
+    segundos = time.perf_counter() - inicio
+    jugadores, eventos, alineaciones = await _contar_filas()
+
+    print(f"  {nombre:.<24} {CONSULTAS['n'] / len(partidos):>7.1f} consultas/partido "
+          f"{len(partidos) / segundos:>7.1f} partidos/s")
+    print(f"  {'':<24} jugadores={jugadores} eventos={eventos} alineaciones={alineaciones}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--partidos', type=int, default=20)
+    parser.add_argument('--sin-plantillas', action='store_true', help="no crear los jugadores antes")
+    args = parser.parse_args()
+
+    from poblar_bd_sofascore import SofascoreSyncManager
+    from estadisticas import EstadisticasSyncer
+
+    manager = SofascoreSyncManager(api=crear_api())
+    syncer = EstadisticasSyncer(api=crear_api())
+
+    ids = list(range(1, args.partidos + 1))
+    for event_id in ids:
+        await manager.sync_partido(datos_sinteticos.evento(event_id, estado='notstarted'))
+
+    if not args.sin_plantillas:
+        equipos = {p.equipo_local for p in await _partidos(ids)} | {p.equipo_visitante for p in await _partidos(ids)}
+        await manager.sync_jugadores_equipos(list(equipos))
+
+    partidos = await _partidos(ids)
+    print(f"\n{len(partidos)} partidos, plantillas {'no ' if args.sin_plantillas else ''}cargadas")
+    print("=" * 70)
+
+    await medir('poblar_bd_sofascore', partidos,
+                lambda partido: manager.sync_detalles_partido(partido.sofascore_id, partido))
+
+    await medir('estadisticas.py', partidos, syncer.sync_detalles_partido)
+
+
+if __name__ == "__main__":
+    setup_test_environment()
+    nombre_bd = connection.creation.create_test_db(verbosity=0)
+    connection_created.connect(_instalar_contador)
+    for conexion in connections.all():
+        if conexion.connection:
+            conexion.execute_wrappers.append(_contar)
+    try:
+        asyncio.run(main())
+    finally:
+        connection.creation.destroy_test_db(nombre_bd, verbosity=0)
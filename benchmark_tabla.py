@@ -0,0 +1,100 @@
+"""
+Benchmark de CalculadoraTabla contra el cálculo original (una consulta de
+estadísticas por equipo) en una temporada de 20 equipos y 380 partidos
+Uso: python benchmark_tabla.py [--equipos 20] [--repeticiones 20]
+
+Usa una BD de test temporal, no toca la BD real.
+"""
+
+import argparse
+import os
+import random
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from futbol.models import Equipo, Liga, Partido, Temporada
+from futbol.utils import CalculadoraTabla, EstadisticasEquipo
+
+
+def tabla_original(temporada):
+    """calcular_tabla tal y como estaba: recorre partidos con FKs y consulta cada equipo"""
+    equipos_ids = set()
+    for partido in Partido.objects.filter(temporada=temporada, estado='finished'):
+        equipos_ids.add(partido.equipo_local.id)
+        equipos_ids.add(partido.equipo_visitante.id)
+
+    tabla = []
+    for equipo in Equipo.objects.filter(id__in=equipos_ids):
+        datos = EstadisticasEquipo(equipo, temporada).estadisticas_generales()
+        tabla.append({'equipo': equipo.nombre, 'equipo_obj': equipo, **datos})
+
+    tabla.sort(key=lambda x: (x['puntos'], x['diferencia_goles'], x['goles_favor']), reverse=True)
+    for i, equipo_data in enumerate(tabla, 1):
+        equipo_data['posicion'] = i
+    return tabla
+
+
+def crear_temporada(num_equipos: int) -> Temporada:
+    rnd = random.Random(380)
+    liga = Liga.objects.create(sofascore_id=1, nombre='Liga')
+    temporada = Temporada.objects.create(sofascore_id=1, liga=liga, nombre='24/25', año_inicio=2024)
+    equipos = [Equipo.objects.create(sofascore_id=i, nombre=f'Equipo {i:02d}') for i in range(num_equipos)]
+    inicio = datetime(2024, 8, 15, tzinfo=dt_timezone.utc)
+
+    Partido.objects.bulk_create([
+        Partido(sofascore_id=i, liga=liga, temporada=temporada, equipo_local=local, equipo_visitante=visitante,
+                fecha_hora=inicio + timedelta(hours=i), estado='finished',
+                goles_local=rnd.randint(0, 4), goles_visitante=rnd.randint(0, 3))
+        for i, (local, visitante) in enumerate(
+            (local, visitante) for local in equipos for visitante in equipos if local != visitante
+        )
+    ])
+    return temporada
+
+
+def medir(nombre, funcion, repeticiones):
+    consultas = []
+    with connection.execute_wrapper(lambda execute, sql, *args: consultas.append(sql) or execute(sql, *args)):
+        tabla = funcion()
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion()
+    ms = (time.perf_counter() - inicio) / repeticiones * 1000
+    print(f"  {nombre:.<28} {len(consultas):>5} consultas {ms:>9.2f} ms")
+    return tabla, ms
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--equipos', type=int, default=20)
+    parser.add_argument('--repeticiones', type=int, default=20)
+    args = parser.parse_args()
+
+    temporada = crear_temporada(args.equipos)
+    print(f"\n{args.equipos} equipos, {Partido.objects.filter(temporada=temporada).count()} partidos")
+    print("=" * 60)
+
+    original, ms_original = medir('original', lambda: tabla_original(temporada), args.repeticiones)
+    nueva, ms_nueva = medir('una pasada', lambda: CalculadoraTabla(temporada).calcular_tabla(), args.repeticiones)
+    medir('una pasada + enfrentamientos', lambda: CalculadoraTabla(
+        temporada, CalculadoraTabla.CRITERIOS_ENFRENTAMIENTOS).calcular_tabla(), args.repeticiones)
+
+    print("-" * 60)
+    print(f"  x{ms_original / ms_nueva:.1f} más rápida, misma tabla: {original == nueva}")
+
+
+if __name__ == "__main__":
+    setup_test_environment()
+    nombre_bd = connection.creation.create_test_db(verbosity=0)
+    try:
+        main()
+    finally:
+        connection.creation.destroy_test_db(nombre_bd, verbosity=0)
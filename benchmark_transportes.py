@@ -0,0 +1,63 @@
+"""
+Benchmark de transportes de SofascoreAPI contra un servidor local
+Uso: python benchmark_transportes.py [--peticiones 200] [--latencia 0.02] [--concurrencia 8]
+
+Compara peticiones/segundo del camino original (page.goto en una pestaña)
+con el pool de contextos de Chromium y el cliente aiohttp.
+"""
+
+import argparse
+import asyncio
+import time
+
+from futbol.pool_navegador import ejecutar_con_pool
+from futbol.servidor_fake import ServidorFake
+from futbol.sofascore_api import SofascoreAPI
+from futbol.transportes import crear_transporte
+
+
+async def medir(tipo: str, base_url: str, peticiones: int, concurrencia: int) -> float:
+    """Lanzar N peticiones a la vez y devolver peticiones/segundo"""
+    api = SofascoreAPI(crear_transporte(tipo, concurrencia), base_url=base_url,
+                       peticiones_por_segundo=0, cache=False)
+    try:
+        # Calentar: arrancar navegador/sesión fuera de la medición
+        await api.get_equipo_info(0)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(*(api.get_equipo_info(i) for i in range(peticiones)))
+        return peticiones / (time.perf_counter() - inicio)
+    finally:
+        await api.close()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--peticiones', type=int, default=200)
+    parser.add_argument('--latencia', type=float, default=0.02, help="segundos por respuesta")
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--transportes', nargs='+', default=['goto', 'navegador', 'http'])
+    args = parser.parse_args()
+
+    print(f"\n{args.peticiones} peticiones, latencia {args.latencia * 1000:.0f} ms, "
+          f"concurrencia {args.concurrencia}")
+    print("=" * 50)
+
+    resultados = {}
+    with ServidorFake(latencia=args.latencia) as servidor:
+        for tipo in args.transportes:
+            try:
+                resultados[tipo] = await medir(tipo, servidor.base_url, args.peticiones, args.concurrencia)
+                print(f"  {tipo:.<20} {resultados[tipo]:>8.1f} req/s")
+            except Exception as e:
+                print(f"  {tipo:.<20} no disponible ({str(e).splitlines()[0][:60]})")
+
+    if 'goto' in resultados:
+        print("-" * 50)
+        for tipo, rps in resultados.items():
+            if tipo != 'goto':
+                print(f"  {tipo} vs goto: x{rps / resultados['goto']:.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(ejecutar_con_pool(main()))
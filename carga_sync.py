@@ -0,0 +1,211 @@
+"""
+Prueba de carga de los scripts de sincronización contra un Sofascore falso
+Uso:
+    python carga_sync.py [--latencia 0.02] [--error 0.01] [--429 0.02] [--rps 0]
+                         [--concurrencia 8] [--workers 4] [--max-partidos N]
+                         [--escenarios liga estadisticas top5] [--temporadas-top5 1]
+                         [--dias-entre-pasadas 1] [--verbose]
+
+Levanta futbol/servidor_fake.py con ApiSintetica (todos los endpoints de
+SofascoreAPI, datos coherentes y latencia/errores/429 configurables), apunta
+SofascoreAPI a él con el transporte http y ejecuta sobre una BD de test:
+
+- liga:         SofascoreSyncManager.sync_liga_completa (LaLiga, 380 partidos)
+- estadisticas: estadisticas.sync_estadisticas_todos_partidos
+- top5:         sync_top5_ligas.sync_liga_completa_con_estadisticas de las 5 ligas
+
+Para cada escenario muestra partidos/s, peticiones/s (las que llegan al
+servidor, reintentos incluidos), consultas SQL por partido y el pico de RSS
+del proceso.
+
+Un escenario repetido (p. ej. `--escenarios top5 top5`) simula el refresco
+del día siguiente: antes de cada repetición la API sintética avanza
+`--dias-entre-pasadas` días y los partidos ya jugados pasan a finalizados.
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import logging
+import os
+import resource
+import sys
+import time
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+
+from futbol.datos_sinteticos import ApiSintetica
+from futbol.servidor_fake import ServidorFake
+
+ESCENARIOS = ['liga', 'estadisticas', 'top5']
+
+CONSULTAS = {'n': 0}
+
+
+def _contar(execute, sql, params, many, context):
+    CONSULTAS['n'] += 1
+    return execute(sql, params, many, context)
+
+
+def _instalar_contador(sender, connection, **kwargs):
+    connection.execute_wrappers.append(_contar)
+
+
+def pico_rss_mb() -> float:
+    """Pico de memoria residente del proceso (ru_maxrss va en KB en Linux y en bytes en macOS)"""
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / 1024 / 1024 if sys.platform == 'darwin' else pico / 1024
+
+
+def configurar_entorno(args, servidor: ServidorFake):
+    """Apuntar SofascoreAPI al servidor falso; tiene que ir antes de importar los scripts"""
+    os.environ['SOFASCORE_BASE_URL'] = servidor.base_url
+    os.environ['SOFASCORE_TRANSPORTE'] = 'http'
+    os.environ['SOFASCORE_CACHE'] = '0'
+    os.environ['SOFASCORE_ARCHIVO'] = '0'
+    os.environ['SOFASCORE_RPS'] = str(args.rps)
+    os.environ['SOFASCORE_CONCURRENCIA'] = str(args.concurrencia)
+    os.environ['SOFASCORE_WORKERS'] = str(args.workers)
+
+
+@contextlib.contextmanager
+def silencio(activo: bool):
+    """Tragarse los print y logs de los scripts mientras se mide"""
+    if not activo:
+        yield
+        return
+    logging.disable(logging.CRITICAL)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        logging.disable(logging.NOTSET)
+
+
+async def escenario_liga(args):
+    from poblar_bd_sofascore import SofascoreSyncManager
+
+    manager = SofascoreSyncManager()
+    try:
+        await manager.sync_liga_completa(8, 61643, max_partidos=args.max_partidos)
+    finally:
+        await manager.close()
+    return await _contar_partidos([61643])
+
+
+async def escenario_estadisticas(args):
+    from estadisticas import sync_estadisticas_todos_partidos
+
+    # Forzado: después de `liga` todos los finalizados ya tienen los detalles definitivos
+    await sync_estadisticas_todos_partidos(limite=args.max_partidos, forzar=True)
+    return await _contar_partidos(None, estado='finished', limite=args.max_partidos)
+
+
+async def escenario_top5(args):
+    from sync_top5_ligas import TOP_5_LIGAS, sync_liga_completa_con_estadisticas
+
+    temporadas = []
+    for liga_config in TOP_5_LIGAS.values():
+        seleccion = liga_config['temporadas'][:args.temporadas_top5]
+        temporadas += [t['season_id'] for t in seleccion]
+        await sync_liga_completa_con_estadisticas(liga_config, seleccion)
+    return await _contar_partidos(temporadas)
+
+
+async def _contar_partidos(temporadas, estado=None, limite=None):
+    from futbol.escritor import en_escritor
+    from futbol.models import Partido
+
+    @en_escritor
+    def contar():
+        partidos = Partido.objects.all()
+        if temporadas is not None:
+            partidos = partidos.filter(temporada__sofascore_id__in=temporadas)
+        if estado:
+            partidos = partidos.filter(estado=estado)
+        total = partidos.count()
+        return min(total, limite) if limite else total
+
+    return await contar()
+
+
+async def medir(nombre, funcion, args, servidor):
+    CONSULTAS['n'] = 0
+    peticiones_antes = servidor.peticiones
+    inicio = time.perf_counter()
+    with silencio(not args.verbose):
+        partidos = await funcion(args)
+    segundos = time.perf_counter() - inicio
+    peticiones = servidor.peticiones - peticiones_antes
+
+    print(f"  {nombre:.<14} {partidos:>6} partidos {peticiones:>6} peticiones {segundos:>7.1f} s "
+          f"{partidos / segundos:>7.1f} partidos/s {peticiones / segundos:>7.1f} req/s "
+          f"{CONSULTAS['n'] / max(partidos, 1):>6.1f} consultas/partido "
+          f"RSS {pico_rss_mb():>6.0f} MB")
+
+
+async def main(args, servidor):
+    from futbol.pool_navegador import ejecutar_con_pool
+
+    funciones = {'liga': escenario_liga, 'estadisticas': escenario_estadisticas, 'top5': escenario_top5}
+
+    print(f"\nServidor falso en {servidor.base_url}: latencia {args.latencia * 1000:.0f} ms, "
+          f"errores {args.error:.0%}, 429 {args.tasa_429:.0%}, "
+          f"{args.rps or 'sin límite de'} req/s, concurrencia {args.concurrencia}")
+    print("=" * 110)
+
+    async def escenarios():
+        for i, nombre in enumerate(args.escenarios):
+            if nombre in args.escenarios[:i]:
+                servidor.api.avanzar(args.dias_entre_pasadas)
+            await medir(nombre, funciones[nombre], args, servidor)
+
+    await ejecutar_con_pool(escenarios())
+
+    print("-" * 110)
+    print(f"  Respuestas por status: {dict(sorted(servidor.respuestas_por_status.items()))}")
+
+
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--latencia', type=float, default=0.02, help="segundos por respuesta")
+    parser.add_argument('--error', type=float, default=0.0, help="fracción de respuestas 500")
+    parser.add_argument('--429', dest='tasa_429', type=float, default=0.0, help="fracción de respuestas 429")
+    parser.add_argument('--rps', type=float, default=0, help="presupuesto de peticiones/s (0 = sin límite)")
+    parser.add_argument('--concurrencia', type=int, default=8)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--max-partidos', type=int, help="limitar los partidos de liga y estadisticas")
+    parser.add_argument('--temporadas-top5', type=int, default=1, help="temporadas por liga en top5")
+    parser.add_argument('--escenarios', nargs='+', choices=ESCENARIOS, default=ESCENARIOS)
+    parser.add_argument('--dias-entre-pasadas', type=int, default=1,
+                        help="días que avanza la API antes de repetir un escenario")
+    parser.add_argument('--semilla', type=int, default=1)
+    parser.add_argument('--verbose', action='store_true', help="no ocultar la salida de los scripts")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parsear_argumentos()
+    servidor = ServidorFake(latencia=args.latencia, api=ApiSintetica(), tasa_error=args.error,
+                            tasa_429=args.tasa_429, semilla=args.semilla).iniciar()
+    configurar_entorno(args, servidor)
+
+    import django
+    django.setup()
+
+    from django.db import connection, connections
+    from django.db.backends.signals import connection_created
+    from django.test.utils import setup_test_environment
+
+    setup_test_environment()
+    nombre_bd = connection.creation.create_test_db(verbosity=0)
+    connection_created.connect(_instalar_contador)
+    for conexion in connections.all():
+        if conexion.connection:
+            conexion.execute_wrappers.append(_contar)
+    try:
+        asyncio.run(main(args, servidor))
+    finally:
+        connection.creation.destroy_test_db(nombre_bd, verbosity=0)
+        servidor.detener()
@@ -1,28 +1,37 @@
 """
 Script para sincronizar estadísticas de partidos ya existentes en la BD
+Uso: python estadisticas.py [--force]
+Por defecto se saltan los partidos con los detalles definitivos; --force los vuelve a pedir.
 """
 
+import argparse
 import asyncio
+import functools
 import os
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
 django.setup()
 
+from futbol.escritor import LoteNoConfirmado, confirmar_escrituras, en_escritor, tras_confirmar
 from futbol.models import *
-from futbol.sofascore_api import SofascoreAPI
-from asgiref.sync import sync_to_async
+from futbol.ingesta import guardar_detalles
+from futbol.checkpoints import Checkpoint
+from futbol.sofascore_api import SofascoreAPI, SofascoreAPIError
+from futbol.pool_navegador import ejecutar_con_pool
 from typing import Dict, Optional
 
 
 class EstadisticasSyncer:
-    def __init__(self):
-        self.api = SofascoreAPI()
+    def __init__(self, api: SofascoreAPI = None, forzar: bool = False):
+        self.api = api or SofascoreAPI()
+        self.forzar = forzar
         self.stats = {
             'procesados': 0,
             'con_estadisticas': 0,
             'con_eventos': 0,
             'con_alineaciones': 0,
+            'sin_cambios': 0,
             'errores': 0
         }
 
@@ -43,43 +52,33 @@ class EstadisticasSyncer:
         except (ValueError, TypeError):
             return None
 
+    async def sync_detalles_partido(self, partido: Partido):
+        """
+        Pedir estadísticas, eventos y alineaciones a la vez y escribirlos en
+        una sola transacción (con detalles_finales). Devuelve qué detalles había.
+        Si alguna petición falla se guarda lo que llegó y se lanza el error:
+        el partido no se puede dar por sincronizado
+        """
+        self._marcar_si_finalizado(partido)
+        respuestas = await asyncio.gather(
+            self._pedir(self.api.get_partido_estadisticas, partido, 'estadísticas'),
+            self._pedir(self.api.get_partido_incidentes, partido, 'eventos'),
+            self._pedir(self.api.get_partido_lineups, partido, 'alineaciones'),
+            return_exceptions=True
+        )
+        fallos = [r for r in respuestas if isinstance(r, Exception)]
+        detalles = [None if isinstance(r, Exception) else r for r in respuestas]
+        resultado = await self._guardar_detalles(partido, *detalles, marcar_finales=not fallos)
+        if fallos:
+            raise fallos[0]
+        return resultado
+
     async def sync_estadisticas_partido(self, partido: Partido):
         """Sincronizar estadísticas de un partido"""
         try:
+            self._marcar_si_finalizado(partido)
             data = await self.api.get_partido_estadisticas(partido.sofascore_id)
-
-            if not data or 'statistics' not in data:
-                return False
-
-            # Limpiar estadísticas anteriores
-            await self._limpiar_estadisticas(partido)
-
-            estadisticas_creadas = 0
-
-            for grupo in data.get('statistics', []):
-                periodo_sofascore = grupo.get('period', 'ALL')
-                periodo = self._mapear_periodo(periodo_sofascore)
-
-                # Extraer estadísticas
-                stats_dict = {}
-                for group in grupo.get('groups', []):
-                    for stat in group.get('statisticsItems', []):
-                        nombre = stat.get('name')
-                        stats_dict[nombre] = {
-                            'home': stat.get('home'),
-                            'away': stat.get('away')
-                        }
-
-                if stats_dict:
-                    await self._crear_estadistica(partido, periodo, stats_dict)
-                    estadisticas_creadas += 1
-
-            if estadisticas_creadas > 0:
-                await self._actualizar_flag_estadisticas(partido, True)
-                self.stats['con_estadisticas'] += 1
-                return True
-
-            return False
+            return (await self._guardar_detalles(partido, estadisticas=data))[0]
 
         except Exception as e:
             print(f"      Error en estadísticas: {str(e)[:100]}")
@@ -88,24 +87,9 @@ class EstadisticasSyncer:
     async def sync_eventos_partido(self, partido: Partido):
         """Sincronizar eventos de un partido"""
         try:
+            self._marcar_si_finalizado(partido)
             data = await self.api.get_partido_incidentes(partido.sofascore_id)
-
-            if not data or 'incidents' not in data:
-                return False
-
-            incidents = data.get('incidents', [])
-
-            if not incidents:
-                return False
-
-            await self._crear_eventos(partido, incidents)
-
-            if incidents:
-                await self._actualizar_flag_eventos(partido, True)
-                self.stats['con_eventos'] += 1
-                return True
-
-            return False
+            return (await self._guardar_detalles(partido, incidentes=data))[1]
 
         except Exception as e:
             print(f"      Error en eventos: {str(e)[:100]}")
@@ -114,38 +98,38 @@ class EstadisticasSyncer:
     async def sync_alineaciones_partido(self, partido: Partido):
         """Sincronizar alineaciones de un partido"""
         try:
+            self._marcar_si_finalizado(partido)
             data = await self.api.get_partido_lineups(partido.sofascore_id)
-
-            if not data:
-                return False
-
-            await self._limpiar_alineaciones(partido)
-
-            lineups_guardadas = 0
-
-            if data.get('home'):
-                count = await self._sync_alineacion_equipo(
-                    data['home'], partido, partido.equipo_local, True
-                )
-                lineups_guardadas += count
-
-            if data.get('away'):
-                count = await self._sync_alineacion_equipo(
-                    data['away'], partido, partido.equipo_visitante, False
-                )
-                lineups_guardadas += count
-
-            if lineups_guardadas > 0:
-                await self._actualizar_flag_alineaciones(partido, True)
-                self.stats['con_alineaciones'] += 1
-                return True
-
-            return False
+            return (await self._guardar_detalles(partido, alineaciones=data))[2]
 
         except Exception as e:
             print(f"      Error en alineaciones: {str(e)[:100]}")
             return False
 
+    async def _pedir(self, pedir, partido: Partido, nombre: str) -> Optional[Dict]:
+        """Respuesta del endpoint, o None si Sofascore no la tiene (404); los demás errores se propagan"""
+        try:
+            return await pedir(partido.sofascore_id)
+        except SofascoreAPIError as e:
+            if e.status == 404:
+                return None
+            print(f"      Error en {nombre}: {str(e)[:100]}")
+            raise
+        except Exception as e:
+            print(f"      Error en {nombre}: {str(e)[:100]}")
+            raise
+
+    def _marcar_si_finalizado(self, partido: Partido):
+        """Los detalles de un partido finalizado no cambian: la caché los guarda para siempre"""
+        if partido.estado == 'finished':
+            self.api.marcar_finalizado(partido.sofascore_id)
+
+    def resumen_cache(self) -> str:
+        if not self.api.cache:
+            return "desactivada"
+        stats = self.api.cache.estadisticas()
+        return f"{stats['aciertos']} aciertos / {stats['fallos']} fallos ({stats['tamano_mb']} MB)"
+
     def _mapear_periodo(self, periodo_str: str) -> str:
         mapeo = {
             'ALL': 'ALL',
@@ -156,11 +140,43 @@ class EstadisticasSyncer:
         }
         return mapeo.get(periodo_str, 'ALL')
 
-    @sync_to_async
-    def _limpiar_estadisticas(self, partido):
+    @en_escritor
+    def _guardar_detalles(self, partido, estadisticas=None, incidentes=None, alineaciones=None,
+                          marcar_finales=False):
+        """Escribir los detalles como una unidad (ver guardar_detalles). Devuelve qué detalles había"""
+        guardado = guardar_detalles(partido, self._escribir_estadisticas, estadisticas, incidentes,
+                                    alineaciones, marcar_finales, self.forzar)
+        self.stats['sin_cambios'] += guardado.sin_cambios
+        self.stats['con_estadisticas'] += guardado.tiene_estadisticas
+        self.stats['con_eventos'] += guardado.tiene_incidentes
+        self.stats['con_alineaciones'] += guardado.tiene_lineups
+        return guardado.tiene_estadisticas, guardado.tiene_incidentes, guardado.tiene_lineups
+
+    # Recibe una respuesta que sí llegó: lo que no trae ya no existe
+
+    def _escribir_estadisticas(self, partido, data) -> bool:
+        # Limpiar estadísticas anteriores
         EstadisticaPartido.objects.filter(partido=partido).delete()
 
-    @sync_to_async
+        estadisticas_creadas = 0
+        for grupo in data.get('statistics', []):
+            periodo = self._mapear_periodo(grupo.get('period', 'ALL'))
+
+            # Extraer estadísticas
+            stats_dict = {}
+            for group in grupo.get('groups', []):
+                for stat in group.get('statisticsItems', []):
+                    stats_dict[stat.get('name')] = {
+                        'home': stat.get('home'),
+                        'away': stat.get('away')
+                    }
+
+            if stats_dict:
+                self._crear_estadistica(partido, periodo, stats_dict)
+                estadisticas_creadas += 1
+
+        return estadisticas_creadas > 0
+
     def _crear_estadistica(self, partido, periodo, stats):
         EstadisticaPartido.objects.create(
             partido=partido,
@@ -191,126 +207,10 @@ class EstadisticasSyncer:
             saques_puerta_visitante=self._parse_int(stats.get('Goal kicks', {}).get('away')),
         )
 
-    @sync_to_async
-    def _crear_eventos(self, partido, incidents):
-        from futbol.models import Jugador
-
-        EventoPartido.objects.filter(partido=partido).delete()
-
-        tipo_map = {
-            'goal': 'goal',
-            'yellowCard': 'yellow_card',
-            'redCard': 'red_card',
-            'yellowRedCard': 'yellow_red_card',
-            'substitution': 'substitution',
-            'penalty': 'penalty',
-            'penaltyMissed': 'penalty_missed',
-            'ownGoal': 'own_goal',
-            'varDecision': 'var',
-            'injuryTime': 'injury',
-            'period': 'period',
-        }
-
-        eventos_crear = []
-
-        for incidente in incidents:
-            tipo_sofascore = incidente.get('incidentType', '')
-            tipo = tipo_map.get(tipo_sofascore, 'goal')
-
-            jugador = None
-            jugador_relacionado = None
-
-            if incidente.get('player'):
-                try:
-                    jugador = Jugador.objects.get(sofascore_id=incidente['player']['id'])
-                except Jugador.DoesNotExist:
-                    pass
-
-            if incidente.get('assist1'):
-                try:
-                    jugador_relacionado = Jugador.objects.get(sofascore_id=incidente['assist1']['id'])
-                except Jugador.DoesNotExist:
-                    pass
-
-            evento = EventoPartido(
-                sofascore_id=incidente.get('id'),
-                partido=partido,
-                jugador=jugador,
-                jugador_relacionado=jugador_relacionado,
-                minuto=incidente.get('time', 0),
-                minuto_adicional=incidente.get('addedTime'),
-                segundo=incidente.get('second'),
-                tipo=tipo,
-                texto_incidente=incidente.get('text', ''),
-                es_local=incidente.get('isHome', True),
-                datos_adicionales=incidente
-            )
-            eventos_crear.append(evento)
-
-        if eventos_crear:
-            EventoPartido.objects.bulk_create(eventos_crear, ignore_conflicts=True)
-
-    @sync_to_async
-    def _limpiar_alineaciones(self, partido):
-        Alineacion.objects.filter(partido=partido).delete()
-
-    @sync_to_async
-    def _sync_alineacion_equipo(self, data, partido, equipo, es_local):
-        from futbol.models import Jugador
-
-        alineaciones_crear = []
-
-        for player_data in data.get('players', []):
-            player_info = player_data.get('player', {})
-            try:
-                jugador = Jugador.objects.get(sofascore_id=player_info['id'])
-
-                stats = player_data.get('statistics', {})
-
-                alineacion = Alineacion(
-                    partido=partido,
-                    jugador=jugador,
-                    es_local=es_local,
-                    es_titular=player_data.get('substitute', False) == False,
-                    posicion=player_info.get('position', ''),
-                    numero_camiseta=player_info.get('shirtNumber'),
-                    rating=stats.get('rating'),
-                    minutos_jugados=stats.get('minutesPlayed', 0),
-                    goles=stats.get('goals', 0),
-                    asistencias=stats.get('assists', 0),
-                    tarjetas_amarillas=stats.get('yellowCards', 0),
-                    tarjetas_rojas=stats.get('redCards', 0),
-                    estadisticas_detalladas=stats
-                )
-                alineaciones_crear.append(alineacion)
-
-            except Jugador.DoesNotExist:
-                continue
-
-        if alineaciones_crear:
-            Alineacion.objects.bulk_create(alineaciones_crear, ignore_conflicts=True)
-
-        return len(alineaciones_crear)
-
-    @sync_to_async
-    def _actualizar_flag_estadisticas(self, partido, valor):
-        partido.tiene_estadisticas = valor
-        partido.save(update_fields=['tiene_estadisticas'])
-
-    @sync_to_async
-    def _actualizar_flag_eventos(self, partido, valor):
-        partido.tiene_incidentes = valor
-        partido.save(update_fields=['tiene_incidentes'])
-
-    @sync_to_async
-    def _actualizar_flag_alineaciones(self, partido, valor):
-        partido.tiene_lineups = valor
-        partido.save(update_fields=['tiene_lineups'])
-
 
-async def sync_estadisticas_todos_partidos(filtro='finished', liga_id=None, limite=None):
-    """Sincronizar estadísticas de todos los partidos"""
-    syncer = EstadisticasSyncer()
+async def sync_estadisticas_todos_partidos(filtro='finished', liga_id=None, limite=None, forzar=False):
+    """Sincronizar estadísticas de todos los partidos (los de detalles definitivos solo con forzar)"""
+    syncer = EstadisticasSyncer(forzar=forzar)
 
     try:
         # Obtener partidos
@@ -321,10 +221,13 @@ async def sync_estadisticas_todos_partidos(filtro='finished', liga_id=None, limi
         if liga_id:
             partidos_query = partidos_query.filter(liga_id=liga_id)
 
+        if not syncer.forzar:
+            partidos_query = partidos_query.filter(detalles_finales=False)
+
         if limite:
             partidos_query = partidos_query[:limite]
 
-        partidos = await sync_to_async(list)(partidos_query)
+        partidos = await en_escritor(list)(partidos_query)
 
         total = len(partidos)
 
@@ -338,30 +241,16 @@ async def sync_estadisticas_todos_partidos(filtro='finished', liga_id=None, limi
             print(f"    ID: {partido.sofascore_id} | Fecha: {partido.fecha_hora.strftime('%Y-%m-%d')}")
 
             try:
-                # Estadísticas
-                tiene_stats = await syncer.sync_estadisticas_partido(partido)
-                status_stats = "OK" if tiene_stats else "NO"
-                print(f"    Estadísticas: {status_stats}")
-
-                # Eventos
-                tiene_eventos = await syncer.sync_eventos_partido(partido)
-                status_eventos = "OK" if tiene_eventos else "NO"
-                print(f"    Eventos: {status_eventos}")
-
-                # Alineaciones
-                tiene_lineups = await syncer.sync_alineaciones_partido(partido)
-                status_lineups = "OK" if tiene_lineups else "NO"
-                print(f"    Alineaciones: {status_lineups}")
+                # Estadísticas, eventos y alineaciones en una sola escritura
+                tiene_stats, tiene_eventos, tiene_lineups = await syncer.sync_detalles_partido(partido)
+                print(f"    Estadísticas: {'OK' if tiene_stats else 'NO'}")
+                print(f"    Eventos: {'OK' if tiene_eventos else 'NO'}")
+                print(f"    Alineaciones: {'OK' if tiene_lineups else 'NO'}")
 
             except Exception as e:
                 syncer.stats['errores'] += 1
                 print(f"    ERROR: {str(e)[:100]}")
 
-            # Pausa cada 10 partidos
-            if i % 10 == 0:
-                print(f"\n    Pausa... ({i}/{total} procesados)")
-                await asyncio.sleep(2)
-
         # Resumen
         print("\n" + "=" * 70)
         print("RESUMEN DE SINCRONIZACIÓN")
@@ -370,43 +259,37 @@ async def sync_estadisticas_todos_partidos(filtro='finished', liga_id=None, limi
         print(f"Con estadísticas: {syncer.stats['con_estadisticas']}")
         print(f"Con eventos: {syncer.stats['con_eventos']}")
         print(f"Con alineaciones: {syncer.stats['con_alineaciones']}")
+        print(f"Detalles sin cambios: {syncer.stats['sin_cambios']}")
         print(f"Errores: {syncer.stats['errores']}")
+        print(f"Caché: {syncer.resumen_cache()}")
         print("=" * 70)
 
     finally:
         await syncer.close()
 
 
-async def sync_partido_individual(event_id: int):
+async def sync_partido_individual(event_id: int, forzar=False):
     """Sincronizar estadísticas de un partido específico"""
-    syncer = EstadisticasSyncer()
+    syncer = EstadisticasSyncer(forzar=forzar)
 
     try:
-        partido = await sync_to_async(Partido.objects.get)(sofascore_id=event_id)
+        partido = await en_escritor(Partido.objects.get)(sofascore_id=event_id)
 
         print(f"\nSincronizando partido: {partido}")
         print("=" * 70)
 
-        # Estadísticas
-        print("\n1. Sincronizando estadísticas...")
-        tiene_stats = await syncer.sync_estadisticas_partido(partido)
-        print(f"   Resultado: {'OK' if tiene_stats else 'NO DISPONIBLE'}")
-
-        # Eventos
-        print("\n2. Sincronizando eventos...")
-        tiene_eventos = await syncer.sync_eventos_partido(partido)
-        print(f"   Resultado: {'OK' if tiene_eventos else 'NO DISPONIBLE'}")
-
-        # Alineaciones
-        print("\n3. Sincronizando alineaciones...")
-        tiene_lineups = await syncer.sync_alineaciones_partido(partido)
-        print(f"   Resultado: {'OK' if tiene_lineups else 'NO DISPONIBLE'}")
+        # Estadísticas, eventos y alineaciones
+        print("\n1. Sincronizando estadísticas, eventos y alineaciones...")
+        tiene_stats, tiene_eventos, tiene_lineups = await syncer.sync_detalles_partido(partido)
+        print(f"   Estadísticas: {'OK' if tiene_stats else 'NO DISPONIBLE'}")
+        print(f"   Eventos: {'OK' if tiene_eventos else 'NO DISPONIBLE'}")
+        print(f"   Alineaciones: {'OK' if tiene_lineups else 'NO DISPONIBLE'}")
 
         # Verificar en BD
-        print("\n4. Verificando en base de datos...")
-        stats_count = await sync_to_async(EstadisticaPartido.objects.filter(partido=partido).count)()
-        eventos_count = await sync_to_async(EventoPartido.objects.filter(partido=partido).count)()
-        alineaciones_count = await sync_to_async(Alineacion.objects.filter(partido=partido).count)()
+        print("\n2. Verificando en base de datos...")
+        stats_count = await en_escritor(EstadisticaPartido.objects.filter(partido=partido).count)()
+        eventos_count = await en_escritor(EventoPartido.objects.filter(partido=partido).count)()
+        alineaciones_count = await en_escritor(Alineacion.objects.filter(partido=partido).count)()
 
         print(f"   Estadísticas guardadas: {stats_count}")
         print(f"   Eventos guardados: {eventos_count}")
@@ -422,17 +305,26 @@ async def sync_partido_individual(event_id: int):
         await syncer.close()
 
 
-async def sync_estadisticas_top5_ligas(limite_por_liga=None):
-    """Sincronizar estadísticas SOLO de las Top 5 ligas"""
-    syncer = EstadisticasSyncer()
+async def sync_estadisticas_top5_ligas(limite_por_liga=None, forzar=False):
+    """
+    Sincronizar estadísticas SOLO de las Top 5 ligas. El progreso se guarda
+    en checkpoints/estadisticas_top5.json y una ejecución cortada se reanuda
+    """
+    syncer = EstadisticasSyncer(forzar=forzar)
+    checkpoint = Checkpoint('estadisticas_top5')
 
     # IDs de las Top 5 ligas
     TOP_5_IDS = [8, 17, 23, 35, 34]  # La Liga, Premier, Serie A, Bundesliga, Ligue 1
 
+    if checkpoint.reanudado:
+        syncer.stats.update(checkpoint.datos.get('stats', {}))
+        print(f"\n↻ Reanudando desde el checkpoint ({len(checkpoint.completados)} tareas ya hechas)")
+    checkpoint.datos['stats'] = syncer.stats
+
     try:
         # Obtener ligas Top 5
         ligas_query = Liga.objects.filter(sofascore_id__in=TOP_5_IDS)
-        ligas = await sync_to_async(list)(ligas_query)
+        ligas = await en_escritor(list)(ligas_query)
 
         print(f"\nSincronizando estadísticas de {len(ligas)} ligas principales")
         print("=" * 70)
@@ -444,16 +336,25 @@ async def sync_estadisticas_top5_ligas(limite_por_liga=None):
             print(f"🏆 {liga.nombre}")
             print(f"{'=' * 70}")
 
+            if checkpoint.hecho(f"liga/{liga.sofascore_id}"):
+                print("✓ Ya completada (checkpoint)")
+                continue
+
             # Obtener partidos finalizados de esta liga
             partidos_query = Partido.objects.filter(
                 liga=liga,
                 estado='finished'
             ).select_related('equipo_local', 'equipo_visitante').order_by('-fecha_hora')
 
+            if not syncer.forzar:
+                partidos_query = partidos_query.filter(detalles_finales=False)
+
             if limite_por_liga:
                 partidos_query = partidos_query[:limite_por_liga]
 
-            partidos = await sync_to_async(list)(partidos_query)
+            partidos = await en_escritor(list)(partidos_query)
+            partidos = [p for p in partidos if not checkpoint.hecho(f"{liga.sofascore_id}/{p.sofascore_id}")]
+            errores_liga = syncer.stats['errores']
 
             print(f"\nPartidos a procesar: {len(partidos)}")
 
@@ -465,9 +366,7 @@ async def sync_estadisticas_top5_ligas(limite_por_liga=None):
                       end=' ')
 
                 try:
-                    tiene_stats = await syncer.sync_estadisticas_partido(partido)
-                    tiene_eventos = await syncer.sync_eventos_partido(partido)
-                    tiene_lineups = await syncer.sync_alineaciones_partido(partido)
+                    tiene_stats, tiene_eventos, tiene_lineups = await syncer.sync_detalles_partido(partido)
 
                     status = []
                     if tiene_stats: status.append("Stats")
@@ -475,16 +374,26 @@ async def sync_estadisticas_top5_ligas(limite_por_liga=None):
                     if tiene_lineups: status.append("Lineups")
 
                     print(f"✓ {', '.join(status) if status else 'Sin datos'}")
+                    clave = f"{liga.sofascore_id}/{partido.sofascore_id}"
+                    await tras_confirmar(functools.partial(checkpoint.marcar, clave))
 
                 except Exception as e:
                     syncer.stats['errores'] += 1
                     print(f"✗ Error")
 
-                if i % 10 == 0:
-                    await asyncio.sleep(2)
-
+            if syncer.stats['errores'] == errores_liga:
+                try:
+                    await confirmar_escrituras()
+                    checkpoint.compactar(f"{liga.sofascore_id}/", f"liga/{liga.sofascore_id}")
+                except LoteNoConfirmado as e:
+                    # Algún partido de la liga no llegó a disco: la próxima ejecución lo repite
+                    syncer.stats['errores'] += 1
+                    print(f"✗ {e}")
             print(f"\n✓ {liga.nombre} completada")
 
+        if all(checkpoint.hecho(f"liga/{liga.sofascore_id}") for liga in ligas):
+            checkpoint.terminar()
+
         # Resumen
         print("\n" + "=" * 70)
         print("RESUMEN FINAL")
@@ -493,14 +402,18 @@ async def sync_estadisticas_top5_ligas(limite_por_liga=None):
         print(f"Con estadísticas: {syncer.stats['con_estadisticas']}")
         print(f"Con eventos: {syncer.stats['con_eventos']}")
         print(f"Con alineaciones: {syncer.stats['con_alineaciones']}")
+        print(f"Detalles sin cambios: {syncer.stats['sin_cambios']}")
         print(f"Errores: {syncer.stats['errores']}")
+        print(f"Caché: {syncer.resumen_cache()}")
         print("=" * 70)
 
     finally:
+        # También con Ctrl-C: lo hecho hasta ahora queda en el checkpoint
+        checkpoint.guardar()
         await syncer.close()
 
 
-async def main():
+async def main(forzar=False):
     print("\n" + "=" * 70)
     print("SINCRONIZACIÓN DE ESTADÍSTICAS - TOP 5 LIGAS")
     print("=" * 70)
@@ -516,19 +429,19 @@ async def main():
     if opcion == '1':
         confirmar = input("Esto puede tardar bastante. Continuar? (s/n): ")
         if confirmar.lower() == 's':
-            await sync_estadisticas_top5_ligas()
+            await sync_estadisticas_top5_ligas(forzar=forzar)
 
     elif opcion == '2':
         limite = input("Cuántos partidos por liga? (ej: 50): ").strip()
         if limite.isdigit():
-            await sync_estadisticas_top5_ligas(limite_por_liga=int(limite))
+            await sync_estadisticas_top5_ligas(limite_por_liga=int(limite), forzar=forzar)
         else:
             print("Número inválido")
 
     elif opcion == '3':
         # Mostrar ligas disponibles
         TOP_5_IDS = [8, 17, 23, 35, 34]
-        ligas = await sync_to_async(list)(Liga.objects.filter(sofascore_id__in=TOP_5_IDS))
+        ligas = await en_escritor(list)(Liga.objects.filter(sofascore_id__in=TOP_5_IDS))
 
         if not ligas:
             print("No hay ligas Top 5 en la base de datos")
@@ -541,14 +454,14 @@ async def main():
         seleccion = input(f"\nSelecciona (1-{len(ligas)}): ").strip()
         if seleccion.isdigit() and 1 <= int(seleccion) <= len(ligas):
             liga_seleccionada = ligas[int(seleccion) - 1]
-            await sync_estadisticas_todos_partidos(liga_id=liga_seleccionada.id)
+            await sync_estadisticas_todos_partidos(liga_id=liga_seleccionada.id, forzar=forzar)
         else:
             print("Selección inválida")
 
     elif opcion == '4':
         event_id = input("ID del partido en Sofascore: ").strip()
         if event_id.isdigit():
-            await sync_partido_individual(int(event_id))
+            await sync_partido_individual(int(event_id), forzar=forzar)
         else:
             print("ID inválido")
 
@@ -560,5 +473,13 @@ async def main():
         print("Opción inválida")
 
 
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', action='store_true',
+                        help="volver a pedir los detalles que ya son definitivos")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parsear_argumentos()
+    asyncio.run(ejecutar_con_pool(main(forzar=args.force)))
\ No newline at end of file
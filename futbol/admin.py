@@ -58,3 +58,8 @@ class AlineacionAdmin(admin.ModelAdmin):
 class EstadisticaJugadorAdmin(admin.ModelAdmin):
     list_display = ['jugador', 'temporada', 'partidos_jugados', 'goles', 'asistencias']
     list_filter = ['temporada']
+
+@admin.register(EstadoSincronizacion)
+class EstadoSincronizacionAdmin(admin.ModelAdmin):
+    list_display = ['temporada', 'ultima_jornada', 'ultima_sincronizacion']
+    list_filter = ['temporada__liga']
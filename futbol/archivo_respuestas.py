@@ -0,0 +1,209 @@
+"""
+Archivo de respuestas crudas de Sofascore
+
+Cada respuesta que llega de la red se añade (endpoint, instante, status y
+JSON completo) a segmentos NDJSON comprimidos que rotan al llegar a
+`tamano_segmento`. Cada registro es un miembro gzip (o un frame zstd)
+independiente, así que se puede leer suelto saltando a su offset; un índice
+SQLite guarda endpoint -> (segmento, offset, longitud).
+
+Sirve para volver a parsear todo lo descargado cuando cambia el modelo
+(p. ej. se mapean estadísticas nuevas) a velocidad de disco en lugar de
+volver a pedir miles de endpoints.
+"""
+
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:  # Dependencia opcional, solo para compresion='zstd'
+    zstandard = None
+
+DIRECTORIO = os.environ.get(
+    'SOFASCORE_ARCHIVO_DIR',
+    str(Path(__file__).resolve().parent.parent / 'archivo_sofascore')
+)
+TAMANO_SEGMENTO = int(os.environ.get('SOFASCORE_ARCHIVO_SEGMENTO_MB', 64)) * 1024 * 1024
+COMPRESION = os.environ.get('SOFASCORE_ARCHIVO_COMPRESION', 'gzip')
+
+EXTENSIONES = {'gzip': '.ndjson.gz', 'zstd': '.ndjson.zst'}
+
+
+class ArchivoRespuestas:
+    """Almacén append-only de respuestas con índice por endpoint"""
+
+    def __init__(self, directorio: str = DIRECTORIO, tamano_segmento: int = TAMANO_SEGMENTO,
+                 compresion: str = COMPRESION):
+        if compresion not in EXTENSIONES:
+            raise ValueError(f"Compresión desconocida: {compresion} (opciones: {', '.join(EXTENSIONES)})")
+        if compresion == 'zstd' and zstandard is None:
+            raise RuntimeError("La compresión zstd necesita zstandard (pip install zstandard)")
+
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+        self.tamano_segmento = tamano_segmento
+        self.compresion = compresion
+        self.registros_escritos = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.directorio / 'indice.sqlite3'), check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS registros (
+                id INTEGER PRIMARY KEY,
+                endpoint TEXT NOT NULL,
+                segmento TEXT NOT NULL,
+                offset INTEGER NOT NULL,
+                longitud INTEGER NOT NULL,
+                instante REAL NOT NULL,
+                status INTEGER
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_endpoint ON registros (endpoint)')
+        self._conn.commit()
+
+        self._compresor = zstandard.ZstdCompressor() if compresion == 'zstd' else None
+        self._segmento = None
+        self._fichero = None
+
+    # ============================================
+    # SEGMENTOS
+    # ============================================
+
+    def segmentos(self):
+        """Segmentos existentes en orden de escritura"""
+        return sorted(p for p in self.directorio.iterdir() if p.name.startswith('respuestas-')
+                      and p.name.endswith(tuple(EXTENSIONES.values())))
+
+    def _abrir_segmento(self):
+        """
+        Empezar un segmento nuevo. Nunca se añade a uno de otra ejecución:
+        si aquella terminó a medias su último registro puede estar cortado.
+        """
+        if self._fichero:
+            self._fichero.close()
+        numeros = [int(re.search(r'respuestas-(\d+)', p.name).group(1)) for p in self.segmentos()]
+        numero = max(numeros, default=0) + 1
+        self._segmento = f"respuestas-{numero:06d}{EXTENSIONES[self.compresion]}"
+        self._fichero = open(self.directorio / self._segmento, 'ab')
+
+    def _comprimir(self, linea: bytes) -> bytes:
+        if self._compresor:
+            return self._compresor.compress(linea)
+        return gzip.compress(linea, compresslevel=6)
+
+    @staticmethod
+    def _descomprimir(bloque: bytes, segmento: str) -> bytes:
+        if segmento.endswith(EXTENSIONES['zstd']):
+            return zstandard.ZstdDecompressor().decompress(bloque)
+        return gzip.decompress(bloque)
+
+    # ============================================
+    # ESCRITURA
+    # ============================================
+
+    def guardar(self, endpoint: str, status: Optional[int], datos: Any):
+        """Añadir una respuesta al segmento actual"""
+        instante = time.time()
+        linea = json.dumps(
+            {'endpoint': endpoint, 'instante': instante, 'status': status, 'datos': datos},
+            separators=(',', ':'), ensure_ascii=False
+        ).encode('utf-8') + b'\n'
+        bloque = self._comprimir(linea)
+
+        with self._lock:
+            if self._fichero is None or self._fichero.tell() >= self.tamano_segmento:
+                self._abrir_segmento()
+            offset = self._fichero.tell()
+            self._fichero.write(bloque)
+            self._fichero.flush()
+
+            self._conn.execute(
+                'INSERT INTO registros (endpoint, segmento, offset, longitud, instante, status) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (endpoint, self._segmento, offset, len(bloque), instante, status)
+            )
+            self._conn.commit()
+            self.registros_escritos += 1
+
+    # ============================================
+    # LECTURA
+    # ============================================
+
+    def leer(self, endpoint: str, solo_ok: bool = True) -> Optional[Dict]:
+        """Último registro archivado de un endpoint (por defecto, el último con status 200)"""
+        consulta = 'SELECT segmento, offset, longitud FROM registros WHERE endpoint = ?'
+        if solo_ok:
+            consulta += ' AND status = 200'
+        with self._lock:
+            if self._fichero:
+                self._fichero.flush()
+            fila = self._conn.execute(consulta + ' ORDER BY id DESC LIMIT 1', (endpoint,)).fetchone()
+        if fila is None:
+            return None
+
+        segmento, offset, longitud = fila
+        with open(self.directorio / segmento, 'rb') as f:
+            f.seek(offset)
+            return json.loads(self._descomprimir(f.read(longitud), segmento))
+
+    def registros(self, patron: str = None, solo_ok: bool = True) -> Iterator[Dict]:
+        """
+        Recorrer todo el archivo en orden de escritura leyendo los segmentos
+        de forma secuencial (sin usar el índice). `patron` filtra endpoints
+        con una regex. Un último registro cortado (ejecución interrumpida) se
+        ignora.
+        """
+        filtro = re.compile(patron) if patron else None
+        for ruta in self.segmentos():
+            for registro in self._leer_segmento(ruta):
+                if solo_ok and registro['status'] != 200:
+                    continue
+                if filtro and not filtro.search(registro['endpoint']):
+                    continue
+                yield registro
+
+    def _leer_segmento(self, ruta: Path) -> Iterator[Dict]:
+        with open(ruta, 'rb') as crudo:
+            if ruta.name.endswith(EXTENSIONES['zstd']):
+                flujo = zstandard.ZstdDecompressor().stream_reader(crudo, read_across_frames=True)
+            else:
+                flujo = gzip.GzipFile(fileobj=crudo)
+            try:
+                for linea in io.TextIOWrapper(flujo, encoding='utf-8'):
+                    try:
+                        yield json.loads(linea)
+                    except json.JSONDecodeError:
+                        return
+            except (EOFError, OSError, getattr(zstandard, 'ZstdError', OSError)):
+                return
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            registros, endpoints = self._conn.execute(
+                'SELECT COUNT(*), COUNT(DISTINCT endpoint) FROM registros'
+            ).fetchone()
+        segmentos = self.segmentos()
+        return {
+            'registros': registros,
+            'endpoints': endpoints,
+            'segmentos': len(segmentos),
+            'tamano_mb': round(sum(p.stat().st_size for p in segmentos) / 1024 / 1024, 2),
+        }
+
+    def cerrar(self):
+        with self._lock:
+            if self._fichero:
+                self._fichero.close()
+                self._fichero = None
+            self._conn.close()
@@ -0,0 +1,255 @@
+"""
+Caché persistente de respuestas de Sofascore en SQLite
+
+Cada respuesta se guarda comprimida con zlib y con una caducidad que depende
+de la familia del endpoint: lo que ya no puede cambiar (detalles de partidos
+finalizados, páginas de temporadas ya terminadas) se guarda para siempre y lo que está vivo
+(/events/live, tablas) caduca en segundos o minutos. Cuando la caché pasa del
+tamaño máximo se desalojan las entradas menos usadas recientemente (LRU).
+"""
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+RUTA = os.environ.get(
+    'SOFASCORE_CACHE_PATH',
+    str(Path(__file__).resolve().parent.parent / 'cache_sofascore.sqlite3')
+)
+TAMANO_MAXIMO = int(os.environ.get('SOFASCORE_CACHE_MB', 512)) * 1024 * 1024
+
+PARA_SIEMPRE = None
+MINUTO = 60
+HORA = 60 * MINUTO
+DIA = 24 * HORA
+
+# Aciertos cuyo ultimo_acceso se acumula en memoria antes de escribirlo en la BD
+ACCESOS_POR_VOLCADO = 500
+
+# Días sin partidos nuevos para dar por cerrada una lista de eventos
+DIAS_LISTA_CERRADA = 3
+
+# Estados que ya no cambian (un aplazado se vuelve a programar: no está cerrado)
+ESTADOS_CERRADOS = {'finished', 'canceled', 'cancelled', 'abandoned'}
+
+
+def _lista_cerrada(eventos) -> bool:
+    """True si todos los eventos terminaron hace más de DIAS_LISTA_CERRADA días"""
+    if not eventos:
+        return False
+    limite = (datetime.now() - timedelta(days=DIAS_LISTA_CERRADA)).timestamp()
+    return all(
+        e.get('status', {}).get('type') in ESTADOS_CERRADOS and e.get('startTimestamp', 0) < limite
+        for e in eventos
+    )
+
+
+class CacheRespuestas:
+    """Caché de respuestas JSON indexada por endpoint"""
+
+    def __init__(self, ruta: str = RUTA, tamano_maximo: int = TAMANO_MAXIMO):
+        self.ruta = ruta
+        self.tamano_maximo = tamano_maximo
+        self.aciertos = 0
+        self.fallos = 0
+        self.eventos_finalizados = set()
+        self.temporadas_cerradas = set()
+
+        # (patrón, ttl) en orden: gana el primero que coincide.
+        # El ttl puede ser segundos, PARA_SIEMPRE o una función (match, datos) -> ttl
+        self.politicas = [
+            (r'^/sport/[^/]+/events/live$', 15),
+            (r'^/sport/[^/]+/scheduled-events/', self._ttl_eventos_fecha),
+            (r'^/event/(?P<id>\d+)/(statistics|incidents|lineups)$', self._ttl_detalle_evento),
+            (r'^/event/(?P<id>\d+)$', self._ttl_evento),
+            (r'^/unique-tournament/\d+/season/(?P<temporada>\d+)/events/', self._ttl_eventos_temporada),
+            (r'^/unique-tournament/\d+/season/\d+/standings/', 10 * MINUTO),
+            (r'^/unique-tournament/\d+/season/\d+/(info|teams)$', DIA),
+            (r'^/unique-tournament/\d+/seasons/?$', DIA),
+            (r'^/unique-tournament/\d+/?$', 7 * DIA),
+            (r'^/team/\d+/events/', 10 * MINUTO),
+            (r'^/team/\d+(/players)?$', DIA),
+        ]
+        self.politicas = [(re.compile(patron), ttl) for patron, ttl in self.politicas]
+        self.ttl_por_defecto = 5 * MINUTO
+
+        # endpoint -> instante del último acierto aún no escrito (el LRU no necesita
+        # un commit por lectura: se vuelca al guardar, al cerrar o cada ACCESOS_POR_VOLCADO)
+        self._accesos: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS respuestas (
+                endpoint TEXT PRIMARY KEY,
+                cuerpo BLOB NOT NULL,
+                tamano INTEGER NOT NULL,
+                creado REAL NOT NULL,
+                expira REAL,
+                ultimo_acceso REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_ultimo_acceso ON respuestas (ultimo_acceso)')
+        self._conn.commit()
+        self._tamano = self._conn.execute('SELECT COALESCE(SUM(tamano), 0) FROM respuestas').fetchone()[0]
+
+    # ============================================
+    # POLÍTICAS DE CADUCIDAD
+    # ============================================
+
+    def _ttl_detalle_evento(self, match, datos):
+        return PARA_SIEMPRE if int(match.group('id')) in self.eventos_finalizados else MINUTO
+
+    def _ttl_evento(self, match, datos):
+        estado = datos.get('event', {}).get('status', {}).get('type')
+        return PARA_SIEMPRE if estado == 'finished' else MINUTO
+
+    def _ttl_eventos_fecha(self, match, datos):
+        return PARA_SIEMPRE if _lista_cerrada(datos.get('events', [])) else 10 * MINUTO
+
+    def _ttl_eventos_temporada(self, match, datos):
+        # En la temporada actual events/last/0 recibe jornadas nuevas aunque sus partidos sean viejos
+        cerrada = int(match.group('temporada')) in self.temporadas_cerradas
+        return PARA_SIEMPRE if cerrada and _lista_cerrada(datos.get('events', [])) else 10 * MINUTO
+
+    def ttl_para(self, endpoint: str, datos: Dict) -> Optional[float]:
+        """Segundos de vida de una respuesta (None = para siempre)"""
+        ruta = endpoint.split('?')[0]
+        for patron, ttl in self.politicas:
+            match = patron.match(ruta)
+            if match:
+                return ttl(match, datos) if callable(ttl) else ttl
+        return self.ttl_por_defecto
+
+    def marcar_finalizado(self, event_id: int):
+        """Avisar de que un partido terminó: sus detalles ya no cambiarán"""
+        self.eventos_finalizados.add(int(event_id))
+
+    def marcar_temporada_cerrada(self, season_id: int):
+        """Avisar de que una temporada terminó: sus listas de partidos ya no cambiarán"""
+        self.temporadas_cerradas.add(int(season_id))
+
+    def _registrar_finalizados(self, datos: Any):
+        if not isinstance(datos, dict):
+            return
+        # /unique-tournament/{id}/seasons viene de la más reciente a la más antigua:
+        # todas menos la primera están terminadas
+        for temporada in datos.get('seasons', [])[1:]:
+            if isinstance(temporada, dict) and temporada.get('id'):
+                self.temporadas_cerradas.add(temporada['id'])
+        eventos = list(datos.get('events', []))
+        if isinstance(datos.get('event'), dict):
+            eventos.append(datos['event'])
+        for evento in eventos:
+            if evento.get('id') and evento.get('status', {}).get('type') == 'finished':
+                self.eventos_finalizados.add(evento['id'])
+
+    # ============================================
+    # LECTURA Y ESCRITURA
+    # ============================================
+
+    def obtener(self, endpoint: str) -> Optional[Any]:
+        """Devolver la respuesta guardada o None si no hay o caducó"""
+        ahora = time.time()
+        with self._lock:
+            fila = self._conn.execute(
+                'SELECT cuerpo, expira, tamano FROM respuestas WHERE endpoint = ?', (endpoint,)
+            ).fetchone()
+
+            if fila is None:
+                self.fallos += 1
+                return None
+
+            cuerpo, expira, tamano = fila
+            if expira is not None and expira < ahora:
+                self._conn.execute('DELETE FROM respuestas WHERE endpoint = ?', (endpoint,))
+                self._conn.commit()
+                self._accesos.pop(endpoint, None)
+                self._tamano -= tamano
+                self.fallos += 1
+                return None
+
+            self._accesos[endpoint] = ahora
+            if len(self._accesos) >= ACCESOS_POR_VOLCADO:
+                self._volcar_accesos()
+                self._conn.commit()
+            self.aciertos += 1
+
+        datos = json.loads(zlib.decompress(cuerpo))
+        self._registrar_finalizados(datos)
+        return datos
+
+    def guardar(self, endpoint: str, datos: Any):
+        """Guardar una respuesta con la caducidad de su familia"""
+        self._registrar_finalizados(datos)
+        ttl = self.ttl_para(endpoint, datos)
+        if ttl == 0:
+            return
+
+        ahora = time.time()
+        cuerpo = zlib.compress(json.dumps(datos, separators=(',', ':')).encode('utf-8'))
+        expira = None if ttl is PARA_SIEMPRE else ahora + ttl
+
+        with self._lock:
+            anterior = self._conn.execute(
+                'SELECT tamano FROM respuestas WHERE endpoint = ?', (endpoint,)
+            ).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO respuestas (endpoint, cuerpo, tamano, creado, expira, ultimo_acceso) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                (endpoint, cuerpo, len(cuerpo), ahora, expira, ahora)
+            )
+            self._tamano += len(cuerpo) - (anterior[0] if anterior else 0)
+            self._accesos.pop(endpoint, None)
+
+            self._volcar_accesos()
+            if self._tamano > self.tamano_maximo:
+                self._desalojar()
+            self._conn.commit()
+
+    def _volcar_accesos(self):
+        """Escribir los ultimo_acceso pendientes (sin commit: lo hace quien llama)"""
+        if self._accesos:
+            self._conn.executemany('UPDATE respuestas SET ultimo_acceso = ? WHERE endpoint = ?',
+                                   [(instante, endpoint) for endpoint, instante in self._accesos.items()])
+            self._accesos.clear()
+
+    def _desalojar(self):
+        """Borrar las entradas menos usadas hasta bajar al 90% del máximo"""
+        objetivo = self.tamano_maximo * 0.9
+        filas = self._conn.execute(
+            'SELECT endpoint, tamano FROM respuestas ORDER BY ultimo_acceso'
+        )
+        borrar = []
+        for endpoint, tamano in filas:
+            if self._tamano <= objetivo:
+                break
+            borrar.append((endpoint,))
+            self._tamano -= tamano
+        self._conn.executemany('DELETE FROM respuestas WHERE endpoint = ?', borrar)
+
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            entradas = self._conn.execute('SELECT COUNT(*) FROM respuestas').fetchone()[0]
+        total = self.aciertos + self.fallos
+        return {
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'ratio_aciertos': round(self.aciertos / total, 3) if total else 0,
+            'entradas': entradas,
+            'tamano_mb': round(self._tamano / 1024 / 1024, 2),
+        }
+
+    def cerrar(self):
+        with self._lock:
+            self._volcar_accesos()
+            self._conn.commit()
+            self._conn.close()
@@ -0,0 +1,115 @@
+"""
+Checkpoints en disco para sincronizaciones largas
+
+Un Checkpoint guarda en un JSON qué partes de un trabajo ya están hechas
+(ligas, temporadas, ids de partidos) para que, si el proceso se cae o se
+para con Ctrl-C, la siguiente ejecución continúe donde se quedó. Cada
+guardado escribe un fichero temporal y lo cambia por el bueno con
+os.replace, así que el JSON nunca queda a medias.
+
+Uso:
+    with Checkpoint('sync_todas_las_ligas') as checkpoint:
+        for liga in ligas:
+            if checkpoint.hecho(f"liga/{liga}"):
+                continue
+            ...
+            checkpoint.marcar(f"liga/{liga}")
+        checkpoint.terminar()   # trabajo completo: se borra el checkpoint
+
+Para empezar de cero basta con borrar checkpoints/<nombre>.json.
+"""
+
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+DIRECTORIO = os.environ.get(
+    'SOFASCORE_CHECKPOINTS_DIR',
+    str(Path(__file__).resolve().parent.parent / 'checkpoints')
+)
+
+# Segundos mínimos entre escrituras al marcar (un kill -9 pierde como mucho esto)
+GUARDAR_CADA = float(os.environ.get('SOFASCORE_CHECKPOINT_SEGUNDOS', 1))
+
+
+class Checkpoint:
+    """Conjunto persistente de claves completadas de un trabajo"""
+
+    def __init__(self, nombre: str, directorio: str = DIRECTORIO, guardar_cada: float = GUARDAR_CADA):
+        self.nombre = nombre
+        self.ruta = Path(directorio) / f"{nombre}.json"
+        self.guardar_cada = guardar_cada
+        self.completados = set()
+        self.datos: Dict[str, Any] = {}
+        self.inicio = time.time()
+        self.reanudado = False
+        self.terminado = False
+        self._pendiente = False
+        self._ultimo_guardado = 0.0
+
+        if self.ruta.exists():
+            with open(self.ruta, encoding='utf-8') as f:
+                contenido = json.load(f)
+            self.completados = set(contenido.get('completados', []))
+            self.datos = contenido.get('datos', {})
+            self.inicio = contenido.get('inicio', self.inicio)
+            self.reanudado = True
+
+    def hecho(self, clave: str) -> bool:
+        return clave in self.completados
+
+    def marcar(self, clave: str):
+        """Dar una clave por completada (se escribe a disco como mucho cada `guardar_cada` s)"""
+        self.completados.add(clave)
+        self._pendiente = True
+        if time.monotonic() - self._ultimo_guardado >= self.guardar_cada:
+            self.guardar()
+
+    def compactar(self, prefijo: str, clave: str):
+        """Sustituir todas las claves que empiezan por `prefijo` por `clave` (p. ej. al cerrar una temporada)"""
+        self.completados = {c for c in self.completados if not c.startswith(prefijo)}
+        self.completados.add(clave)
+        self.guardar()
+
+    def guardar(self):
+        """Escritura atómica: fichero temporal en el mismo directorio + os.replace"""
+        if self.terminado:
+            return
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        contenido = {
+            'nombre': self.nombre,
+            'inicio': self.inicio,
+            'actualizado': time.time(),
+            'completados': sorted(self.completados),
+            'datos': self.datos,
+        }
+        descriptor, temporal = tempfile.mkstemp(prefix=f".{self.nombre}.", suffix='.tmp', dir=self.ruta.parent)
+        try:
+            with os.fdopen(descriptor, 'w', encoding='utf-8') as f:
+                json.dump(contenido, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temporal, self.ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.unlink(temporal)
+            raise
+        self._pendiente = False
+        self._ultimo_guardado = time.monotonic()
+
+    def terminar(self):
+        """El trabajo acabó entero: borrar el checkpoint para que la próxima vez empiece de cero"""
+        self.terminado = True
+        if self.ruta.exists():
+            self.ruta.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # También con Ctrl-C o una excepción: lo marcado hasta ahora no se pierde
+        if self._pendiente:
+            self.guardar()
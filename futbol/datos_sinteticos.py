@@ -0,0 +1,397 @@
+"""
+Respuestas sintéticas con la forma de las de Sofascore, para benchmarks y pruebas.
+Son deterministas: el mismo id devuelve siempre el mismo JSON.
+
+ApiSintetica contesta todos los endpoints que usa SofascoreAPI: temporadas
+completas a doble vuelta, partidos por fecha, en vivo, detalles, tablas,
+equipos y plantillas. Guarda los eventos que genera para que los detalles,
+tablas y calendarios de equipo sean coherentes con las listas.
+"""
+
+import random
+import re
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from futbol.transportes import Respuesta, Transporte
+
+JUGADORES_POR_EQUIPO = 20
+TITULARES = 11
+
+TORNEOS = {
+    8: ('LaLiga', 'Spain', 'ES'),
+    17: ('Premier League', 'England', 'EN'),
+    23: ('Serie A', 'Italy', 'IT'),
+    35: ('Bundesliga', 'Germany', 'DE'),
+    34: ('Ligue 1', 'France', 'FR'),
+}
+
+# Temporada en curso de cada torneo (las mismas que sync_top5_ligas.py)
+TEMPORADAS_ACTUALES = {8: 61643, 17: 61627, 23: 61644, 35: 61628, 34: 61645}
+
+INICIO_TEMPORADA = datetime(2024, 8, 15, 18, 0)
+
+
+def torneo(tournament_id: int) -> Dict:
+    nombre, pais, alpha2 = TORNEOS.get(tournament_id, (f'Torneo {tournament_id}', 'Spain', 'ES'))
+    return {
+        'id': tournament_id,
+        'name': nombre,
+        'slug': nombre.lower().replace(' ', '-'),
+        'category': {'name': pais, 'alpha2': alpha2, 'country': {'name': pais, 'alpha2': alpha2}},
+        'hasStandingsGroups': True,
+    }
+
+
+def anno_temporada(season_id: int) -> int:
+    """Año de inicio aproximado a partir del id (los ids de Sofascore crecen con los años)"""
+    return 2024 - max(0, min(3, (69999 - season_id) // 10000))
+
+
+def temporada(season_id: int) -> Dict:
+    anno = anno_temporada(season_id) % 100
+    return {'id': season_id, 'name': f'Temporada {anno}/{anno + 1}', 'year': f'{anno}/{anno + 1}'}
+
+
+def equipo(team_id: int) -> Dict:
+    return {
+        'id': team_id,
+        'name': f'Equipo {team_id}',
+        'shortName': f'EQ{team_id}',
+        'slug': f'equipo-{team_id}',
+        'country': {'name': 'Spain', 'alpha2': 'ES'},
+    }
+
+
+def jugador(player_id: int) -> Dict:
+    return {
+        'id': player_id,
+        'name': f'Jugador {player_id}',
+        'slug': f'jugador-{player_id}',
+        'position': 'GDDDDMMMMFF'[player_id % 11],
+        'shirtNumber': player_id % 100,
+    }
+
+
+def plantilla(team_id: int) -> List[int]:
+    """Ids de los jugadores de un equipo"""
+    return [team_id * 100 + n for n in range(1, JUGADORES_POR_EQUIPO + 1)]
+
+
+def equipos_evento(event_id: int) -> Tuple[int, int]:
+    """(local, visitante) por defecto de un evento"""
+    return 1 + event_id % 20, 1 + (event_id + 7) % 20
+
+
+def evento(event_id: int, home_id: int = None, away_id: int = None, estado: str = 'finished',
+           tournament_id: int = 8, season_id: int = 61643, timestamp: int = None) -> Dict:
+    rnd = random.Random(event_id)
+    home_defecto, away_defecto = equipos_evento(event_id)
+    home_id = home_id or home_defecto
+    away_id = away_id or away_defecto
+    goles_local, goles_visitante = (rnd.randint(0, 4), rnd.randint(0, 3)) if estado != 'notstarted' else (None, None)
+    marcador = lambda goles: {'current': goles, 'display': goles, 'period1': goles} if goles is not None else {}
+    ganador = None
+    if estado == 'finished':
+        ganador = 1 if goles_local > goles_visitante else 2 if goles_visitante > goles_local else 3
+
+    datos = {
+        'id': event_id,
+        'slug': f'partido-{event_id}',
+        'customId': f'c{event_id}',
+        'tournament': {
+            'name': torneo(tournament_id)['name'],
+            'category': torneo(tournament_id)['category'],
+            'uniqueTournament': torneo(tournament_id),
+        },
+        'season': temporada(season_id),
+        'roundInfo': {'round': 1 + event_id % 38},
+        'homeTeam': equipo(home_id),
+        'awayTeam': equipo(away_id),
+        'homeScore': marcador(goles_local),
+        'awayScore': marcador(goles_visitante),
+        'status': {'type': estado, 'code': {'finished': 100, 'inprogress': 6}.get(estado, 0),
+                   'description': estado},
+        'winnerCode': ganador,
+        'startTimestamp': timestamp or int(INICIO_TEMPORADA.timestamp()) + event_id * 3600,
+    }
+    if estado == 'inprogress':
+        datos['time'] = {'currentPeriodStartTimestamp': datos['startTimestamp'], 'initial': 0,
+                         'max': 2700, 'extra': 540}
+    return datos
+
+
+def incidentes(event_id: int, home_id: int = None, away_id: int = None) -> Dict:
+    rnd = random.Random(event_id)
+    if home_id is None:
+        home_id, away_id = equipos_evento(event_id)
+    lista = [{'id': event_id * 100, 'incidentType': 'period', 'text': 'HT', 'time': 45}]
+    for n in range(1, 16):
+        es_local = rnd.random() < 0.5
+        ids = plantilla(home_id if es_local else away_id)
+        tipo = rnd.choice(['goal', 'goal', 'yellowCard', 'yellowCard', 'substitution', 'redCard'])
+        incidente = {
+            'id': event_id * 100 + n,
+            'incidentType': tipo,
+            'time': rnd.randint(1, 90),
+            'isHome': es_local,
+            'player': jugador(rnd.choice(ids)),
+        }
+        if tipo == 'goal':
+            incidente['assist1'] = jugador(rnd.choice(ids))
+        lista.append(incidente)
+    return {'incidents': lista}
+
+
+def alineaciones(event_id: int, home_id: int = None, away_id: int = None) -> Dict:
+    if home_id is None:
+        home_id, away_id = equipos_evento(event_id)
+
+    def lado(team_id):
+        return {'players': [
+            {
+                'player': jugador(player_id),
+                'substitute': n >= TITULARES,
+                'statistics': {'rating': 6.0 + (player_id % 30) / 10, 'minutesPlayed': 90 if n < TITULARES else 0},
+            }
+            for n, player_id in enumerate(plantilla(team_id))
+        ]}
+    return {'home': lado(home_id), 'away': lado(away_id)}
+
+
+def estadisticas(event_id: int) -> Dict:
+    rnd = random.Random(event_id)
+    posesion = rnd.randint(30, 70)
+    items = [
+        {'name': 'Ball possession', 'home': f'{posesion}%', 'away': f'{100 - posesion}%'},
+        {'name': 'Total shots', 'home': str(rnd.randint(3, 25)), 'away': str(rnd.randint(3, 25))},
+        {'name': 'Corner kicks', 'home': str(rnd.randint(0, 12)), 'away': str(rnd.randint(0, 12))},
+        {'name': 'Fouls', 'home': str(rnd.randint(5, 20)), 'away': str(rnd.randint(5, 20))},
+    ]
+    return {'statistics': [
+        {'period': periodo, 'groups': [{'statisticsItems': items}]} for periodo in ['ALL', '1ST', '2ND']
+    ]}
+
+
+class ApiSintetica:
+    """
+    Todos los endpoints de SofascoreAPI con datos coherentes entre sí.
+    `hoy` decide qué partidos están finalizados y cuáles por jugar.
+    """
+
+    def __init__(self, equipos_por_liga: int = 20, partidos_por_dia: int = 10, hoy: datetime = None,
+                 en_vivo: int = 5):
+        self.equipos_por_liga = equipos_por_liga
+        self.partidos_por_dia = partidos_por_dia
+        self.hoy = hoy or INICIO_TEMPORADA + timedelta(days=200)
+        self.en_vivo = en_vivo
+        self.eventos: Dict[int, Dict] = {}
+        self._temporadas: Dict[Tuple[int, int], List[int]] = {}
+        self._lock = threading.RLock()
+
+        self.rutas = [
+            (r'^/sport/[^/]+/scheduled-events/(\d{4}-\d{2}-\d{2})$', self._partidos_fecha),
+            (r'^/sport/[^/]+/events/live$', self._partidos_en_vivo),
+            (r'^/event/(\d+)/incidents$', self._detalle(incidentes)),
+            (r'^/event/(\d+)/lineups$', self._detalle(alineaciones)),
+            (r'^/event/(\d+)/statistics$', lambda event_id: estadisticas(int(event_id))),
+            (r'^/event/(\d+)$', lambda event_id: {'event': self.evento(int(event_id))}),
+            (r'^/team/(\d+)$', lambda team_id: {'team': equipo(int(team_id))}),
+            (r'^/team/(\d+)/players$',
+             lambda team_id: {'players': [{'player': jugador(i)} for i in plantilla(int(team_id))]}),
+            (r'^/team/(\d+)/events/(last|next)/\d+$', self._partidos_equipo),
+            (r'^/unique-tournament/(\d+)/?$', lambda tid: {'uniqueTournament': torneo(int(tid))}),
+            (r'^/unique-tournament/(\d+)/seasons/?$', self._temporadas_torneo),
+            (r'^/unique-tournament/(\d+)/season/(\d+)/info$',
+             lambda tid, sid: {'info': {'season': temporada(int(sid))}}),
+            (r'^/unique-tournament/(\d+)/season/(\d+)/teams$', self._equipos_temporada),
+            (r'^/unique-tournament/(\d+)/season/(\d+)/standings/total$', self._tabla),
+            (r'^/unique-tournament/(\d+)/season/(\d+)/events/(last|next)/\d+$', self._partidos_temporada),
+        ]
+        self.rutas = [(re.compile(patron), generador) for patron, generador in self.rutas]
+
+    def responder(self, ruta: str) -> Tuple[int, Dict]:
+        """(status, datos) para una ruta relativa a /api/v1; 404 si no se conoce"""
+        ruta = ruta.split('?')[0]
+        for patron, generador in self.rutas:
+            match = patron.match(ruta)
+            if match:
+                return 200, generador(*match.groups())
+        return 404, {'error': {'code': 404, 'message': 'Not Found'}}
+
+    # ============================================
+    # EVENTOS
+    # ============================================
+
+    def _registrar(self, **kwargs) -> Dict:
+        datos = evento(**kwargs)
+        with self._lock:
+            return self.eventos.setdefault(datos['id'], datos)
+
+    def _estado(self, fecha: datetime) -> str:
+        return 'finished' if fecha + timedelta(hours=2) < self.hoy else 'notstarted'
+
+    def avanzar(self, dias: int = 1):
+        """Mover `hoy` hacia delante: los partidos que ya se jugaron pasan a finalizados"""
+        with self._lock:
+            self.hoy += timedelta(days=dias)
+            for event_id, datos in list(self.eventos.items()):
+                inicio = datetime.fromtimestamp(datos['startTimestamp'])
+                if datos['status']['type'] != 'notstarted' or self._estado(inicio) != 'finished':
+                    continue
+                nuevo = evento(event_id, datos['homeTeam']['id'], datos['awayTeam']['id'], 'finished',
+                               datos['tournament']['uniqueTournament']['id'], datos['season']['id'],
+                               datos['startTimestamp'])
+                nuevo['roundInfo'] = datos['roundInfo']
+                self.eventos[event_id] = nuevo
+
+    def equipos_liga(self, tournament_id: int) -> List[int]:
+        return [tournament_id * 100 + n for n in range(1, self.equipos_por_liga + 1)]
+
+    def evento(self, event_id: int) -> Dict:
+        with self._lock:
+            if event_id in self.eventos:
+                return self.eventos[event_id]
+        return evento(event_id)
+
+    def eventos_temporada(self, tournament_id: int, season_id: int) -> List[Dict]:
+        """Liga a doble vuelta (método del círculo): 38 jornadas de 10 partidos con 20 equipos"""
+        with self._lock:
+            clave = (tournament_id, season_id)
+            if clave not in self._temporadas:
+                equipos = self.equipos_liga(tournament_id)
+                jornadas = []
+                rotacion = list(equipos)
+                for _ in range(len(equipos) - 1):
+                    mitad = len(rotacion) // 2
+                    jornadas.append(list(zip(rotacion[:mitad], reversed(rotacion[mitad:]))))
+                    rotacion = [rotacion[0], rotacion[-1], *rotacion[1:-1]]
+                jornadas += [[(visitante, local) for local, visitante in jornada] for jornada in jornadas]
+
+                ids = []
+                inicio = INICIO_TEMPORADA.replace(year=anno_temporada(season_id))
+                for numero, jornada in enumerate(jornadas):
+                    for k, (local, visitante) in enumerate(jornada):
+                        fecha = inicio + timedelta(days=7 * numero, hours=2 * k)
+                        datos = self._registrar(
+                            event_id=season_id * 1000 + len(ids), home_id=local, away_id=visitante,
+                            estado=self._estado(fecha), tournament_id=tournament_id, season_id=season_id,
+                            timestamp=int(fecha.timestamp())
+                        )
+                        datos['roundInfo'] = {'round': numero + 1}
+                        ids.append(datos['id'])
+                self._temporadas[clave] = ids
+            return [self.eventos[i] for i in self._temporadas[clave]]
+
+    def _detalle(self, generador):
+        def detalle(event_id):
+            datos = self.evento(int(event_id))
+            return generador(datos['id'], datos['homeTeam']['id'], datos['awayTeam']['id'])
+        return detalle
+
+    def _partidos_fecha(self, fecha: str):
+        dia = datetime.strptime(fecha, '%Y-%m-%d')
+        torneos = list(TORNEOS)
+        eventos = []
+        for k in range(self.partidos_por_dia):
+            rnd = random.Random(dia.toordinal() * 100 + k)
+            tournament_id = torneos[k % len(torneos)]
+            local, visitante = rnd.sample(self.equipos_liga(tournament_id), 2)
+            hora = dia + timedelta(hours=12 + k % 10)
+            eventos.append(self._registrar(
+                event_id=dia.toordinal() * 100 + k, home_id=local, away_id=visitante,
+                estado=self._estado(hora), tournament_id=tournament_id,
+                season_id=TEMPORADAS_ACTUALES[tournament_id],
+                timestamp=int(hora.timestamp())
+            ))
+        return {'events': eventos}
+
+    def _partidos_en_vivo(self):
+        eventos = []
+        for k in range(self.en_vivo):
+            tournament_id = list(TORNEOS)[k % len(TORNEOS)]
+            local, visitante = self.equipos_liga(tournament_id)[2 * k:2 * k + 2]
+            eventos.append(self._registrar(
+                event_id=self.hoy.toordinal() * 100 + 90 + k, home_id=local, away_id=visitante,
+                estado='inprogress', tournament_id=tournament_id,
+                season_id=TEMPORADAS_ACTUALES[tournament_id], timestamp=int(self.hoy.timestamp())
+            ))
+        return {'events': eventos}
+
+    def _partidos_temporada(self, tournament_id: str, season_id: str, cuales: str):
+        eventos = self.eventos_temporada(int(tournament_id), int(season_id))
+        jugados = cuales == 'last'
+        return {'events': [e for e in eventos if (e['status']['type'] == 'finished') == jugados],
+                'hasNextPage': False}
+
+    def _partidos_equipo(self, team_id: str, cuales: str):
+        team_id = int(team_id)
+        if team_id // 100 in TORNEOS:
+            self.eventos_temporada(team_id // 100, TEMPORADAS_ACTUALES[team_id // 100])
+        with self._lock:
+            eventos = sorted(
+                (e for e in self.eventos.values() if team_id in (e['homeTeam']['id'], e['awayTeam']['id'])),
+                key=lambda e: e['startTimestamp']
+            )
+        if cuales == 'last':
+            return {'events': [e for e in eventos if e['status']['type'] == 'finished'][-30:]}
+        return {'events': [e for e in eventos if e['status']['type'] == 'notstarted'][:30]}
+
+    # ============================================
+    # TORNEOS
+    # ============================================
+
+    def _temporadas_torneo(self, tournament_id: str):
+        actual = TEMPORADAS_ACTUALES.get(int(tournament_id), 61643)
+        return {'seasons': [temporada(actual - 10000 * n) for n in range(3)]}
+
+    def _equipos_temporada(self, tournament_id: str, season_id: str):
+        return {'teams': [{'team': equipo(i)} for i in self.equipos_liga(int(tournament_id))]}
+
+    def _tabla(self, tournament_id: str, season_id: str):
+        filas = {i: {'team': equipo(i), 'matches': 0, 'wins': 0, 'draws': 0, 'losses': 0,
+                     'scoresFor': 0, 'scoresAgainst': 0, 'points': 0}
+                 for i in self.equipos_liga(int(tournament_id))}
+        for e in self.eventos_temporada(int(tournament_id), int(season_id)):
+            if e['status']['type'] != 'finished':
+                continue
+            local, visitante = filas[e['homeTeam']['id']], filas[e['awayTeam']['id']]
+            goles_local, goles_visitante = e['homeScore']['current'], e['awayScore']['current']
+            for fila, favor, contra in [(local, goles_local, goles_visitante), (visitante, goles_visitante, goles_local)]:
+                fila['matches'] += 1
+                fila['scoresFor'] += favor
+                fila['scoresAgainst'] += contra
+                clave = 'wins' if favor > contra else 'losses' if favor < contra else 'draws'
+                fila[clave] += 1
+                fila['points'] += {'wins': 3, 'draws': 1, 'losses': 0}[clave]
+
+        orden = sorted(filas.values(), key=lambda f: (f['points'], f['scoresFor'] - f['scoresAgainst']), reverse=True)
+        for posicion, fila in enumerate(orden, 1):
+            fila['position'] = posicion
+        return {'standings': [{'type': 'total', 'rows': orden}]}
+
+
+_api = ApiSintetica()
+
+
+def responder(ruta: str) -> Tuple[int, Dict]:
+    """(status, datos) para una ruta relativa a /api/v1 con la ApiSintetica por defecto"""
+    return _api.responder(ruta)
+
+
+class TransporteSintetico(Transporte):
+    """Transporte en memoria que contesta con una ApiSintetica, sin red ni navegador"""
+
+    nombre = 'sintetico'
+    BASE_URL = 'http://sintetico/api/v1'
+
+    def __init__(self, concurrencia: int = 8, api: Optional[ApiSintetica] = None):
+        super().__init__(concurrencia)
+        self.api = api or _api
+        self.peticiones = 0
+
+    async def _obtener(self, url: str) -> Respuesta:
+        self.peticiones += 1
+        status, datos = self.api.responder(url[len(self.BASE_URL):])
+        return Respuesta(status, datos if status == 200 else None)
@@ -0,0 +1,290 @@
+"""
+Escritor único de la BD
+
+Con el pipeline concurrente cada operación de BD (@sync_to_async) hacía su
+propio autocommit: cientos de transacciones pequeñas por segundo peleándose
+por el lock de SQLite. EscritorBD es un hilo dedicado que ejecuta en orden
+todas las operaciones de BD del proceso dentro de una transacción larga y
+la confirma cada LOTE operaciones o cada INTERVALO_MS ms, lo que llegue
+antes. Cada operación va en su propio savepoint: si falla se deshace solo
+ella y la excepción le llega a quien la pidió, sin tirar el lote.
+
+Las corrutinas reciben el resultado en cuanto la operación se ejecuta, sin
+esperar al commit (dentro del hilo escritor ya se ven sus propios cambios).
+Lo que solo debe pasar cuando los datos estén en disco, como marcar un
+partido en un checkpoint, se encola con tras_confirmar(). La cola está
+acotada (TAMANO_COLA): si el escritor no da abasto, los productores esperan.
+
+Si un lote no se puede confirmar, lo escrito en él se pierde aunque sus
+operaciones ya devolvieran su resultado: confirmar_escrituras() lanza
+LoteNoConfirmado, las operaciones pueden registrar con si_se_pierde() cómo
+deshacer el estado en memoria que dejaron, y lotes_perdidos() permite
+invalidar lo que se recordó de ellas.
+
+Las funciones de BD se decoran con @en_escritor en lugar de @sync_to_async.
+Con SOFASCORE_ESCRITOR=0 @en_escritor es exactamente @sync_to_async.
+"""
+
+import asyncio
+import atexit
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.db import connection, transaction
+
+USAR_ESCRITOR = os.environ.get('SOFASCORE_ESCRITOR', '1') != '0'
+LOTE = int(os.environ.get('SOFASCORE_ESCRITOR_LOTE', 500))
+INTERVALO_MS = float(os.environ.get('SOFASCORE_ESCRITOR_MS', 200))
+TAMANO_COLA = int(os.environ.get('SOFASCORE_ESCRITOR_COLA', 1000))
+
+logger = logging.getLogger(__name__)
+
+# Tipos de elemento de la cola
+_OPERACION, _DESPUES, _CONFIRMAR, _PARAR = range(4)
+
+# Escritor que corre en el hilo actual (para si_se_pierde)
+_hilo = threading.local()
+
+
+class LoteNoConfirmado(Exception):
+    """Un lote del escritor no se pudo confirmar: lo escrito en él se perdió"""
+
+
+def _resolver(futuro, resultado, error):
+    if futuro.done():  # quien esperaba se canceló
+        return
+    if error is not None:
+        futuro.set_exception(error)
+    else:
+        futuro.set_result(resultado)
+
+
+class EscritorBD:
+    """Hilo que agrupa las operaciones de BD del proceso en transacciones grandes"""
+
+    def __init__(self, lote: int = LOTE, intervalo_ms: float = INTERVALO_MS, tamano_cola: int = TAMANO_COLA):
+        self.lote = max(1, lote)
+        self.intervalo = intervalo_ms / 1000
+        self._cola = queue.Queue(maxsize=tamano_cola)
+        self._hilo = None
+        self._lock = threading.Lock()
+
+        # Estado del lote abierto (solo lo toca el hilo escritor)
+        self._transaccion = None
+        self._en_lote = 0
+        self._limite = 0.0
+        self._despues = []
+        self._deshacer = []
+
+        self.operaciones = 0
+        self.confirmaciones = 0
+        self.lotes_fallidos = 0
+        self._fallidos_sin_avisar = 0
+
+    def iniciar(self):
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name='escritor-bd', daemon=True)
+                self._hilo.start()
+
+    # ============================================
+    # API PARA LAS CORRUTINAS
+    # ============================================
+
+    async def ejecutar(self, funcion, *args, **kwargs):
+        """Ejecutar `funcion(*args, **kwargs)` en el hilo escritor y devolver su resultado"""
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        await self._poner((_OPERACION, funcion, args, kwargs, loop, futuro))
+        return await futuro
+
+    async def tras_confirmar(self, callback):
+        """Llamar a `callback()` en este bucle cuando lo escrito hasta ahora esté confirmado"""
+        await self._poner((_DESPUES, callback, None, None, asyncio.get_running_loop(), None))
+
+    async def confirmar(self):
+        """
+        Confirmar ya el lote abierto y esperar al commit. Lanza
+        LoteNoConfirmado si desde la última llamada se perdió algún lote
+        """
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        await self._poner((_CONFIRMAR, None, None, None, loop, futuro))
+        await futuro
+
+    def detener(self, timeout: float = 30):
+        """Confirmar lo pendiente y parar el hilo (desde código síncrono, p. ej. atexit)"""
+        if self._hilo is None or not self._hilo.is_alive():
+            return
+        self._cola.put((_PARAR, None, None, None, None, None))
+        self._hilo.join(timeout)
+
+    async def _poner(self, elemento):
+        self.iniciar()
+        try:
+            self._cola.put_nowait(elemento)
+        except queue.Full:
+            # Cola llena: esperar en otro hilo para no bloquear el bucle de eventos
+            await asyncio.to_thread(self._cola.put, elemento)
+
+    # ============================================
+    # HILO ESCRITOR
+    # ============================================
+
+    def _bucle(self):
+        _hilo.escritor = self
+        while True:
+            espera = None if self._transaccion is None else max(0.0, self._limite - time.monotonic())
+            try:
+                tipo, funcion, args, kwargs, loop, futuro = self._cola.get(timeout=espera)
+            except queue.Empty:
+                self._confirmar_lote()
+                continue
+
+            try:
+                if tipo == _OPERACION:
+                    self._ejecutar(funcion, args, kwargs, loop, futuro)
+                elif tipo == _DESPUES:
+                    if self._transaccion is None:
+                        self._avisar(loop, funcion)
+                    else:
+                        self._despues.append((loop, funcion))
+                else:
+                    self._confirmar_lote()
+                    if futuro is not None:
+                        error = None
+                        if self._fallidos_sin_avisar:
+                            error = LoteNoConfirmado(f"{self._fallidos_sin_avisar} lotes no se pudieron confirmar")
+                            self._fallidos_sin_avisar = 0
+                        self._avisar(loop, _resolver, futuro, None, error)
+                    if tipo == _PARAR:
+                        connection.close()
+                        return
+            except Exception as e:
+                logger.error(f"✗ Error en el escritor de BD: {e}")
+
+            if self._transaccion is not None and time.monotonic() >= self._limite:
+                self._confirmar_lote()
+
+    def _ejecutar(self, funcion, args, kwargs, loop, futuro):
+        resultado, error = None, None
+        try:
+            if self._transaccion is None:
+                self._abrir_lote()
+            with transaction.atomic():  # savepoint de la operación
+                resultado = funcion(*args, **kwargs)
+        except Exception as e:
+            error = e
+        self._avisar(loop, _resolver, futuro, resultado, error)
+
+        self.operaciones += 1
+        self._en_lote += 1
+        if self._en_lote >= self.lote:
+            self._confirmar_lote()
+
+    def _abrir_lote(self):
+        transaccion = transaction.atomic()
+        transaccion.__enter__()
+        self._transaccion = transaccion
+        self._en_lote = 0
+        self._limite = time.monotonic() + self.intervalo
+
+    def _confirmar_lote(self):
+        if self._transaccion is None:
+            return
+        transaccion, self._transaccion = self._transaccion, None
+        despues, self._despues = self._despues, []
+        deshacer, self._deshacer = self._deshacer, []
+        try:
+            if connection.needs_rollback:
+                raise transaction.TransactionManagementError("la transacción quedó marcada para rollback")
+            transaccion.__exit__(None, None, None)
+        except Exception as e:
+            if transaction.get_connection().in_atomic_block:
+                transaccion.__exit__(type(e), e, e.__traceback__)
+            # Lo del lote se perdió: no se avisa a tras_confirmar, así los checkpoints no lo dan por hecho
+            self.lotes_fallidos += 1
+            self._fallidos_sin_avisar += 1
+            logger.error(f"✗ No se pudo confirmar un lote de {self._en_lote} operaciones: {e}")
+            # Del último al primero: el estado en memoria vuelve al del último commit
+            for funcion in reversed(deshacer):
+                try:
+                    funcion()
+                except Exception as error:
+                    logger.error(f"✗ Error deshaciendo un lote perdido: {error}")
+            return
+
+        self.confirmaciones += 1
+        for loop, callback in despues:
+            self._avisar(loop, callback)
+
+    @staticmethod
+    def _avisar(loop, callback, *args):
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            pass  # el bucle ya terminó: nadie espera el aviso
+
+
+_escritor = None
+
+
+def obtener_escritor() -> EscritorBD:
+    """Escritor del proceso (se crea la primera vez y se para al salir, confirmando lo pendiente)"""
+    global _escritor
+    if _escritor is None:
+        _escritor = EscritorBD()
+        atexit.register(_escritor.detener)
+    return _escritor
+
+
+def en_escritor(funcion):
+    """Como @sync_to_async, pero la función se ejecuta en el escritor único de la BD"""
+    if not USAR_ESCRITOR:
+        return sync_to_async(funcion)
+
+    @functools.wraps(funcion)
+    async def envoltorio(*args, **kwargs):
+        return await obtener_escritor().ejecutar(funcion, *args, **kwargs)
+
+    return envoltorio
+
+
+def si_se_pierde(funcion):
+    """
+    Desde una operación del escritor: llamar a `funcion()` (en el hilo
+    escritor) si el lote en el que va no llega a confirmarse. Fuera del
+    escritor cada operación se confirma sola y no hace nada
+    """
+    escritor = getattr(_hilo, 'escritor', None)
+    if escritor is not None and escritor._transaccion is not None:
+        escritor._deshacer.append(funcion)
+
+
+def lotes_perdidos() -> int:
+    """Lotes que el escritor del proceso no pudo confirmar desde que arrancó"""
+    return _escritor.lotes_fallidos if _escritor is not None else 0
+
+
+async def tras_confirmar(callback):
+    """`callback()` cuando lo escrito hasta ahora esté en disco (enseguida sin escritor)"""
+    if USAR_ESCRITOR:
+        await obtener_escritor().tras_confirmar(callback)
+    else:
+        callback()
+
+
+async def confirmar_escrituras():
+    """
+    Esperar a que todo lo escrito hasta ahora esté confirmado. Lanza
+    LoteNoConfirmado si desde la última confirmación se perdió algún lote
+    """
+    if USAR_ESCRITOR and _escritor is not None:
+        await _escritor.confirmar()
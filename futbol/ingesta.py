@@ -0,0 +1,397 @@
+"""
+Utilidades compartidas para guardar en BD los detalles de partidos de Sofascore
+(las usan poblar_bd_sofascore.py y estadisticas.py)
+"""
+
+import functools
+import hashlib
+import json
+import os
+from datetime import timedelta
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Tuple
+
+from django.db import transaction
+from django.utils import timezone
+
+from futbol.escritor import si_se_pierde
+from futbol.models import Alineacion, EventoPartido, Jugador
+
+# Los detalles de un partido finalizado se dan por definitivos cuando están
+# los tres (estadísticas, incidentes y alineaciones) y han pasado
+# HORAS_DETALLES_FINALES desde el inicio, o cuando han pasado
+# DIAS_DETALLES_INCOMPLETOS aunque falte alguno (hay ligas sin alineaciones)
+HORAS_DETALLES_FINALES = int(os.environ.get('SOFASCORE_HORAS_DETALLES_FINALES', 4))
+DIAS_DETALLES_INCOMPLETOS = int(os.environ.get('SOFASCORE_DIAS_DETALLES_INCOMPLETOS', 3))
+
+TIPOS_INCIDENTE = {
+    'goal': 'goal',
+    'yellowCard': 'yellow_card',
+    'redCard': 'red_card',
+    'yellowRedCard': 'yellow_red_card',
+    'substitution': 'substitution',
+    'penalty': 'penalty',
+    'penaltyMissed': 'penalty_missed',
+    'ownGoal': 'own_goal',
+    'varDecision': 'var',
+    'injuryTime': 'injury',
+    'period': 'period',
+}
+
+POSICIONES = {'G': 'POR', 'D': 'DEF', 'M': 'MED', 'F': 'DEL'}
+
+
+def detalles_finales(partido, ahora=None) -> bool:
+    """¿Los detalles del partido ya no van a cambiar? (usa los flags tiene_*)"""
+    if partido.estado != 'finished' or partido.fecha_hora is None:
+        return False
+    transcurrido = (ahora or timezone.now()) - partido.fecha_hora
+    if partido.tiene_estadisticas and partido.tiene_incidentes and partido.tiene_lineups:
+        return transcurrido >= timedelta(hours=HORAS_DETALLES_FINALES)
+    return transcurrido >= timedelta(days=DIAS_DETALLES_INCOMPLETOS)
+
+
+def huella_payload(data) -> str:
+    """md5 del JSON canónico de un payload (claves ordenadas, sin espacios)"""
+    contenido = json.dumps(data, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.md5(contenido.encode('utf-8')).hexdigest()
+
+
+def detalles_cambiados(partido, forzar: bool = False, **detalles) -> Tuple[Dict[str, Dict], Dict[str, str]]:
+    """
+    Quedarse con los detalles (estadisticas=, incidentes=, alineaciones=) cuyo
+    payload no coincide con la huella guardada en el partido. Los que vienen a
+    None se ignoran. Devuelve (detalle -> payload a escribir, campo de huella
+    -> huella nueva). Con forzar se reescriben todos aunque la huella coincida.
+    """
+    cambiados, huellas = {}, {}
+    for detalle, data in detalles.items():
+        if data is None:
+            continue
+        campo = f'huella_{detalle}'
+        huella = huella_payload(data)
+        if forzar or huella != getattr(partido, campo):
+            cambiados[detalle] = data
+            huellas[campo] = huella
+    return cambiados, huellas
+
+
+# status.type de Sofascore -> Partido.estado (lo desconocido cuenta como no empezado)
+ESTADOS_PARTIDO = {
+    'notstarted': 'notstarted',
+    'inprogress': 'inprogress',
+    'finished': 'finished',
+    'postponed': 'postponed',
+    'cancelled': 'cancelled',
+    'abandoned': 'abandoned',
+    'interrupted': 'interrupted',
+    'suspended': 'suspended'
+}
+
+
+def estado_partido(status: Dict) -> str:
+    return ESTADOS_PARTIDO.get(status.get('type', 'notstarted'), 'notstarted')
+
+
+# Campos de Partido que cambian durante un partido en vivo
+CAMPOS_EN_VIVO = ('goles_local', 'goles_visitante', 'goles_local_ht', 'goles_visitante_ht',
+                  'estado', 'estado_codigo', 'estado_descripcion', 'minuto_actual')
+
+
+def minuto_actual(evento: Dict, ahora: float) -> Optional[int]:
+    """Minuto de juego de un evento en vivo a partir de su bloque `time`"""
+    tiempo = evento.get('time') or {}
+    inicio_periodo = tiempo.get('currentPeriodStartTimestamp')
+    if not inicio_periodo or evento.get('status', {}).get('type') != 'inprogress':
+        return None
+    segundos = tiempo.get('initial', 0) + max(0, ahora - inicio_periodo)
+    return int(segundos // 60) + 1
+
+
+def campos_en_vivo(evento: Dict, ahora: float) -> Dict:
+    """Valores de CAMPOS_EN_VIVO de un evento de /events/live"""
+    status = evento.get('status', {})
+    home_score = evento.get('homeScore', {})
+    away_score = evento.get('awayScore', {})
+    return {
+        'goles_local': home_score.get('current'),
+        'goles_visitante': away_score.get('current'),
+        'goles_local_ht': home_score.get('period1'),
+        'goles_visitante_ht': away_score.get('period1'),
+        'estado': estado_partido(status),
+        'estado_codigo': status.get('code'),
+        'estado_descripcion': status.get('description', ''),
+        'minuto_actual': minuto_actual(evento, ahora),
+    }
+
+
+def jugadores_de_incidentes(incidents: Iterable[Dict], partido) -> Dict[int, Tuple[Dict, Optional[int]]]:
+    """sofascore_id -> (payload, id del equipo) de los jugadores y asistentes de los incidentes"""
+    jugadores = {}
+    for incidente in incidents:
+        equipo_id = partido.equipo_local_id if incidente.get('isHome', True) else partido.equipo_visitante_id
+        for clave in ['player', 'assist1']:
+            if incidente.get(clave, {}).get('id'):
+                jugadores.setdefault(incidente[clave]['id'], (incidente[clave], equipo_id))
+    return jugadores
+
+
+def jugadores_de_alineacion(data: Dict, equipo_id: Optional[int]) -> Dict[int, Tuple[Dict, Optional[int]]]:
+    """sofascore_id -> (payload, id del equipo) de los jugadores de una alineación"""
+    return {
+        p['player']['id']: (p['player'], equipo_id)
+        for p in data.get('players', []) if p.get('player', {}).get('id')
+    }
+
+
+def resolver_jugadores(jugadores: Dict[int, Tuple[Dict, Optional[int]]]) -> Tuple[Dict[int, Jugador], int]:
+    """
+    Resolver de una vez los jugadores de un payload: una consulta `in` para
+    los que ya existen y un bulk_create con fichas mínimas para los que
+    falten (sync_jugadores_equipo las completa después).
+    Devuelve (sofascore_id -> Jugador, número de jugadores creados).
+    """
+    if not jugadores:
+        return {}, 0
+
+    existentes = Jugador.objects.in_bulk(list(jugadores), field_name='sofascore_id')
+    nuevos = [
+        Jugador(
+            sofascore_id=sofascore_id,
+            nombre=datos.get('name', ''),
+            nombre_completo=datos.get('name', ''),
+            slug=datos.get('slug', ''),
+            equipo_id=equipo_id,
+            posicion=POSICIONES.get(datos.get('position'), 'MED'),
+            numero_camiseta=datos.get('shirtNumber') or datos.get('jerseyNumber'),
+            foto_url=f"https://www.sofascore.com/static/images/player/{sofascore_id}.png",
+        )
+        for sofascore_id, (datos, equipo_id) in jugadores.items() if sofascore_id not in existentes
+    ]
+    if not nuevos:
+        return existentes, 0
+
+    # ignore_conflicts por si otra tarea crea el mismo jugador a la vez
+    Jugador.objects.bulk_create(nuevos, ignore_conflicts=True)
+    existentes.update(Jugador.objects.in_bulk([j.sofascore_id for j in nuevos], field_name='sofascore_id'))
+    return existentes, len(nuevos)
+
+
+# Campos que se comparan (y se actualizan) al reconciliar eventos y alineaciones
+CAMPOS_EVENTO = ['jugador', 'jugador_relacionado', 'minuto', 'minuto_adicional', 'segundo', 'tipo',
+                 'texto_incidente', 'es_local', 'datos_adicionales']
+CAMPOS_ALINEACION = ['es_local', 'es_titular', 'posicion', 'numero_camiseta', 'rating', 'minutos_jugados',
+                     'goles', 'asistencias', 'tarjetas_amarillas', 'tarjetas_rojas', 'estadisticas_detalladas']
+
+
+def clave_evento(evento):
+    """Clave estable de un EventoPartido: su id de Sofascore o, si no trae (cambios de período), su contenido"""
+    if evento.sofascore_id is not None:
+        return evento.sofascore_id
+    return (evento.tipo, evento.minuto, evento.minuto_adicional, evento.es_local, evento.texto_incidente)
+
+
+def clave_alineacion(alineacion):
+    return alineacion.jugador_id
+
+
+def reconciliar(modelo, existentes: Iterable, nuevos: List, clave: Callable, campos: List[str]) -> Tuple[int, int, int]:
+    """
+    Dejar en la BD las filas `nuevos` (instancias sin guardar) tocando lo
+    mínimo: se insertan las claves nuevas, se actualizan solo las filas con
+    algún campo distinto y se borran las que ya no vienen en el payload. Las
+    filas que no cambian conservan su id y no se escriben.
+    Devuelve (creadas, actualizadas, borradas).
+    """
+    nuevos = {clave(fila): fila for fila in nuevos}  # si el payload repite una clave, gana la última
+    actuales = {}
+    sobrantes = []
+    for fila in existentes:
+        k = clave(fila)
+        if k in actuales:
+            # Duplicado guardado antes de que hubiera restricción única: se queda uno
+            sobrantes.append(fila.pk)
+        else:
+            actuales[k] = fila
+
+    atributos = [modelo._meta.get_field(campo).attname for campo in campos]
+    crear, actualizar = [], []
+    for k, fila in nuevos.items():
+        actual = actuales.pop(k, None)
+        if actual is None:
+            crear.append(fila)
+            continue
+        cambios = [a for a in atributos if getattr(actual, a) != getattr(fila, a)]
+        for atributo in cambios:
+            setattr(actual, atributo, getattr(fila, atributo))
+        if cambios:
+            actualizar.append(actual)
+
+    sobrantes += [fila.pk for fila in actuales.values()]
+    if sobrantes:
+        modelo.objects.filter(pk__in=sobrantes).delete()
+    if crear:
+        # ignore_conflicts por si otra tarea guarda el mismo partido a la vez
+        modelo.objects.bulk_create(crear, ignore_conflicts=True)
+    if actualizar:
+        modelo.objects.bulk_update(actualizar, campos)
+    return len(crear), len(actualizar), len(sobrantes)
+
+
+def filas_eventos(partido, incidents: List[Dict]) -> Tuple[List[EventoPartido], int]:
+    """Filas (sin guardar) de los incidentes de un partido y número de jugadores creados"""
+    # Todos los jugadores de los incidentes en una sola consulta
+    jugadores, creados = resolver_jugadores(jugadores_de_incidentes(incidents, partido))
+
+    eventos = []
+    for incidente in incidents:
+        eventos.append(EventoPartido(
+            sofascore_id=incidente.get('id'),
+            partido=partido,
+            jugador=jugadores.get(incidente.get('player', {}).get('id')),
+            jugador_relacionado=jugadores.get(incidente.get('assist1', {}).get('id')),
+            minuto=incidente.get('time', 0),
+            minuto_adicional=incidente.get('addedTime'),
+            segundo=incidente.get('second'),
+            tipo=TIPOS_INCIDENTE.get(incidente.get('incidentType', ''), 'goal'),
+            texto_incidente=incidente.get('text', ''),
+            es_local=incidente.get('isHome', True),
+            datos_adicionales=incidente
+        ))
+    return eventos, creados
+
+
+def filas_alineacion(data: Dict, partido, equipo, es_local: bool) -> Tuple[List[Alineacion], int]:
+    """Filas (sin guardar) de la alineación de un equipo y número de jugadores creados"""
+    # Los jugadores que aún no estén en BD se crean con una ficha mínima
+    jugadores, creados = resolver_jugadores(jugadores_de_alineacion(data, equipo.id if equipo else None))
+
+    alineaciones = []
+    for player_data in data.get('players', []):
+        player_info = player_data.get('player', {})
+        jugador = jugadores.get(player_info.get('id'))
+        if jugador is None:
+            continue
+
+        stats = player_data.get('statistics', {})
+        alineaciones.append(Alineacion(
+            partido=partido,
+            jugador=jugador,
+            es_local=es_local,
+            es_titular=player_data.get('substitute', False) == False,
+            posicion=player_info.get('position', ''),
+            numero_camiseta=player_info.get('shirtNumber'),
+            rating=stats.get('rating'),
+            minutos_jugados=stats.get('minutesPlayed', 0),
+            goles=stats.get('goals', 0),
+            asistencias=stats.get('assists', 0),
+            tarjetas_amarillas=stats.get('yellowCards', 0),
+            tarjetas_rojas=stats.get('redCards', 0),
+            estadisticas_detalladas=stats
+        ))
+    return alineaciones, creados
+
+
+def guardar_eventos(partido, data: Dict) -> Tuple[int, int]:
+    """Reconciliar los eventos del partido con un payload de incidentes. Devuelve (eventos, jugadores creados)"""
+    eventos, creados = filas_eventos(partido, (data or {}).get('incidents', []))
+    reconciliar(EventoPartido, EventoPartido.objects.filter(partido=partido), eventos, clave_evento, CAMPOS_EVENTO)
+    return len(eventos), creados
+
+
+def guardar_alineaciones(partido, data: Dict) -> Tuple[int, int]:
+    """Reconciliar las alineaciones de los dos equipos con el payload. Devuelve (filas, jugadores creados)"""
+    data = data or {}
+    alineaciones, creados = [], 0
+    for lado, equipo, es_local in (('home', partido.equipo_local, True), ('away', partido.equipo_visitante, False)):
+        if data.get(lado):
+            filas, nuevos = filas_alineacion(data[lado], partido, equipo, es_local)
+            alineaciones += filas
+            creados += nuevos
+
+    reconciliar(Alineacion, Alineacion.objects.filter(partido=partido), alineaciones,
+                clave_alineacion, CAMPOS_ALINEACION)
+    return len(alineaciones), creados
+
+
+# Campos de Partido que toca guardar_detalles (se restauran en memoria si la escritura falla
+# o si se pierde el lote del escritor en el que iba)
+CAMPOS_DETALLES = ('tiene_estadisticas', 'tiene_incidentes', 'tiene_lineups', 'detalles_finales',
+                   'huella_estadisticas', 'huella_incidentes', 'huella_alineaciones')
+
+
+def _restaurar(partido, valores: Dict):
+    for campo, valor in valores.items():
+        setattr(partido, campo, valor)
+
+
+class DetallesGuardados(NamedTuple):
+    tiene_estadisticas: bool
+    tiene_incidentes: bool
+    tiene_lineups: bool
+    escritos: FrozenSet[str]  # detalles reescritos (los demás no llegaron o no cambiaron)
+    sin_cambios: int          # detalles recibidos idénticos a la última escritura
+    eventos: int
+    alineaciones: int
+    jugadores: int            # jugadores creados con ficha mínima
+
+
+def guardar_detalles(partido, escribir_estadisticas: Callable, estadisticas: Dict = None, incidentes: Dict = None,
+                     alineaciones: Dict = None, marcar_finales: bool = False,
+                     forzar: bool = False) -> DetallesGuardados:
+    """
+    Escribir los detalles de un partido como una unidad: un partido a medio
+    escribir nunca es visible. Los detalles a None no se tocan, y los que
+    llegan idénticos a la última escritura (misma huella) tampoco, salvo con
+    forzar (p. ej. al volver a parsear un archivo con código nuevo). Los
+    flags tiene_* de lo escrito siguen al payload, también a False (un gol
+    anulado por el VAR). `escribir_estadisticas(partido, data) -> bool` es el de cada
+    syncer. Si algo falla se lanza el error con el partido en memoria como estaba.
+    Hay que llamarla desde el hilo del escritor.
+    """
+    cambiados, huellas = detalles_cambiados(partido, forzar, estadisticas=estadisticas, incidentes=incidentes,
+                                            alineaciones=alineaciones)
+    recibidos = sum(data is not None for data in (estadisticas, incidentes, alineaciones))
+
+    # Lo que no cambió sigue como estaba en la BD
+    tiene_stats = estadisticas is not None and partido.tiene_estadisticas
+    tiene_eventos = incidentes is not None and partido.tiene_incidentes
+    tiene_lineups = alineaciones is not None and partido.tiene_lineups
+    eventos = filas = jugadores = 0
+
+    previas = {campo: getattr(partido, campo) for campo in CAMPOS_DETALLES}
+    try:
+        with transaction.atomic():
+            flags = {}
+            if 'estadisticas' in cambiados:
+                tiene_stats = flags['tiene_estadisticas'] = bool(escribir_estadisticas(partido, estadisticas))
+            if 'incidentes' in cambiados:
+                eventos, creados = guardar_eventos(partido, incidentes)
+                tiene_eventos = flags['tiene_incidentes'] = eventos > 0
+                jugadores += creados
+            if 'alineaciones' in cambiados:
+                filas, creados = guardar_alineaciones(partido, alineaciones)
+                tiene_lineups = flags['tiene_lineups'] = filas > 0
+                jugadores += creados
+
+            campos = [campo for campo, tiene in flags.items() if tiene != getattr(partido, campo)]
+            for campo in campos:
+                setattr(partido, campo, flags[campo])
+            for campo, huella in huellas.items():
+                setattr(partido, campo, huella)
+            campos += list(huellas)
+            if marcar_finales:
+                # Tras pedir los tres detalles: si ya no van a cambiar no se vuelven a pedir
+                finales = detalles_finales(partido)
+                if finales != partido.detalles_finales:
+                    partido.detalles_finales = finales
+                    campos.append('detalles_finales')
+            if campos:
+                partido.save(update_fields=campos)
+    except Exception:
+        # Sin escribir, el partido en memoria no puede quedar como si se hubiera escrito
+        _restaurar(partido, previas)
+        raise
+    si_se_pierde(functools.partial(_restaurar, partido, previas))
+
+    return DetallesGuardados(tiene_stats, tiene_eventos, tiene_lineups, frozenset(cambiados),
+                             recibidos - len(cambiados), eventos, filas, jugadores)
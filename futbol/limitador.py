@@ -0,0 +1,151 @@
+"""
+Limitador de peticiones por token bucket compartido entre corrutinas, y
+presupuesto de peticiones/s compartido entre procesos
+"""
+
+import asyncio
+import multiprocessing
+import time
+
+
+class LimitadorTokens:
+    """
+    Token bucket: se rellenan `tasa` tokens por segundo hasta `capacidad`.
+    Cada operación pide tantos tokens como peticiones va a hacer y espera
+    solo lo necesario para no superar el presupuesto.
+    """
+
+    def __init__(self, tasa: float, capacidad: float = None):
+        self.tasa = tasa
+        self.capacidad = capacidad or max(1.0, tasa)
+        self.tokens = self.capacidad
+        self._ultimo = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _rellenar(self):
+        ahora = time.monotonic()
+        self.tokens = min(self.capacidad, self.tokens + (ahora - self._ultimo) * self.tasa)
+        self._ultimo = ahora
+
+    async def adquirir(self, tokens: float = 1):
+        """Esperar hasta que haya `tokens` disponibles y consumirlos"""
+        if tokens <= 0:
+            return
+        tokens = min(tokens, self.capacidad)
+
+        # El lock mantiene el orden de llegada: nadie se cuela mientras otro espera
+        async with self._lock:
+            self._rellenar()
+            while self.tokens < tokens:
+                await asyncio.sleep((tokens - self.tokens) / self.tasa)
+                self._rellenar()
+            self.tokens -= tokens
+
+
+class LimitadorAdaptativo(LimitadorTokens):
+    """
+    Token bucket que ajusta su tasa según las respuestas (AIMD): cada 429/5xx
+    la reduce a la mitad (como mucho una vez por ventana, para que una ráfaga
+    de errores simultáneos no la hunda) y cada respuesta correcta la sube un
+    poco, sin pasar de la tasa configurada.
+    """
+
+    def __init__(self, tasa: float, tasa_minima: float = 0.5, incremento: float = 0.05,
+                 ventana: float = 2.0):
+        super().__init__(tasa)
+        self.tasa_maxima = tasa
+        self.tasa_minima = min(tasa_minima, tasa)
+        self.incremento = incremento
+        self.ventana = ventana
+        self.exitos = 0
+        self.errores = 0
+        self._ultima_reduccion = float('-inf')
+
+    @property
+    def tasa_error(self) -> float:
+        total = self.exitos + self.errores
+        return self.errores / total if total else 0.0
+
+    def registrar_exito(self):
+        self.exitos += 1
+        self.tasa = min(self.tasa_maxima, self.tasa + self.incremento)
+
+    def registrar_error(self):
+        self.errores += 1
+        ahora = time.monotonic()
+        if ahora - self._ultima_reduccion < self.ventana:
+            return
+
+        self._ultima_reduccion = ahora
+        self._rellenar()
+        self.tasa = max(self.tasa_minima, self.tasa / 2)
+        # Vaciar el cubo: tras un 429 no queremos soltar una ráfaga
+        self.tokens = 0.0
+
+
+class LimitadorCompartido:
+    """
+    Presupuesto de peticiones/s común a varios procesos (p. ej. los workers
+    de backfill_paralelo.py). En vez de un cubo por proceso guarda en memoria
+    compartida el siguiente turno libre y la tasa actual: cada petición
+    reserva su turno bajo el lock y espera fuera de él, así que la suma de
+    todos los procesos nunca pasa de `tasa`. La tasa se adapta igual que en
+    LimitadorAdaptativo (mitad tras un 429/5xx, +`incremento` por éxito) y
+    el frenazo lo notan todos los procesos a la vez.
+
+    Se crea en el proceso padre y se pasa a los hijos al crearlos (initargs
+    del pool), no por una cola: los Value/Array solo se heredan.
+    """
+
+    # Posiciones en el array compartido
+    _SIGUIENTE, _TASA, _ULTIMA_REDUCCION, _PETICIONES, _ERRORES = range(5)
+
+    def __init__(self, tasa: float, tasa_minima: float = 0.5, incremento: float = 0.05,
+                 ventana: float = 2.0, contexto=None):
+        contexto = contexto or multiprocessing.get_context()
+        self.tasa_maxima = tasa
+        self.tasa_minima = min(tasa_minima, tasa)
+        self.incremento = incremento
+        self.ventana = ventana
+        self._valores = contexto.Array('d', [0.0, tasa, float('-inf'), 0.0, 0.0])
+
+    @property
+    def tasa(self) -> float:
+        return self._valores[self._TASA]
+
+    @property
+    def peticiones(self) -> int:
+        return int(self._valores[self._PETICIONES])
+
+    @property
+    def errores(self) -> int:
+        return int(self._valores[self._ERRORES])
+
+    async def adquirir(self, tokens: float = 1):
+        if tokens <= 0:
+            return
+        valores = self._valores
+        with valores.get_lock():
+            ahora = time.monotonic()
+            turno = max(ahora, valores[self._SIGUIENTE])
+            valores[self._SIGUIENTE] = turno + tokens / valores[self._TASA]
+            valores[self._PETICIONES] += tokens
+        if turno > ahora:
+            await asyncio.sleep(turno - ahora)
+
+    def registrar_exito(self):
+        valores = self._valores
+        with valores.get_lock():
+            valores[self._TASA] = min(self.tasa_maxima, valores[self._TASA] + self.incremento)
+
+    def registrar_error(self):
+        valores = self._valores
+        with valores.get_lock():
+            valores[self._ERRORES] += 1
+            ahora = time.monotonic()
+            if ahora - valores[self._ULTIMA_REDUCCION] < self.ventana:
+                return
+            valores[self._ULTIMA_REDUCCION] = ahora
+            valores[self._TASA] = max(self.tasa_minima, valores[self._TASA] / 2)
+            # Como vaciar el cubo: el siguiente turno libre no llega antes de un intervalo nuevo
+            valores[self._SIGUIENTE] = max(valores[self._SIGUIENTE], ahora + 1 / valores[self._TASA])
@@ -276,6 +276,12 @@ class Partido(models.Model):
     tiene_lineups = models.BooleanField(default=False)
     tiene_estadisticas = models.BooleanField(default=False)
     tiene_incidentes = models.BooleanField(default=False)
+    detalles_finales = models.BooleanField(default=False,
+                                           help_text="Detalles completos y definitivos: no se vuelven a pedir")
+    # md5 del último payload escrito de cada detalle: si no cambia, no se reescribe
+    huella_estadisticas = models.CharField(max_length=32, blank=True)
+    huella_incidentes = models.CharField(max_length=32, blank=True)
+    huella_alineaciones = models.CharField(max_length=32, blank=True)
 
     # Ganador (útil para copas)
     ganador = models.ForeignKey(Equipo, on_delete=models.SET_NULL, null=True, blank=True,
@@ -408,6 +414,10 @@ class EventoPartido(models.Model):
             models.Index(fields=['partido', 'minuto']),
             models.Index(fields=['jugador', 'tipo']),
         ]
+        constraints = [
+            # Los incidentes sin id (cambios de período) quedan fuera: en SQL NULL no choca con NULL
+            models.UniqueConstraint(fields=['partido', 'sofascore_id'], name='evento_unico_por_partido'),
+        ]
 
     def __str__(self):
         tiempo = f"{self.minuto}'" if not self.minuto_adicional else f"{self.minuto}+{self.minuto_adicional}'"
@@ -530,4 +540,83 @@ class EstadisticaJugador(models.Model):
     def precision_pases_porcentaje(self):
         if self.pases_intentados > 0:
             return round((self.pases_completados / self.pases_intentados) * 100, 1)
-        return 0
\ No newline at end of file
+        return 0
+
+
+class EstadoSincronizacion(models.Model):
+    """
+    Marca de agua de la sincronización incremental de una temporada: hasta
+    qué partido finalizado está todo sincronizado y qué partidos todavía
+    pueden cambiar (por jugar, en juego, aplazados o que fallaron).
+    """
+    ESTADOS_FINALES = ('finished', 'cancelled', 'abandoned')
+
+    temporada = models.OneToOneField(Temporada, on_delete=models.CASCADE, related_name='estado_sincronizacion')
+    ultima_jornada = models.IntegerField(null=True, blank=True)
+    ultimo_timestamp = models.BigIntegerField(null=True, blank=True,
+                                              help_text="Inicio del último partido finalizado sincronizado")
+
+    # {sofascore_id: [estado, startTimestamp]} de los partidos que aún pueden cambiar
+    pendientes = models.JSONField(default=dict, blank=True)
+
+    ultima_sincronizacion = models.DateTimeField(null=True, blank=True)
+    plantillas_sincronizadas = models.DateTimeField(null=True, blank=True)
+
+    # Timestamps
+    fecha_creacion = models.DateTimeField(default=timezone.now, blank=True)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Estados de sincronización"
+
+    def __str__(self):
+        return f"{self.temporada} - jornada {self.ultima_jornada} ({len(self.pendientes)} pendientes)"
+
+    def a_sincronizar(self, eventos):
+        """
+        Eventos de una lista de Sofascore que hay que sincronizar: en juego,
+        nuevos, recién finalizados o que cambiaron de estado u horario
+        """
+        seleccion = []
+        for evento in eventos:
+            estado = evento.get('status', {}).get('type')
+            timestamp = evento.get('startTimestamp') or 0
+            anterior = self.pendientes.get(str(evento.get('id')))
+
+            if estado == 'inprogress':
+                seleccion.append(evento)
+            elif estado in self.ESTADOS_FINALES:
+                if anterior is not None or self.ultimo_timestamp is None or timestamp > self.ultimo_timestamp:
+                    seleccion.append(evento)
+            elif anterior != [estado, timestamp]:
+                seleccion.append(evento)
+        return seleccion
+
+    def pendientes_sin_noticias(self, vistos, ahora: int):
+        """Pendientes que ya deberían haber empezado y no salen en las listas"""
+        return [
+            int(sofascore_id) for sofascore_id, (estado, timestamp) in self.pendientes.items()
+            if int(sofascore_id) not in vistos and (estado is None or (timestamp or 0) <= ahora)
+        ]
+
+    def registrar(self, eventos, sincronizados):
+        """
+        Avanzar la marca de agua con los eventos procesados. Los que fallaron
+        (no están en `sincronizados`) quedan pendientes para la próxima vez.
+        """
+        for evento in eventos:
+            clave = str(evento['id'])
+            estado = evento.get('status', {}).get('type')
+            timestamp = evento.get('startTimestamp') or 0
+
+            if evento['id'] not in sincronizados:
+                self.pendientes[clave] = [None, timestamp]
+            elif estado in self.ESTADOS_FINALES:
+                self.pendientes.pop(clave, None)
+                self.ultimo_timestamp = max(self.ultimo_timestamp or 0, timestamp)
+                jornada = evento.get('roundInfo', {}).get('round')
+                if jornada:
+                    self.ultima_jornada = max(self.ultima_jornada or 0, jornada)
+            else:
+                self.pendientes[clave] = [estado, timestamp]
+        self.ultima_sincronizacion = timezone.now()
@@ -0,0 +1,211 @@
+"""
+Pool de Chromium compartido por todo el proceso
+
+Todas las SofascoreAPI con TransporteNavegador piden contextos a este pool,
+así que el arranque del navegador se paga una vez por proceso y no una vez
+por SofascoreSyncManager / EstadisticasSyncer / liga. El pool:
+
+- limita los contextos abiertos (y con ello la RAM) a `contextos`
+- recicla cada contexto tras `reciclar_cada` peticiones o tras un error
+- comprueba que el navegador sigue vivo antes de prestar y lo relanza si cayó
+
+Con SOFASCORE_CDP_URL (p. ej. http://127.0.0.1:9222) el pool se conecta por
+CDP a un navegador que ya está corriendo (ver servidor_navegador.py) en vez
+de arrancar uno propio, y si no responde lo arranca en local como siempre.
+
+El navegador se cierra con `await cerrar_pool()` al terminar el programa, o
+lanzando el programa con `asyncio.run(ejecutar_con_pool(main()))`.
+"""
+
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import List, Optional
+
+from playwright.async_api import async_playwright, Error as PlaywrightError
+
+CONTEXTOS = int(os.environ.get('SOFASCORE_CONTEXTOS', 2))
+RECICLAR_CADA = int(os.environ.get('SOFASCORE_RECICLAR_CADA', 500))
+CDP_URL = os.environ.get('SOFASCORE_CDP_URL')
+CDP_TIMEOUT = 5  # segundos para conectar al navegador remoto
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/124.0 Safari/537.36"
+)
+
+
+class _Contexto:
+    """Contexto de Chromium con sus contadores de uso"""
+
+    def __init__(self, contexto):
+        self.contexto = contexto
+        self.peticiones = 0
+        self.en_uso = 0
+        self.retirado = False
+
+
+class PoolNavegador:
+    """Un Chromium por proceso que presta contextos a quien los pida"""
+
+    def __init__(self, contextos: int = CONTEXTOS, reciclar_cada: int = RECICLAR_CADA,
+                 user_agent: str = USER_AGENT, cdp_url: Optional[str] = CDP_URL):
+        self.max_contextos = max(1, contextos)
+        self.reciclar_cada = reciclar_cada
+        self.user_agent = user_agent
+        self.cdp_url = cdp_url
+        self.arranques = 0
+        self.reciclados = 0
+        self.peticiones = 0
+        self._reiniciar_estado()
+
+    def _reiniciar_estado(self):
+        self.playwright = None
+        self.browser = None
+        self.remoto = False
+        self._contextos: List[_Contexto] = []
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+
+    # ============================================
+    # NAVEGADOR
+    # ============================================
+
+    async def _lanzar_navegador(self):
+        """Conectarse al navegador remoto si hay uno configurado; si no, arrancar Chromium"""
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+
+        if self.cdp_url:
+            try:
+                browser = await self.playwright.chromium.connect_over_cdp(
+                    self.cdp_url, timeout=CDP_TIMEOUT * 1000
+                )
+                self.remoto = True
+                return browser
+            except PlaywrightError as e:
+                logger.warning(f"⚠ No se pudo conectar a {self.cdp_url}, arrancando Chromium local: "
+                               f"{str(e).splitlines()[0]}")
+
+        self.remoto = False
+        return await self.playwright.chromium.launch(headless=True)
+
+    async def _asegurar_navegador(self):
+        """Arrancar el navegador la primera vez o relanzarlo si se cayó"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Los objetos de Playwright van atados a su event loop: con otro
+            # asyncio.run() se empieza de cero
+            self._reiniciar_estado()
+            self._loop = loop
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            if self.browser is not None and self.browser.is_connected():
+                return
+            # Navegador caído: sus contextos ya no sirven
+            self._contextos = []
+            self.browser = await self._lanzar_navegador()
+            self.arranques += 1
+
+    # ============================================
+    # CONTEXTOS
+    # ============================================
+
+    async def _elegir_contexto(self) -> _Contexto:
+        """Abrir un contexto si queda hueco o reutilizar el menos ocupado"""
+        vivos = [c for c in self._contextos if not c.retirado]
+        if len(vivos) < self.max_contextos:
+            nuevo = _Contexto(await self.browser.new_context(user_agent=self.user_agent))
+            self._contextos.append(nuevo)
+            return nuevo
+        return min(vivos, key=lambda c: c.en_uso)
+
+    @asynccontextmanager
+    async def contexto(self):
+        """Prestar un contexto para una petición"""
+        await self._asegurar_navegador()
+        async with self._lock:
+            prestado = await self._elegir_contexto()
+            prestado.en_uso += 1
+            prestado.peticiones += 1
+            self.peticiones += 1
+            if self.reciclar_cada and prestado.peticiones >= self.reciclar_cada:
+                prestado.retirado = True
+
+        try:
+            yield prestado.contexto
+        except PlaywrightError:
+            # Contexto sospechoso (cerrado, navegador caído...): no se vuelve a prestar
+            prestado.retirado = True
+            raise
+        finally:
+            prestado.en_uso -= 1
+            if prestado.retirado and prestado.en_uso == 0:
+                await self._retirar(prestado)
+
+    async def _retirar(self, contexto: _Contexto):
+        if contexto in self._contextos:
+            self._contextos.remove(contexto)
+            self.reciclados += 1
+        try:
+            await contexto.contexto.close()
+        except PlaywrightError:
+            pass
+
+    def estadisticas(self) -> dict:
+        return {
+            'arranques': self.arranques,
+            'remoto': self.remoto,
+            'contextos': len(self._contextos),
+            'reciclados': self.reciclados,
+            'peticiones': self.peticiones,
+        }
+
+    async def cerrar(self):
+        if self._loop is not None and self._loop is not asyncio.get_running_loop():
+            self._reiniciar_estado()
+            return
+
+        for contexto in self._contextos:
+            try:
+                await contexto.contexto.close()
+            except PlaywrightError:
+                pass
+        if self.browser:
+            # Con CDP close() solo desconecta: el navegador remoto sigue vivo
+            try:
+                await self.browser.close()
+            except PlaywrightError:
+                pass
+        if self.playwright:
+            await self.playwright.stop()
+        self._reiniciar_estado()
+
+
+_pool: Optional[PoolNavegador] = None
+
+
+def obtener_pool() -> PoolNavegador:
+    """Pool del proceso (se crea la primera vez que se pide)"""
+    global _pool
+    if _pool is None:
+        _pool = PoolNavegador()
+    return _pool
+
+
+async def cerrar_pool():
+    """Cerrar el navegador compartido; llamar una vez al terminar el programa"""
+    if _pool is not None:
+        await _pool.cerrar()
+
+
+async def ejecutar_con_pool(corrutina):
+    """Ejecutar la corrutina principal y cerrar el navegador compartido al final"""
+    try:
+        return await corrutina
+    finally:
+        await cerrar_pool()
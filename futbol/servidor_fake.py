@@ -0,0 +1,105 @@
+"""
+Servidor local que imita la API de Sofascore para benchmarks y pruebas.
+Corre en un hilo aparte con http.server, así no necesita dependencias extra.
+
+Uso:
+    with ServidorFake(latencia=0.02) as servidor:
+        api = SofascoreAPI(base_url=servidor.base_url)
+
+Con `api=ApiSintetica()` contesta todos los endpoints de SofascoreAPI con
+datos sintéticos coherentes; `tasa_error` y `tasa_429` meten respuestas 500
+y 429 al azar para probar reintentos y backoff.
+"""
+
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIJO_API = '/api/v1'
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        servidor = self.server.fake
+        servidor._contar(self.path)
+
+        if servidor.latencia:
+            time.sleep(servidor.latencia)
+
+        status, datos = servidor.responder(self.path)
+        cuerpo = json.dumps(datos).encode('utf-8')
+
+        self.send_response(status)
+        if status == 429:
+            self.send_header('Retry-After', '1')
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(cuerpo)))
+        self.end_headers()
+        self.wfile.write(cuerpo)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ServidorFake:
+    """Servidor HTTP en 127.0.0.1 que devuelve JSON para cualquier ruta"""
+
+    def __init__(self, latencia: float = 0.0, puerto: int = 0, api=None, tasa_error: float = 0.0,
+                 tasa_429: float = 0.0, semilla: int = None):
+        self.latencia = latencia
+        self.api = api
+        self.tasa_error = tasa_error
+        self.tasa_429 = tasa_429
+        self.peticiones = 0
+        self.peticiones_por_ruta = {}
+        self.respuestas_por_status = {}
+        self._azar = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', puerto), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.fake = self
+        self._hilo = None
+
+    @property
+    def base_url(self) -> str:
+        host, puerto = self._httpd.server_address
+        return f"http://{host}:{puerto}{PREFIJO_API}"
+
+    def _contar(self, ruta: str):
+        with self._lock:
+            self.peticiones += 1
+            self.peticiones_por_ruta[ruta] = self.peticiones_por_ruta.get(ruta, 0) + 1
+
+    def responder(self, ruta: str):
+        """Devolver (status, datos) para una ruta"""
+        with self._lock:
+            tirada = self._azar.random()
+        if tirada < self.tasa_429:
+            status, datos = 429, {'error': {'code': 429, 'message': 'Too Many Requests'}}
+        elif tirada < self.tasa_429 + self.tasa_error:
+            status, datos = 500, {'error': {'code': 500, 'message': 'Internal Server Error'}}
+        elif self.api is not None:
+            status, datos = self.api.responder(ruta[len(PREFIJO_API):] if ruta.startswith(PREFIJO_API) else ruta)
+        else:
+            status, datos = 200, {'events': [], 'ruta': ruta}
+
+        with self._lock:
+            self.respuestas_por_status[status] = self.respuestas_por_status.get(status, 0) + 1
+        return status, datos
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *exc):
+        self.detener()
@@ -1,45 +1,164 @@
-from playwright.async_api import async_playwright
 import asyncio
+import os
+import random
 from datetime import datetime, timedelta
+from typing import Dict
 import pandas as pd
 
-BASE_URL = "https://www.sofascore.com/api/v1"
+from futbol.archivo_respuestas import ArchivoRespuestas
+from futbol.cache_respuestas import CacheRespuestas
+from futbol.limitador import LimitadorAdaptativo
+from futbol.transportes import Transporte, crear_transporte
 
+BASE_URL = os.environ.get('SOFASCORE_BASE_URL', "https://www.sofascore.com/api/v1")
+
+# Transporte y peticiones simultáneas por defecto (ver futbol/transportes.py). Por
+# defecto se navega con page.goto, que es lo que acepta la protección anti-bot;
+# 'navegador' y 'http' son más rápidos pero hay que elegirlos con SOFASCORE_TRANSPORTE
+TRANSPORTE = os.environ.get('SOFASCORE_TRANSPORTE', 'goto')
+CONCURRENCIA = int(os.environ.get('SOFASCORE_CONCURRENCIA', 8))
+
+# Presupuesto de peticiones por segundo (0 = sin límite) y reintentos
+PETICIONES_POR_SEGUNDO = float(os.environ.get('SOFASCORE_RPS', 8))
+REINTENTOS = int(os.environ.get('SOFASCORE_REINTENTOS', 4))
+ESPERA_BASE = 0.5
+ESPERA_MAXIMA = 30.0
+# Tope para un Retry-After desproporcionado (p. ej. horas): mejor fallar y reintentar otro día
+ESPERA_RETRY_AFTER_MAXIMA = float(os.environ.get('SOFASCORE_RETRY_AFTER_MAXIMO', 300))
+
+# Status que merece la pena reintentar: rate limit y errores del servidor
+STATUS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+# Caché en disco de respuestas (SOFASCORE_CACHE=0 para desactivarla)
+USAR_CACHE = os.environ.get('SOFASCORE_CACHE', '1') != '0'
+
+# Archivo de respuestas crudas (SOFASCORE_ARCHIVO=1 para activarlo)
+USAR_ARCHIVO = os.environ.get('SOFASCORE_ARCHIVO', '0') == '1'
+
+
+class SofascoreAPIError(Exception):
+    """Respuesta no válida de Sofascore (status None = error de red)"""
+
+    def __init__(self, endpoint, status):
+        self.endpoint = endpoint
+        self.status = status
+        super().__init__(f"Failed to fetch {endpoint}: {status}")
 
-class SofascoreAPI:
-    def __init__(self):
-        self.browser = None
-        self.page = None
-        self.playwright = None
 
-    async def _init_browser(self):
-        if self.playwright is None:
-            self.playwright = await async_playwright().start()
-            self.browser = await self.playwright.chromium.launch(headless=True)
-            self.page = await self.browser.new_page()
+class SofascoreAPI:
+    def __init__(self, transporte: Transporte = None, base_url: str = BASE_URL,
+                 concurrencia: int = CONCURRENCIA, peticiones_por_segundo: float = PETICIONES_POR_SEGUNDO,
+                 reintentos: int = REINTENTOS, cache=USAR_CACHE, archivo=USAR_ARCHIVO, limitador=None):
+        """
+        cache: True para la caché en disco por defecto, False/None para no
+        usar caché, o una instancia de CacheRespuestas
+        archivo: igual, para archivar todas las respuestas de la red en un
+        ArchivoRespuestas
+        limitador: limitador ya creado (p. ej. un LimitadorCompartido entre
+        procesos) en lugar del LimitadorAdaptativo de `peticiones_por_segundo`
+        """
+        self.base_url = base_url
+        self.transporte = transporte or crear_transporte(TRANSPORTE, concurrencia)
+        if limitador is None and peticiones_por_segundo:
+            limitador = LimitadorAdaptativo(peticiones_por_segundo)
+        self.limitador = limitador
+        self.reintentos = reintentos
+        self.cache = CacheRespuestas() if cache is True else (cache or None)
+        self.archivo = ArchivoRespuestas() if archivo is True else (archivo or None)
+
+        # Peticiones en vuelo por endpoint (single-flight) y cuántas se ahorraron
+        self._en_vuelo: Dict[str, asyncio.Task] = {}
+        self.peticiones_coalescidas = 0
 
     async def _get(self, endpoint):
-        await self._init_browser()
-        url = f"{BASE_URL}{endpoint}"
-        response = await self.page.goto(url)
-        if response.status == 200:
-            return await response.json()
+        """
+        Si ya hay una petición idéntica en vuelo, esperar su resultado en vez
+        de lanzar otra. La tarea compartida va protegida con shield para que
+        cancelar a uno de los que esperan no cancele la de los demás.
+        """
+        tarea = self._en_vuelo.get(endpoint)
+        if tarea is None:
+            tarea = asyncio.ensure_future(self._get_compartido(endpoint))
+            self._en_vuelo[endpoint] = tarea
+            tarea.add_done_callback(lambda t: self._fin_en_vuelo(endpoint, t))
         else:
-            raise Exception(f"Failed to fetch {endpoint}: {response.status}")
+            self.peticiones_coalescidas += 1
+        return await asyncio.shield(tarea)
+
+    def _fin_en_vuelo(self, endpoint, tarea):
+        self._en_vuelo.pop(endpoint, None)
+        # Marcar la excepción como leída aunque todos los que esperaban se cancelaran
+        if not tarea.cancelled():
+            tarea.exception()
+
+    async def _get_compartido(self, endpoint):
+        if self.cache:
+            datos = self.cache.obtener(endpoint)
+            if datos is not None:
+                return datos
+
+        datos = await self._pedir(f"{self.base_url}{endpoint}", endpoint)
+
+        if self.cache:
+            self.cache.guardar(endpoint, datos)
+        return datos
+
+    def marcar_finalizado(self, event_id):
+        """Indicar que un partido terminó para cachear sus detalles para siempre"""
+        if self.cache:
+            self.cache.marcar_finalizado(event_id)
 
     async def _raw_get(self, url):
-        await self._init_browser()
-        response = await self.page.goto(url)
-        if response.status == 200:
-            return await response.json()
-        else:
-            raise Exception(f"Failed to fetch {url}: {response.status}")
+        return await self._pedir(url, url)
+
+    async def _pedir(self, url, etiqueta):
+        """
+        Pedir una URL pasando por el limitador. Los 429/5xx y errores de red
+        se reintentan con backoff exponencial con jitter y frenan el limitador;
+        si la respuesta trae Retry-After se espera al menos eso. Cualquier otro
+        status (p. ej. 404 sin estadísticas) falla enseguida.
+        """
+        for intento in range(self.reintentos + 1):
+            if self.limitador:
+                await self.limitador.adquirir()
+
+            response = None
+            try:
+                response = await self.transporte.obtener(url)
+                status = response.status
+            except Exception:
+                if intento == self.reintentos:
+                    raise
+                status = None
+
+            if self.archivo and status is not None:
+                self.archivo.guardar(etiqueta, status, response.datos)
+
+            if status == 200:
+                if self.limitador:
+                    self.limitador.registrar_exito()
+                return response.datos
+
+            if (status is not None and status not in STATUS_REINTENTABLES) or intento == self.reintentos:
+                raise SofascoreAPIError(etiqueta, status)
+
+            if self.limitador:
+                self.limitador.registrar_error()
+            await asyncio.sleep(self._espera_backoff(intento, response and response.reintentar_tras))
+
+    def _espera_backoff(self, intento: int, reintentar_tras: float = None) -> float:
+        """Backoff exponencial con 'full jitter', nunca menos que el Retry-After del servidor"""
+        espera = random.uniform(0, min(ESPERA_MAXIMA, ESPERA_BASE * 2 ** intento))
+        if reintentar_tras:
+            espera = max(espera, min(reintentar_tras, ESPERA_RETRY_AFTER_MAXIMA))
+        return espera
 
     async def close(self):
-        if self.browser:
-            await self.browser.close()
-        if self.playwright:
-            await self.playwright.stop()
+        await self.transporte.cerrar()
+        if self.cache:
+            self.cache.cerrar()
+        if self.archivo:
+            self.archivo.cerrar()
 
         # ============================================
         # MÉTODOS PARA PARTIDOS
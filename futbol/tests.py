@@ -1,3 +1,1070 @@
-from django.test import TestCase
+import asyncio
+import functools
+import multiprocessing
+import os
+import random
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from playwright.async_api import Error as PlaywrightError
+
+from futbol.archivo_respuestas import ArchivoRespuestas
+from futbol.cache_respuestas import MINUTO, PARA_SIEMPRE, CacheRespuestas
+from futbol.checkpoints import Checkpoint
+from futbol import datos_sinteticos
+from futbol.datos_sinteticos import ApiSintetica
+from futbol.escritor import EscritorBD, LoteNoConfirmado
+from futbol.ingesta import (CAMPOS_EVENTO, DIAS_DETALLES_INCOMPLETOS, HORAS_DETALLES_FINALES, campos_en_vivo,
+                            clave_evento, detalles_finales, guardar_detalles, huella_payload, reconciliar)
+from futbol.limitador import LimitadorCompartido
+from futbol.models import (Equipo, EstadisticaPartido, EstadoSincronizacion, EventoPartido, Jugador, Liga, Pais,
+                           Partido, Temporada)
+from futbol.pool_navegador import PoolNavegador
+from futbol.sofascore_api import ESPERA_BASE, SofascoreAPI, SofascoreAPIError
+from futbol.utils import CalculadoraTabla, EstadisticasEquipo
+from futbol.transportes import (TRANSPORTES, Respuesta, Transporte, TransporteArchivo, TransporteHttp,
+                                crear_transporte, segundos_retry_after)
+
+
+class TransporteContador(Transporte):
+    """Transporte falso que cuenta las peticiones que llegan a la red"""
+
+    def __init__(self, status=200, latencia=0.01):
+        super().__init__(concurrencia=50)
+        self.status = status
+        self.latencia = latencia
+        self.peticiones = 0
+
+    async def _obtener(self, url):
+        self.peticiones += 1
+        await asyncio.sleep(self.latencia)
+        return Respuesta(self.status, {'url': url} if self.status == 200 else None)
+
+
+def crear_api(transporte):
+    return SofascoreAPI(transporte, base_url='http://fake', peticiones_por_segundo=0,
+                        reintentos=0, cache=False)
+
+
+class SingleFlightTests(SimpleTestCase):
+    def test_peticiones_identicas_concurrentes_comparten_una_peticion(self):
+        transporte = TransporteContador()
+        api = crear_api(transporte)
+
+        async def lanzar():
+            return await asyncio.gather(*(api.get_equipo_info(42) for _ in range(20)))
+
+        resultados = asyncio.run(lanzar())
+
+        self.assertEqual(transporte.peticiones, 1)
+        self.assertEqual(api.peticiones_coalescidas, 19)
+        self.assertTrue(all(r == {'url': 'http://fake/team/42'} for r in resultados))
+
+    def test_endpoints_distintos_no_se_coalescen(self):
+        transporte = TransporteContador()
+        api = crear_api(transporte)
+
+        async def lanzar():
+            await asyncio.gather(api.get_equipo_info(1), api.get_equipo_info(2), api.get_equipo_info(1))
+
+        asyncio.run(lanzar())
+        self.assertEqual(transporte.peticiones, 2)
+
+    def test_peticion_terminada_no_se_reutiliza(self):
+        transporte = TransporteContador()
+        api = crear_api(transporte)
+
+        async def lanzar():
+            await api.get_equipo_info(1)
+            await api.get_equipo_info(1)
+
+        asyncio.run(lanzar())
+        self.assertEqual(transporte.peticiones, 2)
+
+    def test_error_llega_a_todos_los_que_esperan(self):
+        transporte = TransporteContador(status=404)
+        api = crear_api(transporte)
+
+        async def lanzar():
+            return await asyncio.gather(*(api.get_equipo_info(7) for _ in range(5)), return_exceptions=True)
+
+        resultados = asyncio.run(lanzar())
+
+        self.assertEqual(transporte.peticiones, 1)
+        self.assertTrue(all(isinstance(r, SofascoreAPIError) for r in resultados))
+        self.assertEqual(api._en_vuelo, {})
+
+
+class TransporteGuion(Transporte):
+    """Transporte falso que contesta con una lista de respuestas (o excepciones) en orden"""
+
+    def __init__(self, *respuestas):
+        super().__init__(concurrencia=1)
+        self.respuestas = list(respuestas)
+        self.peticiones = 0
+
+    async def _obtener(self, url):
+        self.peticiones += 1
+        respuesta = self.respuestas.pop(0)
+        if isinstance(respuesta, Exception):
+            raise respuesta
+        return respuesta
+
+
+class ReintentosTests(SimpleTestCase):
+    def pedir(self, *respuestas, reintentos=3):
+        transporte = TransporteGuion(*respuestas)
+        api = SofascoreAPI(transporte, base_url='http://fake', peticiones_por_segundo=0,
+                           reintentos=reintentos, cache=False)
+        with mock.patch('futbol.sofascore_api.asyncio.sleep', new=mock.AsyncMock()) as dormir:
+            try:
+                resultado = asyncio.run(api.get_equipo_info(1))
+            except SofascoreAPIError as e:
+                resultado = e
+        return resultado, transporte.peticiones, [c.args[0] for c in dormir.await_args_list]
+
+    def test_reintenta_errores_transitorios_con_backoff(self):
+        resultado, peticiones, esperas = self.pedir(Respuesta(500, None), ConnectionError('reset'),
+                                                    Respuesta(200, {'ok': 1}))
+        self.assertEqual((resultado, peticiones), ({'ok': 1}, 3))
+        self.assertEqual(len(esperas), 2)
+        self.assertTrue(all(0 <= e <= ESPERA_BASE * 2 ** i for i, e in enumerate(esperas)))
+
+    def test_retry_after_es_la_espera_minima(self):
+        resultado, _, esperas = self.pedir(Respuesta(429, None, reintentar_tras=7), Respuesta(200, {}))
+        self.assertEqual(resultado, {})
+        self.assertGreaterEqual(esperas[0], 7)
+        self.assertEqual(segundos_retry_after({'Retry-After': '12'}), 12)
+
+    def test_agota_los_reintentos(self):
+        resultado, peticiones, esperas = self.pedir(*[Respuesta(503, None)] * 3, reintentos=2)
+        self.assertIsInstance(resultado, SofascoreAPIError)
+        self.assertEqual((resultado.status, peticiones, len(esperas)), (503, 3, 2))
+
+    def test_no_reintenta_un_404(self):
+        resultado, peticiones, esperas = self.pedir(Respuesta(404, None))
+        self.assertEqual((resultado.status, peticiones, esperas), (404, 1, []))
+
+
+class TransportesTests(SimpleTestCase):
+    def test_crear_transporte_por_nombre(self):
+        for nombre in ['goto', 'navegador', 'http']:
+            transporte = crear_transporte(nombre, concurrencia=4)
+            self.assertIsInstance(transporte, TRANSPORTES[nombre])
+            self.assertEqual(transporte.nombre, nombre)
+        self.assertEqual(crear_transporte('http', concurrencia=4).concurrencia, 4)
+        self.assertEqual(crear_transporte('goto', concurrencia=4).concurrencia, 1)  # una sola página
+        # Sin elegir nada se navega con page.goto, como siempre
+        self.assertIsInstance(crear_transporte(), TRANSPORTES['goto'])
+
+        with self.assertRaises(ValueError):
+            crear_transporte('telnet')
+
+    def test_la_api_usa_el_transporte_configurado(self):
+        with mock.patch('futbol.sofascore_api.TRANSPORTE', 'http'):
+            api = SofascoreAPI(concurrencia=3, cache=False)
+        self.assertIsInstance(api.transporte, TransporteHttp)
+        self.assertEqual(api.transporte.concurrencia, 3)
+
+
+class ArchivoRespuestasTests(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def test_escribir_indexar_y_leer(self):
+        archivo = ArchivoRespuestas(self.directorio, tamano_segmento=1)  # un segmento por registro
+        self.addCleanup(archivo.cerrar)
+        archivo.guardar('/team/1', 200, {'team': {'id': 1, 'name': 'Viejo'}})
+        archivo.guardar('/team/1', 200, {'team': {'id': 1, 'name': 'Nuevo'}})
+        archivo.guardar('/team/2', 404, None)
+
+        self.assertEqual(archivo.estadisticas()['segmentos'], 3)
+        self.assertEqual(archivo.leer('/team/1')['datos']['team']['name'], 'Nuevo')
+        self.assertIsNone(archivo.leer('/team/2'))
+        self.assertEqual(archivo.leer('/team/2', solo_ok=False)['status'], 404)
+        self.assertIsNone(archivo.leer('/team/3'))
+        self.assertEqual([r['endpoint'] for r in archivo.registros(patron=r'^/team/')], ['/team/1', '/team/1'])
+
+    def test_transporte_archivo_reproduce_sin_red(self):
+        archivo = ArchivoRespuestas(self.directorio)
+        archivo.guardar('/team/1', 200, {'team': {'id': 1, 'name': 'Nuevo'}})
+        transporte = TransporteArchivo(archivo=archivo, base_url='http://fake')
+        api = crear_api(transporte)
+
+        async def reproducir():
+            equipo = await api.get_equipo_info(1)
+            with self.assertRaises(SofascoreAPIError):
+                await api.get_equipo_info(3)
+            await api.close()
+            return equipo
+
+        self.assertEqual(asyncio.run(reproducir()), {'team': {'id': 1, 'name': 'Nuevo'}})
+        self.assertEqual((transporte.aciertos, transporte.fallos), (1, 1))
+
+    def test_la_api_archiva_lo_que_llega_de_la_red(self):
+        archivo = ArchivoRespuestas(self.directorio)
+        api = SofascoreAPI(TransporteContador(), base_url='http://fake', peticiones_por_segundo=0,
+                           reintentos=0, cache=False, archivo=archivo)
+        asyncio.run(api.get_equipo_info(5))
+        self.assertEqual(archivo.leer('/team/5')['datos'], {'url': 'http://fake/team/5'})
+        asyncio.run(api.close())
+
+
+class NavegadorFalso:
+    """Chromium falso: abre contextos con close() y se puede 'caer'"""
+
+    def __init__(self):
+        self.conectado = True
+        self.contextos = []
+
+    def is_connected(self):
+        return self.conectado
+
+    async def new_context(self, **opciones):
+        contexto = mock.Mock(close=mock.AsyncMock())
+        self.contextos.append(contexto)
+        return contexto
+
+    async def close(self):
+        self.conectado = False
+
+
+class PoolNavegadorTests(SimpleTestCase):
+    def setUp(self):
+        self.navegadores = []
+        chromium = mock.Mock(launch=mock.AsyncMock(side_effect=self.lanzar))
+        self.playwright = mock.Mock(chromium=chromium, stop=mock.AsyncMock())
+        arranque = mock.Mock(start=mock.AsyncMock(return_value=self.playwright))
+        parche = mock.patch('futbol.pool_navegador.async_playwright', return_value=arranque)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def lanzar(self, **opciones):
+        self.navegadores.append(NavegadorFalso())
+        return self.navegadores[-1]
+
+    def test_recicla_contextos_y_relanza_el_navegador_caido(self):
+        pool = PoolNavegador(contextos=1, reciclar_cada=2, cdp_url=None)
+
+        async def pedir(veces):
+            for _ in range(veces):
+                async with pool.contexto():
+                    pass
+
+        async def lanzar():
+            await pedir(3)
+            self.navegadores[0].conectado = False
+            await pedir(1)
+
+        asyncio.run(lanzar())
+        primero, segundo = self.navegadores
+        # Tras 2 peticiones el contexto se cierra y la tercera abre otro
+        self.assertEqual(len(primero.contextos), 2)
+        primero.contextos[0].close.assert_awaited_once()
+        self.assertEqual(pool.reciclados, 1)
+        # Navegador caído: se arranca otro y sus contextos se olvidan
+        self.assertEqual(pool.arranques, 2)
+        self.assertEqual(len(segundo.contextos), 1)
+        self.assertEqual(pool.peticiones, 4)
+
+    def test_cdp_conecta_al_remoto_o_arranca_en_local(self):
+        chromium = self.playwright.chromium
+        chromium.connect_over_cdp = mock.AsyncMock(return_value=NavegadorFalso())
+        pool = PoolNavegador(cdp_url='http://127.0.0.1:9222')
+        asyncio.run(pool._asegurar_navegador())
+        self.assertTrue(pool.remoto)
+        chromium.launch.assert_not_awaited()
+
+        # Remoto caído: aviso y Chromium local
+        chromium.connect_over_cdp = mock.AsyncMock(side_effect=PlaywrightError('connect ECONNREFUSED'))
+        pool = PoolNavegador(cdp_url='http://127.0.0.1:9222')
+        with self.assertLogs('futbol.pool_navegador', 'WARNING'):
+            asyncio.run(pool._asegurar_navegador())
+        self.assertFalse(pool.remoto)
+        self.assertIs(pool.browser, self.navegadores[0])
+
+
+class IdentidadesTests(SimpleTestCase):
+    """Un equipo repetido con el mismo payload no vuelve a pasar por la BD"""
+
+    def setUp(self):
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        self.manager = SofascoreSyncManager(api=crear_api(TransporteContador()))
+        self.manager._guardar_equipo = mock.AsyncMock(side_effect=lambda data: Equipo(sofascore_id=data['id']))
+
+    def sync(self, equipo_data):
+        return asyncio.run(self.manager.sync_equipo(equipo_data))
+
+    def test_reutiliza_mientras_el_payload_no_cambie(self):
+        equipo = {'id': 7, 'name': 'Equipo 7', 'shortName': 'E7', 'country': {'name': 'Spain'}}
+        primero = self.sync(equipo)
+        self.assertIs(self.sync(dict(equipo)), primero)
+        self.assertEqual(self.manager._guardar_equipo.await_count, 1)
+        self.assertEqual(self.manager.stats['identidades_reutilizadas'], 1)
+
+        cambiado = self.sync({**equipo, 'name': 'Otro nombre'})
+        self.assertIsNot(cambiado, primero)
+        self.assertEqual(self.manager._guardar_equipo.await_count, 2)
+
+    def test_un_lote_perdido_vacia_el_mapa(self):
+        equipo = {'id': 7, 'name': 'Equipo 7'}
+        self.sync(equipo)
+        with mock.patch('poblar_bd_sofascore.lotes_perdidos', return_value=1):
+            self.sync(equipo)
+        self.assertEqual(self.manager._guardar_equipo.await_count, 2)
+
+
+class CacheRespuestasTests(SimpleTestCase):
+    def setUp(self):
+        directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directorio, ignore_errors=True)
+        self.ruta = os.path.join(directorio, 'cache.sqlite3')
+        self.cache = CacheRespuestas(self.ruta)
+        self.addCleanup(self.cache.cerrar)
+        self.hace_un_mes = int(time.time()) - 30 * 86400
+
+    def eventos(self, estado):
+        return {'events': [{'id': i, 'status': {'type': estado}, 'startTimestamp': self.hace_un_mes}
+                           for i in range(3)]}
+
+    def test_temporada_actual_no_se_cachea_para_siempre(self):
+        pagina = '/unique-tournament/8/season/61643/events/last/0'
+        self.assertEqual(self.cache.ttl_para(pagina, self.eventos('finished')), 10 * MINUTO)
+
+        # Al ver la lista de temporadas, las que no son la primera quedan cerradas
+        self.cache.guardar('/unique-tournament/8/seasons', {'seasons': [{'id': 61643}, {'id': 51643}]})
+        self.assertEqual(self.cache.ttl_para(pagina, self.eventos('finished')), 10 * MINUTO)
+        self.assertIs(self.cache.ttl_para('/unique-tournament/8/season/51643/events/last/0',
+                                          self.eventos('finished')), PARA_SIEMPRE)
+
+    def test_aplazados_no_se_cachean_para_siempre(self):
+        self.cache.marcar_temporada_cerrada(51643)
+        self.assertEqual(self.cache.ttl_para('/unique-tournament/8/season/51643/events/last/0',
+                                             self.eventos('postponed')), 10 * MINUTO)
+        self.assertEqual(self.cache.ttl_para('/sport/football/scheduled-events/2024-01-01',
+                                             self.eventos('postponed')), 10 * MINUTO)
+        self.assertIs(self.cache.ttl_para('/sport/football/scheduled-events/2024-01-01',
+                                          self.eventos('finished')), PARA_SIEMPRE)
+
+    def test_los_aciertos_no_escriben_hasta_volcar(self):
+        self.cache.guardar('/team/1', {'team': {'id': 1}})
+        otra = sqlite3.connect(self.ruta)
+        self.addCleanup(otra.close)
+        guardado = otra.execute('SELECT ultimo_acceso FROM respuestas').fetchone()[0]
+
+        with mock.patch('futbol.cache_respuestas.time.time', return_value=guardado + 100):
+            self.assertEqual(self.cache.obtener('/team/1'), {'team': {'id': 1}})
+        self.assertEqual(otra.execute('SELECT ultimo_acceso FROM respuestas').fetchone()[0], guardado)
+
+        # Al guardar otra respuesta (o al cerrar) se escriben los accesos pendientes
+        self.cache.guardar('/team/2', {'team': {'id': 2}})
+        self.assertEqual(otra.execute("SELECT ultimo_acceso FROM respuestas WHERE endpoint = '/team/1'")
+                         .fetchone()[0], guardado + 100)
+
+
+def crear_partidos_sinteticos(equipos=6, temporadas=2, semilla=1):
+    """Ligas ida y vuelta con resultados aleatorios, marcadores incompletos y partidos sin jugar"""
+    rnd = random.Random(semilla)
+    liga = Liga.objects.create(sofascore_id=1, nombre='Liga sintética')
+    equipos = [Equipo.objects.create(sofascore_id=i, nombre=f'Equipo {i}') for i in range(1, equipos + 1)]
+    inicio = datetime(2023, 8, 1, tzinfo=dt_timezone.utc)
+
+    partidos = []
+    for t in range(temporadas):
+        temporada = Temporada.objects.create(sofascore_id=100 + t, liga=liga, nombre=f'{2023 + t}/{24 + t}',
+                                             año_inicio=2023 + t)
+        for local in equipos:
+            for visitante in equipos:
+                if local == visitante:
+                    continue
+                estado = rnd.choice(['finished'] * 8 + ['notstarted', 'postponed'])
+                goles = [rnd.randint(0, 4), rnd.randint(0, 4)] if estado == 'finished' else [None, None]
+                if estado == 'finished' and rnd.random() < 0.05:
+                    goles[rnd.randint(0, 1)] = None
+                partidos.append(Partido(
+                    sofascore_id=len(partidos) + 1, liga=liga, temporada=temporada,
+                    equipo_local=local, equipo_visitante=visitante,
+                    fecha_hora=inicio + timedelta(days=len(partidos)),
+                    estado=estado, goles_local=goles[0], goles_visitante=goles[1]
+                ))
+    Partido.objects.bulk_create(partidos)
+    return equipos, list(Temporada.objects.all())
+
+
+def _sumar_bucle(partidos, equipo, es_local_de):
+    """Implementación original en Python de EstadisticasEquipo, como referencia"""
+    victorias = empates = derrotas = goles_favor = goles_contra = 0
+    for partido in partidos:
+        es_local = es_local_de(partido)
+        favor, contra = ('L', 'V') if es_local else ('V', 'L')
+        goles_favor += (partido.goles_local if es_local else partido.goles_visitante) or 0
+        goles_contra += (partido.goles_visitante if es_local else partido.goles_local) or 0
+        if partido.resultado == favor:
+            victorias += 1
+        elif partido.resultado == 'E':
+            empates += 1
+        elif partido.resultado == contra:
+            derrotas += 1
+    return victorias, empates, derrotas, goles_favor, goles_contra
+
+
+class EstadisticasEquipoTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.equipos, cls.temporadas = crear_partidos_sinteticos()
+
+    def esperado_generales(self, stats):
+        equipo, temporada = stats.equipo, stats.temporada
+        v, e, d, gf, gc = _sumar_bucle(stats.partidos_query(), equipo,
+                                       lambda p: p.equipo_local_id == equipo.id)
+        pj = v + e + d
+        puntos = v * 3 + e
+        return {
+            'partidos_jugados': pj, 'victorias': v, 'empates': e, 'derrotas': d,
+            'goles_favor': gf, 'goles_contra': gc, 'diferencia_goles': gf - gc, 'puntos': puntos,
+            'promedio_puntos': round(puntos / pj, 2) if pj > 0 else 0,
+            'promedio_goles_favor': round(gf / pj, 2) if pj > 0 else 0,
+            'promedio_goles_contra': round(gc / pj, 2) if pj > 0 else 0,
+        }
+
+    def esperado_localidad(self, stats, es_local):
+        filtro = {'equipo_local' if es_local else 'equipo_visitante': stats.equipo, 'estado': 'finished'}
+        partidos = Partido.objects.filter(**filtro)
+        if stats.temporada:
+            partidos = partidos.filter(temporada=stats.temporada)
+        v, e, d, gf, gc = _sumar_bucle(partidos, stats.equipo, lambda p: es_local)
+        return {'partidos': v + e + d, 'victorias': v, 'empates': e, 'derrotas': d,
+                'goles_favor': gf, 'goles_contra': gc, 'puntos': v * 3 + e}
+
+    def test_coincide_con_la_implementacion_en_python(self):
+        for equipo in self.equipos:
+            for temporada in [None, *self.temporadas]:
+                stats = EstadisticasEquipo(equipo, temporada)
+                with self.subTest(equipo=equipo.id, temporada=temporada and temporada.id):
+                    self.assertEqual(stats.estadisticas_generales(), self.esperado_generales(stats))
+                    self.assertEqual(stats.estadisticas_local_visitante(), {
+                        'local': self.esperado_localidad(stats, True),
+                        'visitante': self.esperado_localidad(stats, False),
+                    })
+
+    def test_una_consulta_por_llamada(self):
+        stats = EstadisticasEquipo(self.equipos[0], self.temporadas[0])
+        with self.assertNumQueries(1):
+            stats.estadisticas_generales()
+        with self.assertNumQueries(2):
+            stats.estadisticas_local_visitante()
+
+    def test_equipo_sin_partidos(self):
+        equipo = Equipo.objects.create(sofascore_id=999, nombre='Sin partidos')
+        self.assertEqual(EstadisticasEquipo(equipo).estadisticas_generales()['goles_favor'], 0)
+        self.assertEqual(EstadisticasEquipo(equipo).estadisticas_local_visitante()['local']['partidos'], 0)
+
+
+class CalculadoraTablaTests(TestCase):
+    def crear_liga(self, resultados):
+        liga = Liga.objects.create(sofascore_id=1, nombre='Liga')
+        temporada = Temporada.objects.create(sofascore_id=1, liga=liga, nombre='24/25', año_inicio=2024)
+        equipos = {nombre: Equipo.objects.create(sofascore_id=i, nombre=nombre)
+                   for i, nombre in enumerate(sorted({e for r in resultados for e in r[:2]}))}
+        for i, (local, visitante, goles_local, goles_visitante) in enumerate(resultados):
+            Partido.objects.create(
+                sofascore_id=i, liga=liga, temporada=temporada, estado='finished',
+                equipo_local=equipos[local], equipo_visitante=equipos[visitante],
+                fecha_hora=datetime(2024, 8, 15, tzinfo=dt_timezone.utc) + timedelta(days=i),
+                goles_local=goles_local, goles_visitante=goles_visitante
+            )
+        return temporada
+
+    def test_coincide_con_estadisticas_por_equipo(self):
+        crear_partidos_sinteticos(equipos=8, temporadas=1, semilla=7)
+        temporada = Temporada.objects.get()
+
+        with self.assertNumQueries(2):
+            tabla = CalculadoraTabla(temporada).calcular_tabla()
+
+        self.assertEqual([fila['posicion'] for fila in tabla], list(range(1, 9)))
+        for fila in tabla:
+            esperado = EstadisticasEquipo(fila['equipo_obj'], temporada).estadisticas_generales()
+            self.assertEqual({k: fila[k] for k in esperado}, esperado)
+        claves = [(f['puntos'], f['diferencia_goles'], f['goles_favor']) for f in tabla]
+        self.assertEqual(claves, sorted(claves, reverse=True))
+
+    def test_desempate_por_enfrentamientos_directos(self):
+        # A y B empatan a 6 puntos: B tiene mejor diferencia, pero A ganó el directo
+        temporada = self.crear_liga([
+            ('A', 'B', 1, 0), ('A', 'C', 0, 1), ('A', 'D', 1, 0),
+            ('B', 'C', 5, 0), ('B', 'D', 1, 0), ('C', 'D', 0, 0),
+        ])
+
+        por_defecto = CalculadoraTabla(temporada).calcular_tabla()
+        directos = CalculadoraTabla(temporada, CalculadoraTabla.CRITERIOS_ENFRENTAMIENTOS).calcular_tabla()
+
+        self.assertEqual([f['equipo'] for f in por_defecto], ['B', 'A', 'C', 'D'])
+        self.assertEqual([f['equipo'] for f in directos], ['A', 'B', 'C', 'D'])
+
+
+class ApiSinteticaTests(SimpleTestCase):
+    def setUp(self):
+        self.api = ApiSintetica()
+
+    def test_temporada_a_doble_vuelta(self):
+        eventos = self.api.eventos_temporada(8, 61643)
+        cruces = {(e['homeTeam']['id'], e['awayTeam']['id']) for e in eventos}
+        self.assertEqual(len(eventos), 380)
+        self.assertEqual(len(cruces), 380)
+
+    def test_detalles_coherentes_con_el_evento(self):
+        evento = self.api.responder('/unique-tournament/8/season/61643/events/last/0')[1]['events'][0]
+        status, lineups = self.api.responder(f"/event/{evento['id']}/lineups")
+        self.assertEqual(status, 200)
+        self.assertEqual(lineups['home']['players'][0]['player']['id'] // 100, evento['homeTeam']['id'])
+
+    def test_tabla_suma_los_partidos_finalizados(self):
+        jugados = self.api.responder('/unique-tournament/8/season/61643/events/last/0')[1]['events']
+        filas = self.api.responder('/unique-tournament/8/season/61643/standings/total')[1]['standings'][0]['rows']
+        self.assertEqual(sum(f['matches'] for f in filas), 2 * len(jugados))
+
+    def test_ruta_desconocida(self):
+        self.assertEqual(self.api.responder('/no-existe')[0], 404)
+
+
+class EstadoSincronizacionTests(SimpleTestCase):
+    def evento(self, event_id, estado, timestamp, jornada=1):
+        return {'id': event_id, 'status': {'type': estado}, 'startTimestamp': timestamp,
+                'roundInfo': {'round': jornada}}
+
+    def test_primera_pasada_lo_sincroniza_todo(self):
+        estado = EstadoSincronizacion()
+        eventos = [self.evento(1, 'finished', 100), self.evento(2, 'notstarted', 200)]
+        self.assertEqual(estado.a_sincronizar(eventos), eventos)
+
+    def test_segunda_pasada_solo_cambios(self):
+        estado = EstadoSincronizacion()
+        viejo, jugado, proximo = (self.evento(1, 'finished', 100), self.evento(2, 'notstarted', 200, 2),
+                                  self.evento(3, 'notstarted', 300, 3))
+        estado.registrar([viejo, jugado, proximo], {1, 2, 3})
+        self.assertEqual((estado.ultimo_timestamp, estado.ultima_jornada), (100, 1))
+
+        jugado = self.evento(2, 'finished', 200, 2)
+        en_vivo = self.evento(4, 'inprogress', 250, 3)
+        self.assertEqual(estado.a_sincronizar([viejo, jugado, proximo, en_vivo]), [jugado, en_vivo])
+
+    def test_fallidos_quedan_pendientes(self):
+        estado = EstadoSincronizacion()
+        fallido, bueno = self.evento(1, 'finished', 100), self.evento(2, 'finished', 200)
+        estado.registrar([fallido, bueno], {2})
+        self.assertEqual(estado.a_sincronizar([fallido, bueno]), [fallido])
+        self.assertEqual(estado.pendientes_sin_noticias(set(), ahora=50), [1])
+
+
+class DetallesFinalesTests(SimpleTestCase):
+    def partido(self, horas, estado='finished', completos=True):
+        return Partido(estado=estado, fecha_hora=datetime.now(dt_timezone.utc) - timedelta(hours=horas),
+                       tiene_estadisticas=completos, tiene_incidentes=completos, tiene_lineups=completos)
+
+    def test_completos_tras_unas_horas(self):
+        self.assertFalse(detalles_finales(self.partido(horas=1)))
+        self.assertTrue(detalles_finales(self.partido(horas=HORAS_DETALLES_FINALES + 1)))
+
+    def test_incompletos_esperan_dias(self):
+        self.assertFalse(detalles_finales(self.partido(horas=HORAS_DETALLES_FINALES + 1, completos=False)))
+        self.assertTrue(detalles_finales(self.partido(horas=24 * DIAS_DETALLES_INCOMPLETOS + 1, completos=False)))
+
+    def test_solo_finalizados(self):
+        self.assertFalse(detalles_finales(self.partido(horas=1000, estado='inprogress')))
+
+
+class CamposEnVivoTests(SimpleTestCase):
+    """Lo que el poller en vivo compara entre vueltas"""
+
+    def setUp(self):
+        self.evento = datos_sinteticos.evento(1, estado='inprogress')
+        self.evento.update(status={'type': 'inprogress', 'code': 7, 'description': '2nd half'},
+                           time={'currentPeriodStartTimestamp': 1000, 'initial': 2700})
+
+    def test_minuto_desde_el_inicio_del_periodo(self):
+        self.assertEqual(campos_en_vivo(self.evento, 1000)['minuto_actual'], 46)
+        self.assertEqual(campos_en_vivo(self.evento, 1000 + 10 * 60 + 5)['minuto_actual'], 56)
+
+    def test_sin_minuto_si_no_esta_en_juego(self):
+        self.evento['status'] = {'type': 'finished', 'code': 100, 'description': 'Ended'}
+        self.assertIsNone(campos_en_vivo(self.evento, 5000)['minuto_actual'])
+
+    def test_solo_cambia_el_marcador(self):
+        antes = campos_en_vivo(self.evento, 1000)
+        self.evento['homeScore'] = dict(self.evento['homeScore'], current=self.evento['homeScore']['current'] + 1)
+        despues = campos_en_vivo(self.evento, 1000)
+        self.assertEqual({c for c in despues if despues[c] != antes[c]}, {'goles_local'})
+
+
+class PollerEnVivoTests(SimpleTestCase):
+    def setUp(self):
+        from poller_en_vivo import PollerEnVivo
+
+        self.evento = datos_sinteticos.evento(1, estado='inprogress')
+        self.en_vivo = [self.evento]
+        manager = mock.Mock(sync_partido=mock.AsyncMock(), sync_eventos_partido=mock.AsyncMock())
+        manager.api.get_partidos_en_vivo = mock.AsyncMock(side_effect=lambda deporte: {'events': self.en_vivo})
+        manager.api.get_partido_detalles = mock.AsyncMock(return_value={})
+        self.manager = manager
+
+        self.poller = PollerEnVivo(manager=manager, intervalo_minimo=5, intervalo_maximo=60)
+        self.poller._cargar_foto = mock.AsyncMock(return_value={1: campos_en_vivo(self.evento, time.time())})
+        self.poller._actualizar = mock.AsyncMock()
+        self.poller._partido = mock.AsyncMock()
+
+    def vuelta(self):
+        return asyncio.run(self.poller.vuelta())
+
+    def test_solo_escribe_y_pide_lo_que_cambia(self):
+        self.assertEqual(self.vuelta(), 0)
+        self.poller._actualizar.assert_not_awaited()
+
+        # Solo avanza el minuto: se escribe, pero no cuenta como cambio
+        self.evento['time']['initial'] += 120
+        self.assertEqual(self.vuelta(), 0)
+        self.assertEqual(list(self.poller._actualizar.await_args.args[1]), ['minuto_actual'])
+        self.assertGreater(self.poller._siguiente_intervalo(0), 5)
+        self.manager.sync_eventos_partido.assert_not_awaited()
+
+        # Gol: se escribe el marcador y se piden los incidentes
+        self.evento['homeScore']['current'] += 1
+        self.assertEqual(self.vuelta(), 1)
+        self.assertIn('goles_local', self.poller._actualizar.await_args.args[1])
+        self.manager.sync_eventos_partido.assert_awaited_once()
+        self.assertEqual(self.poller.foto[1]['estado'], 'inprogress')
+
+        # Sale de la lista: última consulta al partido
+        self.en_vivo = []
+        self.assertEqual(self.vuelta(), 1)
+        self.manager.api.get_partido_detalles.assert_awaited_once_with(1)
+        self.assertEqual(self.poller.foto, {})
+
+
+class LimitadorCompartidoTests(SimpleTestCase):
+    def test_reparte_turnos_a_la_tasa_global(self):
+        limitador = LimitadorCompartido(50)
+
+        async def pedir():
+            await asyncio.gather(*(limitador.adquirir() for _ in range(11)))
+
+        inicio = time.monotonic()
+        asyncio.run(pedir())
+        self.assertGreaterEqual(time.monotonic() - inicio, 0.19)
+        self.assertEqual(limitador.peticiones, 11)
+
+    def test_un_error_frena_una_vez_por_ventana(self):
+        limitador = LimitadorCompartido(8)
+        limitador.registrar_error()
+        limitador.registrar_error()
+        self.assertEqual(limitador.tasa, 4)
+        self.assertEqual(limitador.errores, 2)
+        limitador.registrar_exito()
+        self.assertAlmostEqual(limitador.tasa, 4.05)
+
+
+def _turnos_en_proceso(limitador, turnos, tiempos, desde):
+    """Worker de LimitadorCompartidoProcesosTests: apunta cuándo le tocó cada petición"""
+    async def pedir(i):
+        await limitador.adquirir()
+        tiempos[desde + i] = time.monotonic()
+
+    async def todas():
+        await asyncio.gather(*(pedir(i) for i in range(turnos)))
+
+    asyncio.run(todas())
+
+
+class LimitadorCompartidoProcesosTests(SimpleTestCase):
+    def setUp(self):
+        # fork: el limitador se hereda tal cual y el hijo no tiene que importar Django
+        self.contexto = multiprocessing.get_context('fork')
+
+    def test_dos_procesos_no_pasan_de_la_tasa(self):
+        tasa, turnos = 20, 8
+        limitador = LimitadorCompartido(tasa, contexto=self.contexto)
+        tiempos = self.contexto.Array('d', 2 * turnos)
+        procesos = [self.contexto.Process(target=_turnos_en_proceso, args=(limitador, turnos, tiempos, i * turnos))
+                    for i in range(2)]
+        for proceso in procesos:
+            proceso.start()
+        for proceso in procesos:
+            proceso.join(10)
+            self.assertEqual(proceso.exitcode, 0)
+
+        self.assertEqual(limitador.peticiones, 2 * turnos)
+        # 16 turnos a 20/s ocupan al menos 15 intervalos de 50 ms entre los dos procesos
+        self.assertGreaterEqual(max(tiempos) - min(tiempos), (2 * turnos - 1) / tasa * 0.95)
+
+    def test_el_frenazo_lo_ven_todos_los_procesos(self):
+        limitador = LimitadorCompartido(8, contexto=self.contexto)
+        proceso = self.contexto.Process(target=limitador.registrar_error)
+        proceso.start()
+        proceso.join(10)
+        self.assertEqual((limitador.tasa, limitador.errores), (4, 1))
+
+
+class EscritorBDTests(TransactionTestCase):
+    """El escritor corre en su propio hilo y conexión: hace falta TransactionTestCase"""
+
+    def setUp(self):
+        self.escritor = EscritorBD(lote=3, intervalo_ms=60_000)
+        self.addCleanup(self.escritor.detener)
+
+    def test_agrupa_operaciones_en_lotes(self):
+        async def escribir():
+            return [await self.escritor.ejecutar(Pais.objects.create, nombre=f"P{i}") for i in range(4)]
+
+        paises = asyncio.run(escribir())
+        self.assertEqual([p.nombre for p in paises], ['P0', 'P1', 'P2', 'P3'])
+        self.assertEqual(self.escritor.confirmaciones, 1)  # el cuarto sigue en el lote abierto
+
+        self.escritor.detener()
+        self.assertEqual(self.escritor.confirmaciones, 2)
+        self.assertEqual(Pais.objects.count(), 4)
+
+    def test_una_operacion_fallida_no_tira_el_lote(self):
+        def crear_y_fallar():
+            Pais.objects.create(nombre='Fallido')
+            raise ValueError('boom')
+
+        async def escribir():
+            await self.escritor.ejecutar(Pais.objects.create, nombre='Bueno')
+            with self.assertRaises(ValueError):
+                await self.escritor.ejecutar(crear_y_fallar)
+            await self.escritor.confirmar()
+
+        asyncio.run(escribir())
+        self.assertEqual(list(Pais.objects.values_list('nombre', flat=True)), ['Bueno'])
+
+    def test_tras_confirmar_espera_al_commit(self):
+        avisos = []
+
+        async def escribir():
+            await self.escritor.ejecutar(Pais.objects.create, nombre='P')
+            await self.escritor.tras_confirmar(lambda: avisos.append('confirmado'))
+            await asyncio.sleep(0.05)
+            self.assertEqual(avisos, [])
+            await self.escritor.confirmar()
+
+        asyncio.run(escribir())
+        self.assertEqual(avisos, ['confirmado'])
+
+    def test_un_lote_perdido_se_avisa_y_se_deshace(self):
+        crear_partidos_sinteticos(equipos=2, temporadas=1)
+        partido = Partido.objects.get(sofascore_id=1)
+        estadisticas = datos_sinteticos.estadisticas(1)
+
+        async def escribir():
+            await self.escritor.ejecutar(guardar_detalles, partido, lambda p, d: True, estadisticas)
+            self.assertEqual(partido.huella_estadisticas, huella_payload(estadisticas))
+            with mock.patch('django.db.backends.base.base.BaseDatabaseWrapper.commit',
+                            side_effect=DatabaseError('disco lleno')), self.assertLogs('futbol.escritor', 'ERROR'):
+                with self.assertRaises(LoteNoConfirmado):
+                    await self.escritor.confirmar()
+            await self.escritor.confirmar()  # ya avisado: no se repite
+
+        asyncio.run(escribir())
+        self.assertEqual((partido.huella_estadisticas, partido.tiene_estadisticas), ('', False))
+        partido.refresh_from_db()
+        self.assertEqual((partido.huella_estadisticas, partido.tiene_estadisticas), ('', False))
+
+
+class DetallesAtomicosTests(TestCase):
+    """Los detalles de un partido se escriben enteros o no se escriben"""
+
+    def setUp(self):
+        from estadisticas import EstadisticasSyncer
+
+        crear_partidos_sinteticos(equipos=2, temporadas=1)
+        self.partido = Partido.objects.select_related('equipo_local', 'equipo_visitante').get(sofascore_id=1)
+        self.syncer = EstadisticasSyncer(api=SofascoreAPI(transporte=TransporteContador(), cache=False))
+        # Sin pasar por el hilo del escritor: el test ya corre dentro de una transacción
+        self.guardar = functools.partial(type(self.syncer)._guardar_detalles.__wrapped__, self.syncer, self.partido)
+
+    def test_escribe_todo_y_los_flags(self):
+        resultado = self.guardar(datos_sinteticos.estadisticas(1), datos_sinteticos.incidentes(1),
+                                 marcar_finales=True)
+        self.assertEqual(resultado, (True, True, False))
+        self.partido.refresh_from_db()
+        self.assertTrue(self.partido.tiene_estadisticas and self.partido.tiene_incidentes)
+        self.assertTrue(EventoPartido.objects.filter(partido=self.partido).exists())
+
+    def test_un_fallo_no_deja_el_partido_a_medias(self):
+        EstadisticaPartido.objects.create(partido=self.partido, periodo='ALL', tiros_local=99)
+        with mock.patch('futbol.ingesta.guardar_eventos', side_effect=RuntimeError('boom')):
+            with self.assertRaises(RuntimeError):
+                self.guardar(datos_sinteticos.estadisticas(1), datos_sinteticos.incidentes(1))
+
+        self.assertEqual(list(EstadisticaPartido.objects.filter(partido=self.partido)
+                              .values_list('tiros_local', flat=True)), [99])
+        self.partido.refresh_from_db()
+        self.assertFalse(self.partido.tiene_estadisticas)
+        self.assertEqual(self.partido.huella_estadisticas, '')
+
+    def test_incidentes_vacios_borran_los_anteriores(self):
+        self.guardar(incidentes=datos_sinteticos.incidentes(1))
+        self.assertEqual(self.guardar(incidentes={'incidents': []}), (False, False, False))
+        self.assertFalse(EventoPartido.objects.filter(partido=self.partido).exists())
+        self.partido.refresh_from_db()
+        self.assertFalse(self.partido.tiene_incidentes)
+
+    def test_payload_identico_no_se_reescribe(self):
+        self.assertEqual(huella_payload({'a': 1, 'b': [1, 2]}), huella_payload({'b': [1, 2], 'a': 1}))
+        estadisticas, incidentes = datos_sinteticos.estadisticas(1), datos_sinteticos.incidentes(1)
+        self.guardar(estadisticas, incidentes)
+
+        with mock.patch.object(self.syncer, '_escribir_estadisticas') as escribir_estadisticas, \
+                mock.patch('futbol.ingesta.guardar_eventos') as escribir_eventos:
+            resultado = self.guardar(estadisticas, incidentes)
+        escribir_estadisticas.assert_not_called()
+        escribir_eventos.assert_not_called()
+        self.assertEqual(resultado, (True, True, False))
+        self.assertEqual(self.syncer.stats['sin_cambios'], 2)
+
+        incidentes['incidents'] = incidentes['incidents'][:1]
+        self.guardar(incidentes=incidentes)
+        self.assertEqual(EventoPartido.objects.filter(partido=self.partido).count(), 1)
+        self.partido.refresh_from_db()
+        self.assertEqual(self.partido.huella_incidentes, huella_payload(incidentes))
+
+    def test_forzar_reescribe_aunque_la_huella_coincida(self):
+        estadisticas = datos_sinteticos.estadisticas(1)
+        self.guardar(estadisticas)
+
+        self.syncer.forzar = True
+        with mock.patch.object(self.syncer, '_escribir_estadisticas', return_value=True) as escribir_estadisticas:
+            self.guardar(estadisticas)
+        escribir_estadisticas.assert_called_once_with(self.partido, estadisticas)
+        self.assertEqual(self.syncer.stats['sin_cambios'], 0)
+
+    def test_poblar_escribe_igual(self):
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        manager = SofascoreSyncManager(api=crear_api(TransporteContador()))
+        guardar = type(manager)._guardar_detalles.__wrapped__
+        incidentes, alineaciones = datos_sinteticos.incidentes(1), datos_sinteticos.alineaciones(1)
+        self.assertTrue(guardar(manager, self.partido, None, incidentes, alineaciones, marcar_finales=False))
+
+        self.partido.refresh_from_db()
+        self.assertEqual((self.partido.tiene_incidentes, self.partido.tiene_lineups), (True, True))
+        self.assertEqual(manager.stats['eventos'], EventoPartido.objects.filter(partido=self.partido).count())
+        self.assertEqual(self.guardar(None, incidentes, alineaciones), (False, True, True))
+        self.assertEqual(self.syncer.stats['sin_cambios'], 2)
+
+
+class DetallesFallidosTests(SimpleTestCase):
+    """Un partido cuyos detalles no se pudieron pedir no se da por sincronizado"""
+
+    def setUp(self):
+        from estadisticas import EstadisticasSyncer
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        self.partido = Partido(sofascore_id=1, estado='finished')
+        self.syncer = EstadisticasSyncer(api=crear_api(TransporteContador()))
+        self.manager = SofascoreSyncManager(api=crear_api(TransporteContador()))
+
+    def responder(self, api, incidentes):
+        api.get_partido_estadisticas = mock.AsyncMock(return_value={'statistics': []})
+        api.get_partido_incidentes = mock.AsyncMock(side_effect=SofascoreAPIError('/incidents', incidentes))
+        api.get_partido_lineups = mock.AsyncMock(side_effect=SofascoreAPIError('/lineups', 404))
+
+    def test_estadisticas_lanza_el_error_y_no_marca_finales(self):
+        self.responder(self.syncer.api, 500)
+        with mock.patch.object(self.syncer, '_guardar_detalles', mock.AsyncMock()) as guardar, \
+                mock.patch('builtins.print'):
+            with self.assertRaises(SofascoreAPIError):
+                asyncio.run(self.syncer.sync_detalles_partido(self.partido))
+        guardar.assert_awaited_once_with(self.partido, {'statistics': []}, None, None, marcar_finales=False)
+
+    def test_poblar_devuelve_si_quedo_sincronizado(self):
+        self.manager._guardar_detalles = mock.AsyncMock(return_value=True)
+        self.responder(self.manager.api, 500)
+        with self.assertLogs('poblar_bd_sofascore', 'WARNING'):
+            self.assertFalse(asyncio.run(self.manager.sync_detalles_partido(1, self.partido)))
+
+        # Un 404 es un detalle que no existe, no un fallo
+        self.responder(self.manager.api, 404)
+        self.assertTrue(asyncio.run(self.manager.sync_detalles_partido(1, self.partido)))
+        self.manager._guardar_detalles.assert_awaited_with(self.partido, {'statistics': []}, None, None,
+                                                           marcar_finales=True)
+
+
+class PlantillasBulkTests(TestCase):
+    def setUp(self):
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        self.manager = SofascoreSyncManager(api=SofascoreAPI(transporte=TransporteContador(), cache=False))
+        self.guardar = functools.partial(type(self.manager)._guardar_plantillas.__wrapped__, self.manager)
+
+    def test_upsert_de_varias_plantillas(self):
+        espana = Pais.objects.create(nombre='Spain')
+        local = Equipo.objects.create(sofascore_id=1, nombre='A')
+        visitante = Equipo.objects.create(sofascore_id=2, nombre='B')
+        Jugador.objects.create(sofascore_id=10, nombre='Viejo', equipo=local, posicion='MED')
+        plantilla = lambda *ids: [{'player': {'id': i, 'name': f'J{i}', 'position': 'F',
+                                              'country': {'name': 'Spain'}}} for i in ids]
+
+        with self.assertNumQueries(6):  # países, existentes, upsert, ids (+ savepoint)
+            guardados = self.guardar([(local, plantilla(10, 11)), (visitante, plantilla(12, 10))])
+
+        self.assertEqual(guardados, 3)
+        self.assertEqual(self.manager.stats['jugadores'], 2)
+        jugador = Jugador.objects.get(sofascore_id=10)
+        self.assertEqual((jugador.nombre, jugador.equipo, jugador.nacionalidad), ('J10', visitante, espana))
+        self.assertEqual(Jugador.objects.filter(posicion='DEL').count(), 3)
+
+
+class PartidosBulkTests(TestCase):
+    def setUp(self):
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        self.manager = SofascoreSyncManager(api=SofascoreAPI(transporte=TransporteContador(), cache=False))
+        self.guardar = functools.partial(type(self.manager)._guardar_partidos_bulk.__wrapped__, self.manager)
+
+    def test_no_pisa_lo_que_no_viene_en_el_payload(self):
+        evento = datos_sinteticos.evento(1)
+        evento['winnerCode'] = 1
+        [partido] = self.guardar([evento])
+        Liga.objects.update(nivel=2, prioridad=5)
+
+        del evento['winnerCode']
+        evento['slug'] = 'nuevo-slug'
+        [partido] = self.guardar([evento])
+
+        self.assertEqual(partido.slug, 'nuevo-slug')
+        self.assertEqual(partido.ganador_id, partido.equipo_local_id)
+        self.assertEqual(list(Liga.objects.values_list('nivel', 'prioridad')), [(2, 5)])
+
+
+class ReconciliarTests(TestCase):
+    def setUp(self):
+        crear_partidos_sinteticos(equipos=2, temporadas=1)
+        self.partido = Partido.objects.get(sofascore_id=1)
+
+    def eventos(self, *minutos_por_id):
+        return [EventoPartido(partido=self.partido, sofascore_id=i, minuto=m, tipo='goal') for i, m in minutos_por_id]
+
+    def reconciliar(self, eventos):
+        return reconciliar(EventoPartido, EventoPartido.objects.filter(partido=self.partido), eventos,
+                           clave_evento, CAMPOS_EVENTO)
+
+    def test_solo_toca_lo_que_cambia(self):
+        self.assertEqual(self.reconciliar(self.eventos((1, 10), (2, 20), (3, 30))), (3, 0, 0))
+        ids = dict(EventoPartido.objects.values_list('sofascore_id', 'id'))
+
+        self.assertEqual(self.reconciliar(self.eventos((1, 10), (2, 20), (3, 30))), (0, 0, 0))
+        self.assertEqual(self.reconciliar(self.eventos((1, 10), (2, 25), (4, 40))), (1, 1, 1))
+
+        despues = dict(EventoPartido.objects.values_list('sofascore_id', 'id'))
+        self.assertEqual(sorted(despues), [1, 2, 4])
+        self.assertEqual((despues[1], despues[2]), (ids[1], ids[2]))  # mismas filas, sin recrear
+        self.assertEqual(EventoPartido.objects.get(sofascore_id=2).minuto, 25)
+
+    def test_eventos_sin_id_por_contenido(self):
+        periodo = lambda: EventoPartido(partido=self.partido, minuto=45, tipo='period', texto_incidente='HT')
+        self.assertEqual(self.reconciliar([periodo()]), (1, 0, 0))
+        self.assertEqual(self.reconciliar([periodo()]), (0, 0, 0))
+
+
+class CheckpointTests(SimpleTestCase):
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def test_reanudar_tras_cortar(self):
+        with self.assertRaises(KeyboardInterrupt):
+            with Checkpoint('trabajo', self.directorio, guardar_cada=60) as checkpoint:
+                checkpoint.marcar('liga/8')
+                checkpoint.marcar('61643/1')
+                raise KeyboardInterrupt
+
+        reanudado = Checkpoint('trabajo', self.directorio)
+        self.assertTrue(reanudado.reanudado)
+        self.assertTrue(reanudado.hecho('61643/1'))
+        self.assertEqual(os.listdir(self.directorio), ['trabajo.json'])
+
+    def test_compactar_y_terminar(self):
+        checkpoint = Checkpoint('trabajo', self.directorio)
+        for event_id in range(5):
+            checkpoint.marcar(f"61643/{event_id}")
+        checkpoint.compactar('61643/', 'temporada/61643')
+        self.assertEqual(Checkpoint('trabajo', self.directorio).completados, {'temporada/61643'})
+
+        checkpoint.terminar()
+        self.assertFalse(Checkpoint('trabajo', self.directorio).reanudado)
+
+
+class TransporteConFallos(datos_sinteticos.TransporteSintetico):
+    """Transporte sintético que contesta 500 en las rutas de `fallar`"""
+
+    def __init__(self):
+        super().__init__(api=ApiSintetica())
+        self.fallar = set()
+
+    async def _obtener(self, url):
+        if url[len(self.BASE_URL):] in self.fallar:
+            return Respuesta(500, None)
+        return await super()._obtener(url)
+
+
+class SyncIncrementalTests(TransactionTestCase):
+    """La marca de agua no salta un partido cuyos detalles fallaron"""
+
+    def sincronizar(self, transporte):
+        from poblar_bd_sofascore import SofascoreSyncManager
+
+        api = SofascoreAPI(transporte, base_url=transporte.BASE_URL, peticiones_por_segundo=0,
+                           reintentos=0, cache=False)
+        escritor = EscritorBD()
+        self.addCleanup(escritor.detener)
+        with mock.patch('futbol.escritor._escritor', escritor), self.assertLogs('poblar_bd_sofascore', 'INFO'):
+            asyncio.run(SofascoreSyncManager(api=api).sync_liga_completa(8, 61643, max_partidos=3))
+        escritor.detener()
+        return EstadoSincronizacion.objects.get()
+
+    def test_detalles_con_500_quedan_pendientes(self):
+        transporte = TransporteConFallos()
+        fallido = transporte.api.eventos_temporada(8, 61643)[0]['id']
+        transporte.fallar.add(f"/event/{fallido}/statistics")
+
+        estado = self.sincronizar(transporte)
+        self.assertIn(str(fallido), estado.pendientes)
+        self.assertFalse(Partido.objects.get(sofascore_id=fallido).detalles_finales)
+
+        transporte.fallar.clear()
+        estado = self.sincronizar(transporte)
+        self.assertNotIn(str(fallido), estado.pendientes)
+        self.assertTrue(Partido.objects.get(sofascore_id=fallido).detalles_finales)
+
+
+class ReplayArchivoTests(TransactionTestCase):
+    """Reconstruir la BD desde un archivo sintético sin tocar la red"""
+
+    def setUp(self):
+        self.directorio = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directorio, ignore_errors=True)
+
+    def test_reproducir_archivo_sintetico(self):
+        from replay_archivo import generar_archivo_sintetico, reproducir
+
+        generar_archivo_sintetico(self.directorio, 6, por_dia=3)
+        escritor = EscritorBD()
+        self.addCleanup(escritor.detener)
+        with mock.patch('futbol.escritor._escritor', escritor), mock.patch('builtins.print'), \
+                self.assertLogs('poblar_bd_sofascore', 'INFO'):
+            asyncio.run(reproducir(self.directorio, concurrencia=4, bulk=False, con_estadisticas=True))
+        escritor.detener()
+
+        self.assertEqual(Partido.objects.count(), 6)
+        self.assertEqual(Partido.objects.filter(estado='finished').count(), 6)
+        self.assertEqual(Partido.objects.filter(estadisticas__isnull=False).distinct().count(), 6)
+        self.assertTrue(EventoPartido.objects.exists())
@@ -0,0 +1,225 @@
+"""
+Transportes HTTP para SofascoreAPI
+
+Cada transporte sabe hacer una sola cosa: pedir una URL y devolver el status
+y el JSON de la respuesta. SofascoreAPI no sabe si por debajo hay una pestaña
+de Chromium, un pool de contextos o un cliente HTTP.
+
+- TransporteGoto: comportamiento original y el de por defecto, una sola
+  pestaña con page.goto (navegación real)
+- TransporteNavegador: contextos del pool de Chromium del proceso usando context.request
+- TransporteHttp: cliente aiohttp con pool de conexiones compartido
+- TransporteArchivo: sin red, contesta con las respuestas de un ArchivoRespuestas
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Mapping, NamedTuple, Optional
+
+from playwright.async_api import async_playwright
+
+from futbol.archivo_respuestas import ArchivoRespuestas
+from futbol.pool_navegador import PoolNavegador, USER_AGENT, obtener_pool
+
+try:
+    import aiohttp
+except ImportError:  # Dependencia opcional, solo para TransporteHttp
+    aiohttp = None
+
+
+class Respuesta(NamedTuple):
+    status: int
+    datos: Any
+    # Segundos de la cabecera Retry-After (429/503), si vino
+    reintentar_tras: Optional[float] = None
+
+
+def segundos_retry_after(cabeceras: Optional[Mapping]) -> Optional[float]:
+    """Retry-After en segundos: admite tanto segundos como una fecha HTTP"""
+    valor = None
+    for clave, v in (cabeceras or {}).items():
+        if clave.lower() == 'retry-after':
+            valor = v.strip()
+            break
+    if not valor:
+        return None
+    if valor.isdigit():
+        return float(valor)
+    try:
+        fecha = parsedate_to_datetime(valor)
+    except (TypeError, ValueError):
+        return None
+    if fecha.tzinfo is None:
+        fecha = fecha.replace(tzinfo=timezone.utc)
+    return max(0.0, (fecha - datetime.now(timezone.utc)).total_seconds())
+
+
+class Transporte:
+    """Interfaz común de los transportes"""
+
+    nombre = 'base'
+
+    def __init__(self, concurrencia: int = 1):
+        self.concurrencia = max(1, concurrencia)
+        self._semaforo = asyncio.Semaphore(self.concurrencia)
+
+    async def obtener(self, url: str) -> Respuesta:
+        """Pedir una URL respetando el límite de concurrencia"""
+        async with self._semaforo:
+            return await self._obtener(url)
+
+    async def _obtener(self, url: str) -> Respuesta:
+        raise NotImplementedError
+
+    async def cerrar(self):
+        pass
+
+
+class TransporteGoto(Transporte):
+    """
+    Una sola pestaña navegando con page.goto (camino original).
+    Las navegaciones sobre la misma página no pueden solaparse, por eso la
+    concurrencia siempre es 1.
+    """
+
+    nombre = 'goto'
+
+    def __init__(self, concurrencia: int = 1):
+        super().__init__(concurrencia=1)
+        self.playwright = None
+        self.browser = None
+        self.page = None
+
+    async def _init_browser(self):
+        if self.playwright is None:
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
+            self.page = await self.browser.new_page()
+
+    async def _obtener(self, url: str) -> Respuesta:
+        await self._init_browser()
+        response = await self.page.goto(url)
+        if response.status == 200:
+            return Respuesta(response.status, await response.json())
+        return Respuesta(response.status, None, segundos_retry_after(response.headers))
+
+    async def cerrar(self):
+        if self.browser:
+            await self.browser.close()
+        if self.playwright:
+            await self.playwright.stop()
+        self.playwright = self.browser = self.page = None
+
+
+class TransporteNavegador(Transporte):
+    """
+    Contextos de Chromium prestados por el pool del proceso. Cada petición
+    usa context.request, que comparte cookies con el contexto pero no navega,
+    así que varias peticiones pueden ir en paralelo sin pagar el coste de una
+    navegación completa.
+    """
+
+    nombre = 'navegador'
+
+    def __init__(self, concurrencia: int = 8, pool: Optional[PoolNavegador] = None):
+        super().__init__(concurrencia)
+        self.pool = pool or obtener_pool()
+
+    async def _obtener(self, url: str) -> Respuesta:
+        async with self.pool.contexto() as contexto:
+            response = await contexto.request.get(url)
+            try:
+                if response.status == 200:
+                    return Respuesta(response.status, await response.json())
+                return Respuesta(response.status, None, segundos_retry_after(response.headers))
+            finally:
+                await response.dispose()
+
+    async def cerrar(self):
+        # El navegador es del proceso: lo cierra cerrar_pool() al terminar
+        pass
+
+
+class TransporteHttp(Transporte):
+    """Cliente aiohttp con un pool de conexiones keep-alive compartido"""
+
+    nombre = 'http'
+
+    def __init__(self, concurrencia: int = 8, timeout: float = 30):
+        if aiohttp is None:
+            raise RuntimeError("TransporteHttp necesita aiohttp (pip install aiohttp)")
+        super().__init__(concurrencia)
+        self.timeout = timeout
+        self.session: Optional['aiohttp.ClientSession'] = None
+
+    async def _init_session(self):
+        if self.session is None:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrencia),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT, 'Accept': 'application/json'},
+            )
+
+    async def _obtener(self, url: str) -> Respuesta:
+        await self._init_session()
+        async with self.session.get(url) as response:
+            if response.status == 200:
+                return Respuesta(response.status, await response.json(content_type=None))
+            return Respuesta(response.status, None, segundos_retry_after(response.headers))
+
+    async def cerrar(self):
+        if self.session:
+            await self.session.close()
+        self.session = None
+
+
+class TransporteArchivo(Transporte):
+    """
+    Reproduce respuestas archivadas (ver futbol/archivo_respuestas.py) sin
+    tocar la red: cada URL se contesta con el último registro de su endpoint
+    y lo que no está archivado devuelve 404. El endpoint es la URL sin
+    `base_url` (por defecto, lo que va detrás de /api/v1).
+    """
+
+    nombre = 'archivo'
+
+    def __init__(self, concurrencia: int = 64, archivo: Optional[ArchivoRespuestas] = None,
+                 base_url: str = None):
+        super().__init__(concurrencia)
+        self.archivo = archivo or ArchivoRespuestas()
+        self.base_url = base_url
+        self.aciertos = 0
+        self.fallos = 0
+
+    async def _obtener(self, url: str) -> Respuesta:
+        if self.base_url and url.startswith(self.base_url):
+            endpoint = url[len(self.base_url):]
+        else:
+            endpoint = url.split('/api/v1', 1)[-1]
+        registro = self.archivo.leer(endpoint, solo_ok=False)
+        if registro is None:
+            self.fallos += 1
+            return Respuesta(404, None)
+        self.aciertos += 1
+        return Respuesta(registro['status'], registro['datos'])
+
+    async def cerrar(self):
+        self.archivo.cerrar()
+
+
+TRANSPORTES = {
+    TransporteGoto.nombre: TransporteGoto,
+    TransporteNavegador.nombre: TransporteNavegador,
+    TransporteHttp.nombre: TransporteHttp,
+    TransporteArchivo.nombre: TransporteArchivo,
+}
+
+
+def crear_transporte(tipo: str = 'goto', concurrencia: int = 8) -> Transporte:
+    """Crear un transporte por nombre: 'goto', 'navegador', 'http' o 'archivo'"""
+    try:
+        clase = TRANSPORTES[tipo]
+    except KeyError:
+        raise ValueError(f"Transporte desconocido: {tipo} (opciones: {', '.join(TRANSPORTES)})")
+    return clase(concurrencia=concurrencia)
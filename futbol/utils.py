@@ -4,13 +4,34 @@ Ubicar en: futbol/utils.py
 """
 
 from datetime import datetime, timedelta
-from django.db.models import Q, Count, Avg, Sum
+from django.db.models import Q, F, Count, Avg, Sum, Case, When
+from django.db.models.functions import Coalesce
 from django.utils import timezone
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Sequence
 
 from futbol.models import *
 
 
+def _resumen_resultados(victorias: int, empates: int, derrotas: int, goles_favor: int, goles_contra: int) -> Dict:
+    """Dict de estadísticas generales a partir de los totales"""
+    partidos_jugados = victorias + empates + derrotas
+    puntos = victorias * 3 + empates
+
+    return {
+        'partidos_jugados': partidos_jugados,
+        'victorias': victorias,
+        'empates': empates,
+        'derrotas': derrotas,
+        'goles_favor': goles_favor,
+        'goles_contra': goles_contra,
+        'diferencia_goles': goles_favor - goles_contra,
+        'puntos': puntos,
+        'promedio_puntos': round(puntos / partidos_jugados, 2) if partidos_jugados > 0 else 0,
+        'promedio_goles_favor': round(goles_favor / partidos_jugados, 2) if partidos_jugados > 0 else 0,
+        'promedio_goles_contra': round(goles_contra / partidos_jugados, 2) if partidos_jugados > 0 else 0,
+    }
+
+
 class EstadisticasEquipo:
     """Clase para calcular estadísticas de equipos"""
 
@@ -28,56 +49,29 @@ class EstadisticasEquipo:
             query = query.filter(temporada=self.temporada)
         return query
 
+    def _agregar(self, partidos) -> Dict:
+        """
+        Victorias, empates, derrotas y goles del equipo en una sola consulta.
+        Igual que Partido.resultado, un partido sin marcador completo suma
+        goles pero no cuenta como jugado.
+        """
+        es_local = Q(equipo_local=self.equipo)
+        gana_local = Q(goles_local__gt=F('goles_visitante'))
+        gana_visitante = Q(goles_local__lt=F('goles_visitante'))
+        goles_local = Coalesce('goles_local', 0)
+        goles_visitante = Coalesce('goles_visitante', 0)
+
+        return partidos.aggregate(
+            victorias=Count('id', filter=(es_local & gana_local) | (~es_local & gana_visitante)),
+            empates=Count('id', filter=Q(goles_local=F('goles_visitante'))),
+            derrotas=Count('id', filter=(es_local & gana_visitante) | (~es_local & gana_local)),
+            goles_favor=Coalesce(Sum(Case(When(es_local, then=goles_local), default=goles_visitante)), 0),
+            goles_contra=Coalesce(Sum(Case(When(es_local, then=goles_visitante), default=goles_local)), 0),
+        )
+
     def estadisticas_generales(self) -> Dict:
         """Obtener estadísticas generales del equipo"""
-        partidos = self.partidos_query()
-
-        victorias = 0
-        empates = 0
-        derrotas = 0
-        goles_favor = 0
-        goles_contra = 0
-
-        for partido in partidos:
-            es_local = partido.equipo_local == self.equipo
-
-            if es_local:
-                goles_favor += partido.goles_local or 0
-                goles_contra += partido.goles_visitante or 0
-                resultado = partido.resultado
-                if resultado == 'L':
-                    victorias += 1
-                elif resultado == 'E':
-                    empates += 1
-                elif resultado == 'V':
-                    derrotas += 1
-            else:
-                goles_favor += partido.goles_visitante or 0
-                goles_contra += partido.goles_local or 0
-                resultado = partido.resultado
-                if resultado == 'V':
-                    victorias += 1
-                elif resultado == 'E':
-                    empates += 1
-                elif resultado == 'L':
-                    derrotas += 1
-
-        partidos_jugados = victorias + empates + derrotas
-        puntos = victorias * 3 + empates
-
-        return {
-            'partidos_jugados': partidos_jugados,
-            'victorias': victorias,
-            'empates': empates,
-            'derrotas': derrotas,
-            'goles_favor': goles_favor,
-            'goles_contra': goles_contra,
-            'diferencia_goles': goles_favor - goles_contra,
-            'puntos': puntos,
-            'promedio_puntos': round(puntos / partidos_jugados, 2) if partidos_jugados > 0 else 0,
-            'promedio_goles_favor': round(goles_favor / partidos_jugados, 2) if partidos_jugados > 0 else 0,
-            'promedio_goles_contra': round(goles_contra / partidos_jugados, 2) if partidos_jugados > 0 else 0,
-        }
+        return _resumen_resultados(**self._agregar(self.partidos_query()))
 
     def racha_actual(self, cantidad: int = 5) -> List[str]:
         """Obtener racha de resultados recientes"""
@@ -131,28 +125,10 @@ class EstadisticasEquipo:
         if self.temporada:
             partidos = partidos.filter(temporada=self.temporada)
 
-        victorias = empates = derrotas = 0
-        goles_favor = goles_contra = 0
-
-        for partido in partidos:
-            if es_local:
-                goles_favor += partido.goles_local or 0
-                goles_contra += partido.goles_visitante or 0
-                if partido.resultado == 'L':
-                    victorias += 1
-                elif partido.resultado == 'E':
-                    empates += 1
-                elif partido.resultado == 'V':
-                    derrotas += 1
-            else:
-                goles_favor += partido.goles_visitante or 0
-                goles_contra += partido.goles_local or 0
-                if partido.resultado == 'V':
-                    victorias += 1
-                elif partido.resultado == 'E':
-                    empates += 1
-                elif partido.resultado == 'L':
-                    derrotas += 1
+        agregados = self._agregar(partidos)
+        victorias = agregados['victorias']
+        empates = agregados['empates']
+        derrotas = agregados['derrotas']
 
         partidos_jugados = victorias + empates + derrotas
 
@@ -161,8 +137,8 @@ class EstadisticasEquipo:
             'victorias': victorias,
             'empates': empates,
             'derrotas': derrotas,
-            'goles_favor': goles_favor,
-            'goles_contra': goles_contra,
+            'goles_favor': agregados['goles_favor'],
+            'goles_contra': agregados['goles_contra'],
             'puntos': victorias * 3 + empates
         }
 
@@ -298,42 +274,44 @@ class TopScorers:
 
 
 class CalculadoraTabla:
-    """Calcular tabla de posiciones"""
-
-    def __init__(self, temporada: Temporada):
+    """
+    Calcular tabla de posiciones con una sola pasada sobre los partidos
+    finalizados de la temporada.
+
+    `criterios` define el orden y los desempates. Además de cualquier clave
+    numérica de la fila ('puntos', 'diferencia_goles', 'goles_favor',
+    'victorias'...) acepta 'enfrentamientos': entre los equipos empatados
+    hasta ese criterio se calcula una mini-tabla solo con sus partidos
+    (puntos, diferencia y goles a favor en los enfrentamientos directos).
+    """
+
+    CRITERIOS_POR_DEFECTO = ('puntos', 'diferencia_goles', 'goles_favor')
+    # Reglamento tipo LaLiga / Serie A: el enfrentamiento directo antes que la diferencia general
+    CRITERIOS_ENFRENTAMIENTOS = ('puntos', 'enfrentamientos', 'diferencia_goles', 'goles_favor')
+
+    def __init__(self, temporada: Temporada, criterios: Sequence[str] = CRITERIOS_POR_DEFECTO):
         self.temporada = temporada
+        self.criterios = tuple(criterios)
 
     def calcular_tabla(self) -> List[Dict]:
         """Calcular tabla de posiciones completa"""
-        # Obtener todos los equipos que jugaron en la temporada
-        equipos_ids = set()
-        partidos = Partido.objects.filter(
+        partidos = list(Partido.objects.filter(
             temporada=self.temporada,
             estado='finished'
-        )
-
-        for partido in partidos:
-            equipos_ids.add(partido.equipo_local.id)
-            equipos_ids.add(partido.equipo_visitante.id)
+        ).values_list('equipo_local_id', 'equipo_visitante_id', 'goles_local', 'goles_visitante'))
 
-        equipos = Equipo.objects.filter(id__in=equipos_ids)
+        # id -> [victorias, empates, derrotas, goles_favor, goles_contra]
+        totales = {}
+        for local, visitante, goles_local, goles_visitante in partidos:
+            self._sumar(totales, local, visitante, goles_local, goles_visitante)
 
-        tabla = []
-        for equipo in equipos:
-            stats = EstadisticasEquipo(equipo, self.temporada)
-            datos = stats.estadisticas_generales()
+        # Mismo orden inicial que antes (ordering del modelo) para que los empates totales no cambien
+        tabla = [
+            {'equipo': equipo.nombre, 'equipo_obj': equipo, **_resumen_resultados(*totales[equipo.id])}
+            for equipo in Equipo.objects.filter(id__in=totales)
+        ]
 
-            tabla.append({
-                'equipo': equipo.nombre,
-                'equipo_obj': equipo,
-                **datos
-            })
-
-        # Ordenar por puntos, diferencia de goles y goles a favor
-        tabla.sort(
-            key=lambda x: (x['puntos'], x['diferencia_goles'], x['goles_favor']),
-            reverse=True
-        )
+        tabla = self._ordenar(tabla, self.criterios, partidos)
 
         # Agregar posición
         for i, equipo_data in enumerate(tabla, 1):
@@ -341,6 +319,59 @@ class CalculadoraTabla:
 
         return tabla
 
+    @staticmethod
+    def _sumar(totales: Dict, local: int, visitante: int, goles_local, goles_visitante):
+        """Acumular un partido; sin marcador completo suma goles pero no resultado"""
+        fila_local = totales.setdefault(local, [0, 0, 0, 0, 0])
+        fila_visitante = totales.setdefault(visitante, [0, 0, 0, 0, 0])
+
+        fila_local[3] += goles_local or 0
+        fila_local[4] += goles_visitante or 0
+        fila_visitante[3] += goles_visitante or 0
+        fila_visitante[4] += goles_local or 0
+
+        if goles_local is None or goles_visitante is None:
+            return
+        if goles_local > goles_visitante:
+            fila_local[0] += 1
+            fila_visitante[2] += 1
+        elif goles_local < goles_visitante:
+            fila_local[2] += 1
+            fila_visitante[0] += 1
+        else:
+            fila_local[1] += 1
+            fila_visitante[1] += 1
+
+    def _ordenar(self, grupo: List[Dict], criterios: Sequence[str], partidos: List) -> List[Dict]:
+        """Ordenar por el primer criterio y desempatar recursivamente con los siguientes"""
+        if len(grupo) <= 1 or not criterios:
+            return grupo
+
+        criterio, resto = criterios[0], criterios[1:]
+        if criterio == 'enfrentamientos':
+            ids = {fila['equipo_obj'].id for fila in grupo}
+            mini = {}
+            for local, visitante, goles_local, goles_visitante in partidos:
+                if local in ids and visitante in ids:
+                    self._sumar(mini, local, visitante, goles_local, goles_visitante)
+            claves = {}
+            for id_equipo in ids:
+                v, e, d, gf, gc = mini.get(id_equipo, [0, 0, 0, 0, 0])
+                claves[id_equipo] = (v * 3 + e, gf - gc, gf)
+            clave = lambda fila: claves[fila['equipo_obj'].id]
+        else:
+            clave = lambda fila: fila[criterio]
+
+        grupo = sorted(grupo, key=clave, reverse=True)
+
+        ordenado = []
+        inicio = 0
+        for i in range(1, len(grupo) + 1):
+            if i == len(grupo) or clave(grupo[i]) != clave(grupo[inicio]):
+                ordenado.extend(self._ordenar(grupo[inicio:i], resto, partidos))
+                inicio = i
+        return ordenado
+
 
 class ProximosPartidosRecomendador:
     """Recomendar partidos próximos interesantes"""
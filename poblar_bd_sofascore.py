@@ -1,22 +1,28 @@
 """
 Script mejorado para sincronizar datos de Sofascore con Django
-Uso: python poblar_bd_sofascore.py
+Uso: python poblar_bd_sofascore.py [--force]
+Con --force se vuelven a pedir los detalles de los partidos que ya los tienen definitivos.
 """
 
+import argparse
 import asyncio
 import os
+import time
 import django
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import logging
 
-from asgiref.sync import sync_to_async
+from django.db import transaction
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
 django.setup()
 
+from futbol.escritor import confirmar_escrituras, en_escritor, lotes_perdidos
 from futbol.models import *
-from futbol.sofascore_api import SofascoreAPI
+from futbol.ingesta import POSICIONES, estado_partido, guardar_detalles, huella_payload
+from futbol.sofascore_api import SofascoreAPI, SofascoreAPIError
+from futbol.pool_navegador import ejecutar_con_pool
 
 # Configurar logging
 logging.basicConfig(
@@ -25,12 +31,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Partidos sincronizados a la vez (el ritmo de peticiones lo marca SofascoreAPI)
+WORKERS = int(os.environ.get('SOFASCORE_WORKERS', 4))
+
 
 class SofascoreSyncManager:
     """Gestor mejorado para sincronizar datos de Sofascore"""
 
-    def __init__(self):
-        self.api = SofascoreAPI()
+    def __init__(self, workers: int = WORKERS, api: SofascoreAPI = None, forzar: bool = False):
+        """forzar: volver a pedir los detalles de partidos cuyos detalles ya son definitivos"""
+        self.api = api or SofascoreAPI()
+        self.workers = workers
+        self.forzar = forzar
         self.stats = {
             'paises': 0,
             'ligas': 0,
@@ -40,24 +52,64 @@ class SofascoreSyncManager:
             'partidos': 0,
             'estadisticas': 0,
             'eventos': 0,
-            'alineaciones': 0
+            'alineaciones': 0,
+            'identidades_reutilizadas': 0,
+            'detalles_omitidos': 0,
+            'detalles_sin_cambios': 0
         }
         self.errores = []
 
+        # Mapa de identidad de la ejecución: clave -> (huella del payload, objeto).
+        # Si el mismo país/liga/temporada/equipo vuelve a aparecer con el mismo
+        # payload se devuelve el objeto sin tocar la BD.
+        self._identidades = {'pais': {}, 'liga': {}, 'temporada': {}, 'equipo': {}}
+        self._lotes_perdidos = lotes_perdidos()
+
     async def close(self):
         """Cerrar la conexión de la API"""
         await self.api.close()
 
+    # ============================================
+    # MAPA DE IDENTIDAD
+    # ============================================
+
+    def _huella(self, *partes) -> str:
+        """Hash estable de un payload (y de las FKs que dependen de él)"""
+        return huella_payload(partes)
+
+    async def _desde_identidad(self, tipo: str, clave, guardar, payload: Dict, *relacionados):
+        """Devolver el objeto ya sincronizado si el payload no cambió; si no, guardarlo"""
+        if lotes_perdidos() != self._lotes_perdidos:
+            # El escritor perdió un lote: lo recordado puede no haber llegado a la BD
+            self._lotes_perdidos = lotes_perdidos()
+            for identidades in self._identidades.values():
+                identidades.clear()
+
+        huella = self._huella(payload, *[getattr(r, 'pk', r) for r in relacionados])
+        conocido = self._identidades[tipo].get(clave)
+        if conocido and conocido[0] == huella:
+            self.stats['identidades_reutilizadas'] += 1
+            return conocido[1]
+
+        objeto = await guardar(payload, *relacionados)
+        if objeto:
+            self._identidades[tipo][clave] = (huella, objeto)
+        return objeto
+
     # ============================================
     # MÉTODOS PARA SINCRONIZAR PAÍSES Y LIGAS
     # ============================================
 
-    @sync_to_async
-    def sync_pais(self, pais_data: Dict) -> Optional[Pais]:
+    async def sync_pais(self, pais_data: Dict) -> Optional[Pais]:
         """Sincronizar un país"""
         if not pais_data or not pais_data.get('name'):
             return None
+        # Los países se buscan por nombre (las categorías internacionales no traen id)
+        return await self._desde_identidad('pais', pais_data['name'], self._guardar_pais, pais_data)
 
+    @en_escritor
+    def _guardar_pais(self, pais_data: Dict) -> Optional[Pais]:
+        """Crear el país si no existe"""
         pais, created = Pais.objects.get_or_create(
             nombre=pais_data.get('name', ''),
             defaults={
@@ -73,15 +125,30 @@ class SofascoreSyncManager:
             logger.info(f"✓ País creado: {pais.nombre}")
         return pais
 
-    @sync_to_async
-    def sync_liga(self, liga_data: Dict, pais: Optional[Pais] = None) -> Optional[Liga]:
+    async def sync_liga(self, liga_data: Dict, pais: Optional[Pais] = None) -> Optional[Liga]:
         """Sincronizar una liga/torneo"""
         if not liga_data or not liga_data.get('id'):
             return None
+        return await self._desde_identidad('liga', liga_data['id'], self._guardar_liga, liga_data, pais)
 
-        sofascore_id = liga_data.get('id')
+    @en_escritor
+    def _guardar_liga(self, liga_data: Dict, pais: Optional[Pais] = None) -> Optional[Liga]:
+        """Crear o actualizar la liga en BD"""
+        liga, created = Liga.objects.update_or_create(
+            sofascore_id=liga_data.get('id'),
+            defaults=self._campos_liga(liga_data, pais)
+        )
 
-        defaults = {
+        if created:
+            self.stats['ligas'] += 1
+            logger.info(f"✓ Liga creada: {liga.nombre}")
+
+        return liga
+
+    def _campos_liga(self, liga_data: Dict, pais: Optional[Pais]) -> Dict:
+        """Campos de la liga a partir del payload del torneo"""
+        sofascore_id = liga_data.get('id')
+        return {
             'nombre': liga_data.get('name', ''),
             'nombre_corto': liga_data.get('shortName', ''),
             'slug': liga_data.get('slug', ''),
@@ -92,17 +159,6 @@ class SofascoreSyncManager:
             'tiene_playoff': liga_data.get('hasPlayoffSeries', False),
         }
 
-        liga, created = Liga.objects.update_or_create(
-            sofascore_id=sofascore_id,
-            defaults=defaults
-        )
-
-        if created:
-            self.stats['ligas'] += 1
-            logger.info(f"✓ Liga creada: {liga.nombre}")
-
-        return liga
-
     def _determinar_tipo_liga(self, nombre: str) -> str:
         """Determinar el tipo de liga basado en el nombre"""
         nombre_lower = nombre.lower()
@@ -114,27 +170,20 @@ class SofascoreSyncManager:
             return 'amistoso'
         return 'liga'
 
-    @sync_to_async
-    def sync_temporada(self, temporada_data: Dict, liga: Liga) -> Optional[Temporada]:
+    async def sync_temporada(self, temporada_data: Dict, liga: Liga) -> Optional[Temporada]:
         """Sincronizar una temporada"""
         if not temporada_data or not temporada_data.get('id'):
             return None
+        return await self._desde_identidad(
+            'temporada', temporada_data['id'], self._guardar_temporada, temporada_data, liga
+        )
 
+    @en_escritor
+    def _guardar_temporada(self, temporada_data: Dict, liga: Liga) -> Optional[Temporada]:
+        """Crear o actualizar la temporada en BD"""
         sofascore_id = temporada_data.get('id')
         nombre = temporada_data.get('name', temporada_data.get('year', ''))
-
-        # Extraer años del nombre
-        try:
-            if '/' in nombre:
-                annos = nombre.split('/')
-                anno_inicio = int(annos[0])
-                anno_fin = int('20' + annos[1]) if len(annos[1]) == 2 else int(annos[1])
-            else:
-                anno_inicio = int(nombre)
-                anno_fin = anno_inicio
-        except (ValueError, IndexError):
-            anno_inicio = datetime.now().year
-            anno_fin = None
+        anno_inicio, anno_fin = self._parsear_annos(nombre)
 
         # Primero intentar buscar por sofascore_id
         try:
@@ -179,18 +228,34 @@ class SofascoreSyncManager:
 
         return temporada
 
+    def _parsear_annos(self, nombre: str):
+        """Extraer (año inicio, año fin) del nombre de la temporada"""
+        try:
+            if '/' in nombre:
+                annos = nombre.split('/')
+                anno_inicio = int(annos[0])
+                anno_fin = int('20' + annos[1]) if len(annos[1]) == 2 else int(annos[1])
+            else:
+                anno_inicio = int(nombre)
+                anno_fin = anno_inicio
+        except (ValueError, IndexError):
+            anno_inicio = datetime.now().year
+            anno_fin = None
+        return anno_inicio, anno_fin
+
     # ============================================
     # MÉTODOS PARA SINCRONIZAR EQUIPOS
     # ============================================
 
-    @sync_to_async
-    def sync_equipo(self, equipo_data: Dict) -> Optional[Equipo]:
+    async def sync_equipo(self, equipo_data: Dict) -> Optional[Equipo]:
         """Sincronizar un equipo"""
         if not equipo_data or not equipo_data.get('id'):
             return None
+        return await self._desde_identidad('equipo', equipo_data['id'], self._guardar_equipo, equipo_data)
 
-        sofascore_id = equipo_data.get('id')
-
+    @en_escritor
+    def _guardar_equipo(self, equipo_data: Dict) -> Optional[Equipo]:
+        """Crear o actualizar el equipo en BD"""
         # Obtener país si existe
         pais = None
         if equipo_data.get('country'):
@@ -199,7 +264,21 @@ class SofascoreSyncManager:
             except Pais.DoesNotExist:
                 pass
 
-        defaults = {
+        equipo, created = Equipo.objects.update_or_create(
+            sofascore_id=equipo_data.get('id'),
+            defaults=self._campos_equipo(equipo_data, pais)
+        )
+
+        if created:
+            self.stats['equipos'] += 1
+            logger.info(f"✓ Equipo creado: {equipo.nombre}")
+
+        return equipo
+
+    def _campos_equipo(self, equipo_data: Dict, pais: Optional[Pais]) -> Dict:
+        """Campos del equipo a partir de su payload"""
+        sofascore_id = equipo_data.get('id')
+        campos = {
             'nombre': equipo_data.get('name', ''),
             'nombre_corto': equipo_data.get('shortName', ''),
             'slug': equipo_data.get('slug', ''),
@@ -210,20 +289,11 @@ class SofascoreSyncManager:
 
         # Información adicional si está disponible
         if equipo_data.get('teamColors'):
-            defaults['colores'] = equipo_data['teamColors']
+            campos['colores'] = equipo_data['teamColors']
         if equipo_data.get('manager'):
-            defaults['manager'] = equipo_data['manager'].get('name', '')
+            campos['manager'] = equipo_data['manager'].get('name', '')
 
-        equipo, created = Equipo.objects.update_or_create(
-            sofascore_id=sofascore_id,
-            defaults=defaults
-        )
-
-        if created:
-            self.stats['equipos'] += 1
-            logger.info(f"✓ Equipo creado: {equipo.nombre}")
-
-        return equipo
+        return campos
 
     async def sync_equipo_completo(self, team_id: int) -> Optional[Equipo]:
         """Sincronizar información completa de un equipo"""
@@ -244,7 +314,7 @@ class SofascoreSyncManager:
             self.errores.append(f"Equipo {team_id}: {e}")
             return None
 
-    @sync_to_async
+    @en_escritor
     def _actualizar_info_equipo(self, equipo: Equipo, team_info: Dict):
         """Actualizar información adicional del equipo"""
         actualizado = False
@@ -283,26 +353,103 @@ class SofascoreSyncManager:
             data = await self.api.get_equipo_jugadores(team_id)
             jugadores_data = data.get('players', [])
 
-            for jugador_data in jugadores_data:
-                await self.sync_jugador(jugador_data.get('player', {}), equipo)
+            await self._guardar_plantillas([(equipo, jugadores_data)])
 
             logger.info(f"✓ Sincronizados {len(jugadores_data)} jugadores de {equipo.nombre}")
 
         except Exception as e:
             logger.warning(f"⚠ Error sincronizando jugadores de {equipo.nombre}: {e}")
 
-    @sync_to_async
+    async def sync_jugadores_equipos(self, equipos: List[Equipo]) -> int:
+        """
+        Sincronizar las plantillas de varios equipos (p. ej. todos los de una
+        temporada): se piden a la vez con el pipeline concurrente y todos los
+        jugadores se guardan con un solo upsert. Devuelve los jugadores guardados.
+        """
+        async def pedir_plantilla(equipo: Equipo):
+            try:
+                data = await self.api.get_equipo_jugadores(equipo.sofascore_id)
+                return equipo, data.get('players', [])
+            except Exception as e:
+                logger.warning(f"⚠ Error pidiendo la plantilla de {equipo.nombre}: {e}")
+                return None
+
+        plantillas = [p for p in await self.procesar_en_paralelo(equipos, pedir_plantilla) if p]
+        try:
+            guardados = await self._guardar_plantillas(plantillas)
+        except Exception as e:
+            logger.warning(f"⚠ Error guardando las plantillas: {e}")
+            return 0
+
+        logger.info(f"✓ Sincronizados {guardados} jugadores de {len(plantillas)} equipos")
+        return guardados
+
+    @en_escritor
+    def _guardar_plantillas(self, plantillas: List[Tuple[Equipo, List[Dict]]]) -> int:
+        """
+        Upsert de los jugadores de una o varias plantillas: las nacionalidades
+        se resuelven con una consulta `in` y los jugadores se escriben con un
+        bulk_create(update_conflicts=True). Devuelve los jugadores guardados.
+        """
+        por_id = {}
+        for equipo, jugadores_data in plantillas:
+            for item in jugadores_data:
+                jugador_data = item.get('player') or {}
+                if jugador_data.get('id'):
+                    # Un jugador en dos plantillas (traspaso a mitad de temporada): gana la última
+                    por_id[jugador_data['id']] = (jugador_data, equipo)
+        if not por_id:
+            return 0
+
+        nombres = {self._nombre_pais(jugador_data) for jugador_data, _ in por_id.values()} - {None}
+        paises = {p.nombre: p for p in Pais.objects.filter(nombre__in=nombres)}
+        jugadores = {
+            sofascore_id: Jugador(sofascore_id=sofascore_id, **self._campos_jugador(
+                jugador_data, equipo, paises.get(self._nombre_pais(jugador_data))
+            ))
+            for sofascore_id, (jugador_data, equipo) in por_id.items()
+        }
+
+        campos = [*self._campos_jugador({}, None, None).keys(), 'fecha_actualizacion']
+        with transaction.atomic():
+            self._upsert_por_sofascore_id(Jugador, jugadores, 'jugadores', campos=campos)
+        return len(jugadores)
+
+    @en_escritor
     def sync_jugador(self, jugador_data: Dict, equipo: Equipo) -> Optional[Jugador]:
         """Sincronizar un jugador"""
         if not jugador_data or not jugador_data.get('id'):
             return None
 
+        # País de nacionalidad
+        nacionalidad = None
+        if self._nombre_pais(jugador_data):
+            try:
+                nacionalidad = Pais.objects.get(nombre=self._nombre_pais(jugador_data))
+            except Pais.DoesNotExist:
+                pass
+
+        jugador, created = Jugador.objects.update_or_create(
+            sofascore_id=jugador_data.get('id'),
+            defaults=self._campos_jugador(jugador_data, equipo, nacionalidad)
+        )
+
+        if created:
+            self.stats['jugadores'] += 1
+
+        return jugador
+
+    @staticmethod
+    def _nombre_pais(jugador_data: Dict) -> Optional[str]:
+        return (jugador_data.get('country') or {}).get('name')
+
+    def _campos_jugador(self, jugador_data: Dict, equipo: Optional[Equipo], nacionalidad: Optional[Pais]) -> Dict:
+        """Campos del jugador a partir de su payload"""
         sofascore_id = jugador_data.get('id')
 
         # Mapeo de posiciones
-        posicion_map = {'G': 'POR', 'D': 'DEF', 'M': 'MED', 'F': 'DEL'}
         posicion_sofascore = jugador_data.get('position', 'M')
-        posicion = posicion_map.get(posicion_sofascore, 'MED')
+        posicion = POSICIONES.get(posicion_sofascore, 'MED')
 
         # Fecha de nacimiento
         fecha_nacimiento = None
@@ -313,15 +460,7 @@ class SofascoreSyncManager:
             except:
                 pass
 
-        # País de nacionalidad
-        nacionalidad = None
-        if jugador_data.get('country'):
-            try:
-                nacionalidad = Pais.objects.get(nombre=jugador_data['country'].get('name'))
-            except Pais.DoesNotExist:
-                pass
-
-        defaults = {
+        return {
             'nombre': jugador_data.get('name', ''),
             'nombre_completo': jugador_data.get('name', ''),
             'slug': jugador_data.get('slug', ''),
@@ -337,30 +476,22 @@ class SofascoreSyncManager:
             'foto_url': f"https://www.sofascore.com/static/images/player/{sofascore_id}.png",
         }
 
-        jugador, created = Jugador.objects.update_or_create(
-            sofascore_id=sofascore_id,
-            defaults=defaults
-        )
-
-        if created:
-            self.stats['jugadores'] += 1
-
-        return jugador
-
     # ============================================
     # MÉTODOS PARA SINCRONIZAR PARTIDOS
     # ============================================
 
-    async def sync_partidos_fecha(self, fecha: datetime, deporte: str = "football"):
-        """Sincronizar partidos de una fecha"""
+    async def sync_partidos_fecha(self, fecha: datetime, deporte: str = "football", bulk: bool = True):
+        """Sincronizar partidos de una fecha (bulk=False para ir partido a partido)"""
         try:
             data = await self.api.get_partidos_fecha(fecha, deporte)
             eventos = data.get('events', [])
 
             logger.info(f"\n📅 Sincronizando {len(eventos)} partidos del {fecha.strftime('%Y-%m-%d')}...")
 
-            for evento in eventos:
-                await self.sync_partido(evento)
+            if bulk:
+                await self.sync_partidos_bulk(eventos)
+            else:
+                await self.procesar_en_paralelo(eventos, self.sync_partido)
 
             logger.info(f"✓ Completado: {len(eventos)} partidos sincronizados")
 
@@ -368,8 +499,226 @@ class SofascoreSyncManager:
             logger.error(f"✗ Error sincronizando partidos de {fecha}: {e}")
             self.errores.append(f"Fecha {fecha}: {e}")
 
-    async def sync_partido(self, evento_data: Dict) -> Optional[Partido]:
-        """Sincronizar un partido"""
+    # ============================================
+    # INGESTA MASIVA DE PARTIDOS
+    # ============================================
+
+    async def sync_partidos_bulk(self, eventos: List[Dict], con_detalles: bool = True) -> List[Partido]:
+        """
+        Sincronizar de una vez una lista grande de eventos (p. ej. los miles de
+        /scheduled-events/{fecha}): todo se normaliza en memoria, las FKs se
+        resuelven con unas pocas consultas `in` y los partidos se escriben con
+        un solo bulk_create(update_conflicts=True) dentro de una transacción.
+        Los detalles de los partidos finalizados o en juego se piden después
+        con el pipeline concurrente.
+        """
+        eventos = list({e['id']: e for e in eventos if e.get('id')}.values())
+        if not eventos:
+            return []
+
+        partidos = await self._guardar_partidos_bulk(eventos)
+        logger.info(f"✓ {len(partidos)} partidos guardados en bloque")
+
+        if con_detalles:
+            pendientes = [p for p in partidos if p.estado in ['finished', 'inprogress']]
+            await self.procesar_en_paralelo(
+                pendientes, lambda partido: self.sync_detalles_partido(partido.sofascore_id, partido)
+            )
+
+        return partidos
+
+    @en_escritor
+    def _guardar_partidos_bulk(self, eventos: List[Dict]) -> List[Partido]:
+        with transaction.atomic():
+            paises = self._bulk_paises(eventos)
+            ligas = self._bulk_ligas(eventos, paises)
+            temporadas = self._bulk_temporadas(eventos, ligas)
+            equipos = self._bulk_equipos(eventos, paises)
+
+            partidos = []
+            for evento in eventos:
+                torneo_data = evento.get('tournament', {})
+                liga_id = ligas.get(torneo_data.get('uniqueTournament', torneo_data).get('id'))
+                temporada_id = temporadas.get(evento.get('season', {}).get('id'))
+                local_id = equipos.get(evento.get('homeTeam', {}).get('id'))
+                visitante_id = equipos.get(evento.get('awayTeam', {}).get('id'))
+
+                if not (liga_id and temporada_id and local_id and visitante_id):
+                    logger.warning(f"  ⚠ Faltan liga/temporada/equipos para partido {evento['id']}")
+                    continue
+
+                ganador_id = {1: local_id, 2: visitante_id}.get(evento.get('winnerCode'))
+                partidos.append(Partido(
+                    sofascore_id=evento['id'],
+                    liga_id=liga_id,
+                    temporada_id=temporada_id,
+                    equipo_local_id=local_id,
+                    equipo_visitante_id=visitante_id,
+                    ganador_id=ganador_id,
+                    **self._campos_partido(evento)
+                ))
+
+            ids = [p.sofascore_id for p in partidos]
+            existentes = set(Partido.objects.filter(sofascore_id__in=ids).values_list('sofascore_id', flat=True))
+
+            campos = ['liga', 'temporada', 'equipo_local', 'equipo_visitante', 'fecha_actualizacion',
+                      *self._campos_partido(eventos[0]).keys()]
+            # Como en _crear_partido, sin winnerCode no se toca el ganador guardado
+            con_ganador = [p for p in partidos if p.ganador_id]
+            sin_ganador = [p for p in partidos if not p.ganador_id]
+            for lote, campos_lote in ((con_ganador, campos + ['ganador']), (sin_ganador, campos)):
+                if lote:
+                    Partido.objects.bulk_create(
+                        lote, update_conflicts=True, unique_fields=['sofascore_id'], update_fields=campos_lote
+                    )
+            self.stats['partidos'] += len(set(ids) - existentes)
+
+            return list(Partido.objects.filter(sofascore_id__in=ids).select_related(
+                'equipo_local', 'equipo_visitante'
+            ))
+
+    def _bulk_paises(self, eventos: List[Dict]) -> Dict[str, Pais]:
+        """Crear los países de los torneos que falten y devolver nombre -> Pais
+        (incluye los países de los equipos que ya existan)"""
+        datos = {}
+        nombres = set()
+        for evento in eventos:
+            pais_data = self._pais_de_torneo(evento.get('tournament', {}))
+            if pais_data and pais_data.get('name'):
+                datos.setdefault(pais_data['name'], pais_data)
+            for lado in ['homeTeam', 'awayTeam']:
+                if evento.get(lado, {}).get('country', {}).get('name'):
+                    nombres.add(evento[lado]['country']['name'])
+        nombres |= set(datos)
+
+        paises = {p.nombre: p for p in Pais.objects.filter(nombre__in=nombres)}
+        nuevos = [
+            Pais(
+                nombre=nombre,
+                sofascore_id=pais_data.get('id'),
+                codigo=pais_data.get('alpha2', ''),
+                alpha2=pais_data.get('alpha2', ''),
+                alpha3=pais_data.get('alpha3', ''),
+                bandera_url=pais_data.get('flag', '')
+            )
+            for nombre, pais_data in datos.items() if nombre not in paises
+        ]
+        if nuevos:
+            Pais.objects.bulk_create(nuevos)
+            self.stats['paises'] += len(nuevos)
+            paises = {p.nombre: p for p in Pais.objects.filter(nombre__in=nombres)}
+
+        return paises
+
+    def _bulk_ligas(self, eventos: List[Dict], paises: Dict[str, Pais]) -> Dict[int, int]:
+        """Upsert de las ligas de los eventos; devuelve sofascore_id -> id"""
+        ligas = {}
+        for evento in eventos:
+            torneo_data = evento.get('tournament', {})
+            liga_data = torneo_data.get('uniqueTournament', torneo_data)
+            if liga_data.get('id'):
+                pais_data = self._pais_de_torneo(torneo_data)
+                pais = paises.get(pais_data['name']) if pais_data else None
+                ligas[liga_data['id']] = Liga(sofascore_id=liga_data['id'], **self._campos_liga(liga_data, pais))
+
+        # nivel y prioridad se mantienen a mano: solo se actualiza lo que trae el payload
+        campos = [*self._campos_liga({}, None).keys(), 'fecha_actualizacion']
+        return self._upsert_por_sofascore_id(Liga, ligas, 'ligas', campos=campos)
+
+    def _bulk_temporadas(self, eventos: List[Dict], ligas: Dict[int, int]) -> Dict[int, int]:
+        """
+        Upsert de las temporadas de los eventos; devuelve sofascore_id -> id.
+        Igual que sync_temporada, una temporada nueva se asocia primero a la
+        que ya exista para la misma liga y año de inicio.
+        """
+        temporadas = {}
+        for evento in eventos:
+            season_data = evento.get('season', {})
+            torneo_data = evento.get('tournament', {})
+            liga_id = ligas.get(torneo_data.get('uniqueTournament', torneo_data).get('id'))
+            if not season_data.get('id') or not liga_id:
+                continue
+
+            nombre = season_data.get('name', season_data.get('year', ''))
+            anno_inicio, anno_fin = self._parsear_annos(nombre)
+            temporadas[season_data['id']] = Temporada(
+                sofascore_id=season_data['id'],
+                liga_id=liga_id,
+                nombre=nombre,
+                year=season_data.get('year', ''),
+                año_inicio=anno_inicio,
+                año_fin=anno_fin,
+                activa=True
+            )
+
+        # Temporadas sin sofascore_id conocido: buscar por liga y año
+        conocidas = set(Temporada.objects.filter(sofascore_id__in=temporadas).values_list('sofascore_id', flat=True))
+        faltantes = [t for t in temporadas.values() if t.sofascore_id not in conocidas]
+        reasignadas = []
+        if faltantes:
+            por_liga_anno = {
+                (t.liga_id, t.año_inicio): t
+                for t in Temporada.objects.filter(
+                    liga_id__in={t.liga_id for t in faltantes},
+                    año_inicio__in={t.año_inicio for t in faltantes}
+                )
+            }
+            for nueva in faltantes:
+                existente = por_liga_anno.pop((nueva.liga_id, nueva.año_inicio), None)
+                if existente:
+                    existente.sofascore_id = nueva.sofascore_id
+                    existente.nombre = nueva.nombre
+                    existente.year = nueva.year
+                    existente.año_fin = nueva.año_fin
+                    reasignadas.append(existente)
+                    del temporadas[nueva.sofascore_id]
+            if reasignadas:
+                Temporada.objects.bulk_update(reasignadas, ['sofascore_id', 'nombre', 'year', 'año_fin'])
+
+        ids = self._upsert_por_sofascore_id(
+            Temporada, temporadas, 'temporadas',
+            campos=['liga', 'nombre', 'year', 'año_inicio', 'año_fin', 'fecha_actualizacion']
+        )
+        ids.update({t.sofascore_id: t.id for t in reasignadas})
+        return ids
+
+    def _bulk_equipos(self, eventos: List[Dict], paises: Dict[str, Pais]) -> Dict[int, int]:
+        """Upsert de los equipos de los eventos; devuelve sofascore_id -> id"""
+        equipos = {}
+        for evento in eventos:
+            for lado in ['homeTeam', 'awayTeam']:
+                equipo_data = evento.get(lado, {})
+                if equipo_data.get('id'):
+                    pais = paises.get(equipo_data.get('country', {}).get('name'))
+                    equipos[equipo_data['id']] = Equipo(
+                        sofascore_id=equipo_data['id'], **self._campos_equipo(equipo_data, pais)
+                    )
+
+        # Colores y manager no vienen siempre: solo se rellenan al crear el equipo
+        return self._upsert_por_sofascore_id(
+            Equipo, equipos, 'equipos',
+            campos=['nombre', 'nombre_corto', 'slug', 'pais', 'logo_url', 'tipo', 'fecha_actualizacion']
+        )
+
+    def _upsert_por_sofascore_id(self, modelo, objetos: Dict, stat: str, campos: List[str]) -> Dict[int, int]:
+        """
+        bulk_create con update_conflicts sobre sofascore_id; devuelve sofascore_id -> id.
+        `campos` son los que se actualizan en las filas existentes: solo los que
+        vienen del payload, para no pisar lo que se mantiene a mano
+        """
+        if not objetos:
+            return {}
+
+        existentes = set(modelo.objects.filter(sofascore_id__in=objetos).values_list('sofascore_id', flat=True))
+        modelo.objects.bulk_create(
+            list(objetos.values()), update_conflicts=True, unique_fields=['sofascore_id'], update_fields=campos
+        )
+        self.stats[stat] += len(set(objetos) - existentes)
+
+        return dict(modelo.objects.filter(sofascore_id__in=objetos).values_list('sofascore_id', 'id'))
+
+    async def sync_partido(self, evento_data: Dict, con_detalles: bool = True) -> Optional[Partido]:
+        """Sincronizar un partido (con_detalles=False para pedir los detalles aparte)"""
         try:
             sofascore_id = evento_data.get('id')
             if not sofascore_id:
@@ -379,14 +728,7 @@ class SofascoreSyncManager:
             torneo_data = evento_data.get('tournament', {})
 
             # País y liga
-            pais = None
-            categoria = torneo_data.get('category', {})
-            if categoria.get('country'):
-                pais = await self.sync_pais(categoria['country'])
-            elif categoria.get('name'):
-                # Para torneos internacionales sin país específico
-                pais_data = {'name': categoria['name'], 'alpha2': categoria.get('alpha2', '')}
-                pais = await self.sync_pais(pais_data)
+            pais = await self.sync_pais(self._pais_de_torneo(torneo_data))
 
             liga = await self.sync_liga(torneo_data.get('uniqueTournament', torneo_data), pais)
             if not liga:
@@ -408,34 +750,14 @@ class SofascoreSyncManager:
                 logger.warning(f"  ⚠ No se pudieron crear equipos para partido {sofascore_id}")
                 return None
 
-            # Estado del partido
-            status = evento_data.get('status', {})
-            estado_map = {
-                'notstarted': 'notstarted',
-                'inprogress': 'inprogress',
-                'finished': 'finished',
-                'postponed': 'postponed',
-                'cancelled': 'cancelled',
-                'abandoned': 'abandoned',
-                'interrupted': 'interrupted',
-                'suspended': 'suspended'
-            }
-            estado = estado_map.get(status.get('type', 'notstarted'), 'notstarted')
-
-            # Fecha y hora
-            timestamp = evento_data.get('startTimestamp', 0)
-            fecha_hora = datetime.fromtimestamp(timestamp)
-            if timezone.is_naive(fecha_hora):
-                fecha_hora = timezone.make_aware(fecha_hora)
-
             # Crear partido
+            campos = self._campos_partido(evento_data)
             partido = await self._crear_partido(
-                sofascore_id, liga, temporada, equipo_local, equipo_visitante,
-                fecha_hora, timestamp, evento_data, estado, status
+                sofascore_id, liga, temporada, equipo_local, equipo_visitante, campos, evento_data
             )
 
             # Sincronizar detalles si está finalizado o en progreso
-            if estado in ['finished', 'inprogress'] and partido:
+            if con_detalles and campos['estado'] in ['finished', 'inprogress'] and partido:
                 await self.sync_detalles_partido(sofascore_id, partido)
 
             return partido
@@ -445,20 +767,33 @@ class SofascoreSyncManager:
             self.errores.append(f"Partido {evento_data.get('id')}: {e}")
             return None
 
-    @sync_to_async
-    def _crear_partido(self, sofascore_id, liga, temporada, equipo_local,
-                       equipo_visitante, fecha_hora, timestamp, evento_data, estado, status):
-        """Crear o actualizar partido en la BD"""
+    def _pais_de_torneo(self, torneo_data: Dict) -> Optional[Dict]:
+        """Datos del país de un torneo (o de su categoría si es internacional)"""
+        categoria = torneo_data.get('category', {})
+        if categoria.get('country'):
+            return categoria['country']
+        elif categoria.get('name'):
+            # Para torneos internacionales sin país específico
+            return {'name': categoria['name'], 'alpha2': categoria.get('alpha2', '')}
+        return None
+
+    def _campos_partido(self, evento_data: Dict) -> Dict:
+        """Campos propios del partido (sin relaciones) a partir del evento"""
+        # Estado del partido
+        status = evento_data.get('status', {})
+        estado = estado_partido(status)
+
+        # Fecha y hora
+        timestamp = evento_data.get('startTimestamp', 0)
+        fecha_hora = datetime.fromtimestamp(timestamp)
+        if timezone.is_naive(fecha_hora):
+            fecha_hora = timezone.make_aware(fecha_hora)
 
         # Marcadores
         home_score = evento_data.get('homeScore', {})
         away_score = evento_data.get('awayScore', {})
 
-        defaults = {
-            'liga': liga,
-            'temporada': temporada,
-            'equipo_local': equipo_local,
-            'equipo_visitante': equipo_visitante,
+        return {
             'fecha_hora': fecha_hora,
             'fecha_hora_timestamp': timestamp,
             'custom_id': evento_data.get('customId', ''),
@@ -473,6 +808,18 @@ class SofascoreSyncManager:
             'ronda': evento_data.get('roundInfo', {}).get('name', ''),
         }
 
+    @en_escritor
+    def _crear_partido(self, sofascore_id, liga, temporada, equipo_local,
+                       equipo_visitante, campos, evento_data):
+        """Crear o actualizar partido en la BD"""
+        defaults = {
+            'liga': liga,
+            'temporada': temporada,
+            'equipo_local': equipo_local,
+            'equipo_visitante': equipo_visitante,
+            **campos,
+        }
+
         # Información adicional si está disponible
         if evento_data.get('winnerCode'):
             if evento_data['winnerCode'] == 1:
@@ -491,57 +838,99 @@ class SofascoreSyncManager:
 
         return partido
 
-    async def sync_detalles_partido(self, event_id: int, partido: Partido):
-        """Sincronizar detalles del partido (estadísticas, eventos, alineaciones)"""
+    async def sync_detalles_partido(self, event_id: int, partido: Partido) -> bool:
+        """
+        Sincronizar detalles del partido (estadísticas, eventos, alineaciones).
+        Si ya son definitivos no se piden, salvo con forzar. Devuelve True si
+        quedaron guardados (o no hacía falta pedirlos) y False si falló alguna
+        petición o la escritura: el partido no se puede dar por sincronizado
+        """
+        if partido.detalles_finales and not self.forzar:
+            self.stats['detalles_omitidos'] += 1
+            return True
+
+        # Las tres peticiones en paralelo y después una sola escritura atómica
+        respuestas = await asyncio.gather(
+            self._pedir_detalle(self.api.get_partido_estadisticas, event_id, 'estadísticas'),
+            self._pedir_detalle(self.api.get_partido_incidentes, event_id, 'incidentes'),
+            self._pedir_detalle(self.api.get_partido_lineups, event_id, 'alineaciones'),
+            return_exceptions=True
+        )
+        fallos = [r for r in respuestas if isinstance(r, Exception)]
+        for fallo in fallos:
+            logger.warning(f"  ⚠ Error en detalles del partido {event_id}: {fallo}")
+
+        # Lo que llegó se guarda, pero con peticiones fallidas no se dan por definitivos
+        detalles = [None if isinstance(r, Exception) else r for r in respuestas]
+        guardado = await self._guardar_detalles(partido, *detalles, marcar_finales=not fallos)
+        return guardado and not fallos
+
+    async def _pedir_detalle(self, pedir, event_id: int, nombre: str) -> Optional[Dict]:
+        """
+        Respuesta de un endpoint de detalles, o None si Sofascore no la tiene
+        (404). Los demás errores se propagan: el detalle no se pudo comprobar
+        """
         try:
-            # Sincronizar en paralelo para mayor eficiencia
-            await asyncio.gather(
-                self.sync_estadisticas_partido(event_id, partido),
-                self.sync_eventos_partido(event_id, partido),
-                self.sync_alineaciones_partido(event_id, partido),
-                return_exceptions=True
-            )
-
-            # Actualizar flags
-            await self._actualizar_flags_partido(partido)
+            return await pedir(event_id)
+        except SofascoreAPIError as e:
+            if e.status != 404:
+                raise
+            logger.debug(f"    ⚠ No hay {nombre} disponibles: {e}")
+            return None
 
+    async def _sync_un_detalle(self, event_id: int, partido: Partido, detalle: str, pedir) -> bool:
+        """Pedir y guardar un solo detalle (estadisticas, incidentes o alineaciones)"""
+        try:
+            data = await self._pedir_detalle(pedir, event_id, detalle)
+        except Exception as e:
+            logger.warning(f"  ⚠ Error pidiendo {detalle} del partido {event_id}: {e}")
+            return False
+        return data is None or await self._guardar_detalles(partido, **{detalle: data})
+
+    @en_escritor
+    def _guardar_detalles(self, partido: Partido, estadisticas: Dict = None, incidentes: Dict = None,
+                          alineaciones: Dict = None, marcar_finales: bool = True) -> bool:
+        """
+        Escribir los detalles de un partido como una unidad (ver guardar_detalles).
+        Devuelve False si la escritura falló.
+        """
+        try:
+            guardado = guardar_detalles(partido, self._escribir_estadisticas, estadisticas, incidentes,
+                                        alineaciones, marcar_finales, self.forzar)
         except Exception as e:
-            logger.warning(f"  ⚠ Error en detalles del partido {event_id}: {e}")
+            logger.warning(f"  ⚠ Error guardando los detalles del partido {partido.sofascore_id}: {e}")
+            return False
 
-    @sync_to_async
-    def _actualizar_flags_partido(self, partido: Partido):
-        """Actualizar flags de información disponible"""
-        partido.tiene_estadisticas = partido.estadisticas.exists()
-        partido.tiene_incidentes = partido.eventos.exists()
-        partido.tiene_lineups = partido.alineaciones.exists()
-        partido.save(update_fields=['tiene_estadisticas', 'tiene_incidentes', 'tiene_lineups'])
+        self.stats['detalles_sin_cambios'] += guardado.sin_cambios
+        self.stats['estadisticas'] += 'estadisticas' in guardado.escritos
+        self.stats['eventos'] += guardado.eventos
+        self.stats['alineaciones'] += guardado.alineaciones
+        self.stats['jugadores'] += guardado.jugadores
+        return True
 
-    async def sync_estadisticas_partido(self, event_id: int, partido: Partido):
+    async def sync_estadisticas_partido(self, event_id: int, partido: Partido) -> bool:
         """Sincronizar estadísticas del partido"""
-        try:
-            data = await self.api.get_partido_estadisticas(event_id)
+        return await self._sync_un_detalle(event_id, partido, 'estadisticas', self.api.get_partido_estadisticas)
 
-            for grupo in data.get('statistics', []):
-                periodo = self._mapear_periodo(grupo.get('period', 'ALL'))
+    def _escribir_estadisticas(self, partido: Partido, data: Dict) -> bool:
+        for grupo in data.get('statistics', []):
+            periodo = self._mapear_periodo(grupo.get('period', 'ALL'))
 
-                # Extraer estadísticas
-                stats_items = {}
-                for group in grupo.get('groups', []):
-                    for stat in group.get('statisticsItems', []):
-                        nombre = stat.get('name')
-                        stats_items[nombre] = {
-                            'home': stat.get('home'),
-                            'away': stat.get('away'),
-                            'homeTotal': stat.get('homeTotal'),
-                            'awayTotal': stat.get('awayTotal'),
-                        }
+            # Extraer estadísticas
+            stats_items = {}
+            for group in grupo.get('groups', []):
+                for stat in group.get('statisticsItems', []):
+                    nombre = stat.get('name')
+                    stats_items[nombre] = {
+                        'home': stat.get('home'),
+                        'away': stat.get('away'),
+                        'homeTotal': stat.get('homeTotal'),
+                        'awayTotal': stat.get('awayTotal'),
+                    }
 
-                await self._crear_estadistica(partido, periodo, stats_items)
+            self._crear_estadistica(partido, periodo, stats_items)
 
-            self.stats['estadisticas'] += 1
-
-        except Exception as e:
-            logger.debug(f"    ⚠ No hay estadísticas disponibles: {e}")
+        return bool(data.get('statistics'))
 
     def _mapear_periodo(self, periodo_str: str) -> str:
         """Mapear período de Sofascore a modelo"""
@@ -556,7 +945,6 @@ class SofascoreSyncManager:
         }
         return mapeo.get(periodo_str, 'ALL')
 
-    @sync_to_async
     def _crear_estadistica(self, partido: Partido, periodo: str, stats: Dict):
         """Crear o actualizar estadística en BD"""
         defaults = {
@@ -592,144 +980,25 @@ class SofascoreSyncManager:
             defaults=defaults
         )
 
-    async def sync_eventos_partido(self, event_id: int, partido: Partido):
+    async def sync_eventos_partido(self, event_id: int, partido: Partido) -> bool:
         """Sincronizar eventos del partido"""
-        try:
-            data = await self.api.get_partido_incidentes(event_id)
-            incidents = data.get('incidents', [])
-            await self._crear_eventos(partido, incidents)
-            self.stats['eventos'] += len(incidents)
-        except Exception as e:
-            logger.debug(f"    ⚠ No hay incidentes disponibles: {e}")
-
-    @sync_to_async
-    def _crear_eventos(self, partido: Partido, incidents: List[Dict]):
-        """Crear eventos en BD"""
-        # Limpiar eventos anteriores
-        EventoPartido.objects.filter(partido=partido).delete()
-
-        tipo_map = {
-            'goal': 'goal',
-            'yellowCard': 'yellow_card',
-            'redCard': 'red_card',
-            'yellowRedCard': 'yellow_red_card',
-            'substitution': 'substitution',
-            'penalty': 'penalty',
-            'penaltyMissed': 'penalty_missed',
-            'ownGoal': 'own_goal',
-            'varDecision': 'var',
-            'injuryTime': 'injury',
-            'period': 'period',
-        }
+        return await self._sync_un_detalle(event_id, partido, 'incidentes', self.api.get_partido_incidentes)
 
-        eventos_crear = []
-        for incidente in incidents:
-            tipo_sofascore = incidente.get('incidentType', '')
-            tipo = tipo_map.get(tipo_sofascore, 'goal')
-
-            # Buscar jugador
-            jugador = None
-            jugador_relacionado = None
-
-            if incidente.get('player'):
-                try:
-                    jugador = Jugador.objects.get(sofascore_id=incidente['player']['id'])
-                except Jugador.DoesNotExist:
-                    pass
-
-            if incidente.get('assist1'):
-                try:
-                    jugador_relacionado = Jugador.objects.get(sofascore_id=incidente['assist1']['id'])
-                except Jugador.DoesNotExist:
-                    pass
-
-            evento = EventoPartido(
-                sofascore_id=incidente.get('id'),
-                partido=partido,
-                jugador=jugador,
-                jugador_relacionado=jugador_relacionado,
-                minuto=incidente.get('time', 0),
-                minuto_adicional=incidente.get('addedTime'),
-                segundo=incidente.get('second'),
-                tipo=tipo,
-                texto_incidente=incidente.get('text', ''),
-                es_local=incidente.get('isHome', True),
-                datos_adicionales=incidente
-            )
-            eventos_crear.append(evento)
-
-        # Crear todos los eventos de una vez
-        if eventos_crear:
-            EventoPartido.objects.bulk_create(eventos_crear, ignore_conflicts=True)
-
-    async def sync_alineaciones_partido(self, event_id: int, partido: Partido):
+    async def sync_alineaciones_partido(self, event_id: int, partido: Partido) -> bool:
         """Sincronizar alineaciones del partido"""
-        try:
-            data = await self.api.get_partido_lineups(event_id)
-            await self._limpiar_alineaciones(partido)
-
-            if data.get('home'):
-                await self._sync_alineacion_equipo(
-                    data['home'], partido, partido.equipo_local, True
-                )
-
-            if data.get('away'):
-                await self._sync_alineacion_equipo(
-                    data['away'], partido, partido.equipo_visitante, False
-                )
-
-        except Exception as e:
-            logger.debug(f"    ⚠ No hay alineaciones disponibles: {e}")
-
-    @sync_to_async
-    def _limpiar_alineaciones(self, partido: Partido):
-        """Limpiar alineaciones anteriores"""
-        Alineacion.objects.filter(partido=partido).delete()
-
-    @sync_to_async
-    def _sync_alineacion_equipo(self, data: Dict, partido: Partido, equipo: Equipo, es_local: bool):
-        """Sincronizar alineación de un equipo"""
-        alineaciones_crear = []
-
-        for player_data in data.get('players', []):
-            player_info = player_data.get('player', {})
-            try:
-                jugador = Jugador.objects.get(sofascore_id=player_info['id'])
-
-                # Estadísticas del jugador
-                stats = player_data.get('statistics', {})
-
-                alineacion = Alineacion(
-                    partido=partido,
-                    jugador=jugador,
-                    es_local=es_local,
-                    es_titular=player_data.get('substitute', False) == False,
-                    posicion=player_info.get('position', ''),
-                    numero_camiseta=player_info.get('shirtNumber'),
-                    rating=stats.get('rating'),
-                    minutos_jugados=stats.get('minutesPlayed', 0),
-                    goles=stats.get('goals', 0),
-                    asistencias=stats.get('assists', 0),
-                    tarjetas_amarillas=stats.get('yellowCards', 0),
-                    tarjetas_rojas=stats.get('redCards', 0),
-                    estadisticas_detalladas=stats
-                )
-                alineaciones_crear.append(alineacion)
-
-            except Jugador.DoesNotExist:
-                logger.debug(f"      Jugador {player_info.get('id')} no encontrado")
-                continue
-
-        if alineaciones_crear:
-            Alineacion.objects.bulk_create(alineaciones_crear, ignore_conflicts=True)
-            self.stats['alineaciones'] += len(alineaciones_crear)
+        return await self._sync_un_detalle(event_id, partido, 'alineaciones', self.api.get_partido_lineups)
 
     # ============================================
     # MÉTODOS DE SINCRONIZACIÓN MASIVA
     # ============================================
 
-    async def sync_liga_completa(self, tournament_id: int, season_id: int, max_partidos: int = None):
-        """Sincronizar liga completa con límite opcional de partidos"""
+    async def sync_liga_completa(self, tournament_id: int, season_id: int, max_partidos: int = None,
+                                 incremental: bool = True):
+        """
+        Sincronizar liga completa con límite opcional de partidos. En modo
+        incremental solo se sincronizan los partidos nuevos, en juego o
+        recién finalizados desde la última ejecución (ver EstadoSincronizacion)
+        """
         try:
             logger.info(f"\n🏆 Sincronizando liga {tournament_id}, temporada {season_id}...")
 
@@ -740,27 +1009,41 @@ class SofascoreSyncManager:
             # Obtener información de la temporada
             season_data = await self.api.get_info_temporada_info(tournament_id, season_id)
             temporada = await self.sync_temporada(season_data.get('info', {}).get('season', {}), liga)
+            estado = await self.estado_sincronizacion(temporada) if incremental and temporada else None
 
-            # Sincronizar equipos de la temporada
-            await self.sync_equipos_temporada(tournament_id, season_id)
+            # Sincronizar equipos de la temporada (en incremental, solo la primera vez)
+            if estado is None or estado.ultima_sincronizacion is None:
+                await self.sync_equipos_temporada(tournament_id, season_id)
 
             # Obtener partidos
-            partidos_data = await self.api.get_torneo_partidos(tournament_id, season_id)
-            eventos = partidos_data.get('events', [])
+            if estado:
+                eventos = await self.eventos_incrementales(
+                    estado, await self.listar_partidos_temporada(tournament_id, season_id)
+                )
+            else:
+                partidos_data = await self.api.get_torneo_partidos(tournament_id, season_id)
+                eventos = partidos_data.get('events', [])
 
             if max_partidos:
                 eventos = eventos[:max_partidos]
 
             logger.info(f"📊 Encontrados {len(eventos)} partidos")
 
-            # Sincronizar partidos con barra de progreso
-            for i, evento in enumerate(eventos, 1):
-                logger.info(f"  [{i}/{len(eventos)}] ", end='')
-                await self.sync_partido(evento)
-
-                # Pausa cada 10 partidos para no sobrecargar
-                if i % 10 == 0:
-                    await asyncio.sleep(1)
+            async def sincronizar_evento(evento):
+                # Los detalles se piden aparte para saber si llegaron: un partido
+                # con detalles fallidos no está hecho y la marca de agua no lo salta
+                partido = await self.sync_partido(evento, con_detalles=False)
+                if partido and partido.estado in ['finished', 'inprogress']:
+                    if not await self.sync_detalles_partido(partido.sofascore_id, partido):
+                        return None
+                return partido
+
+            # Sincronizar partidos en paralelo
+            partidos = await self.procesar_en_paralelo(eventos, sincronizar_evento)
+            if estado:
+                # La marca de agua solo avanza con los partidos ya en disco (lanza si se perdió un lote)
+                await confirmar_escrituras()
+                await self.guardar_estado_sincronizacion(estado, eventos, partidos)
 
             logger.info(f"✅ Liga sincronizada: {liga.nombre}")
 
@@ -770,6 +1053,105 @@ class SofascoreSyncManager:
             traceback.print_exc()
             self.errores.append(f"Liga {tournament_id}: {e}")
 
+    # ============================================
+    # SINCRONIZACIÓN INCREMENTAL
+    # ============================================
+
+    @en_escritor
+    def estado_sincronizacion(self, temporada: Temporada) -> EstadoSincronizacion:
+        """Marca de agua de la temporada (se crea vacía la primera vez)"""
+        estado, _ = EstadoSincronizacion.objects.get_or_create(temporada=temporada)
+        return estado
+
+    async def listar_partidos_temporada(self, tournament_id: int, season_id: int) -> List[Dict]:
+        """Últimos y próximos partidos de la temporada (dos peticiones a la vez)"""
+        ultimos, proximos = await asyncio.gather(
+            self.api.get_torneo_partidos(tournament_id, season_id),
+            self.api.get_torneo_proximos_partidos(tournament_id, season_id),
+            return_exceptions=True
+        )
+        if isinstance(ultimos, Exception):
+            raise ultimos
+
+        # Copia: las respuestas se comparten entre peticiones coalescidas
+        eventos = list(ultimos.get('events', []))
+        if not isinstance(proximos, Exception):
+            eventos.extend(proximos.get('events', []))
+        return eventos
+
+    async def eventos_incrementales(self, estado: EstadoSincronizacion, eventos: List[Dict]) -> List[Dict]:
+        """
+        Quedarse con los eventos que pueden haber cambiado y pedir uno a uno
+        los pendientes que ya no salen en las listas (p. ej. un partido
+        aplazado que acabó jugándose fuera de la última página)
+        """
+        seleccion = estado.a_sincronizar(eventos)
+
+        perdidos = estado.pendientes_sin_noticias({e.get('id') for e in eventos}, int(time.time()))
+        respuestas = await asyncio.gather(
+            *(self.api.get_partido_detalles(event_id) for event_id in perdidos), return_exceptions=True
+        )
+        for event_id, respuesta in zip(perdidos, respuestas):
+            if isinstance(respuesta, SofascoreAPIError) and respuesta.status == 404:
+                # Ya no existe en Sofascore: no se vuelve a preguntar
+                estado.pendientes.pop(str(event_id), None)
+            elif isinstance(respuesta, dict) and respuesta.get('event'):
+                seleccion.append(respuesta['event'])
+
+        # Los finalizados en orden: si se corta con max_partidos la marca de agua no salta ninguno
+        seleccion.sort(key=lambda e: e.get('startTimestamp') or 0)
+        logger.info(f"🔁 Incremental: {len(seleccion)} de {len(eventos)} partidos listados "
+                    f"({len(perdidos)} pendientes consultados aparte)")
+        return seleccion
+
+    @en_escritor
+    def guardar_estado_sincronizacion(self, estado: EstadoSincronizacion, eventos: List[Dict],
+                                      partidos: List, plantillas: bool = False):
+        """Guardar la marca de agua tras procesar `eventos` (`partidos`: los sincronizados del todo)"""
+        estado.registrar(eventos, {p.sofascore_id for p in partidos if isinstance(p, Partido)})
+        if plantillas:
+            estado.plantillas_sincronizadas = timezone.now()
+        estado.save()
+
+    async def procesar_en_paralelo(self, items: List, funcion, workers: int = None) -> List:
+        """
+        Pipeline productor/consumidor: el productor llena una cola acotada y
+        N workers la vacían. La cola frena al productor y el limitador de
+        SofascoreAPI frena a los workers cuando se agota el presupuesto de
+        peticiones. Devuelve los resultados en el mismo orden que los items.
+        """
+        workers = workers or self.workers
+        cola = asyncio.Queue(maxsize=workers * 2)
+        resultados = [None] * len(items)
+        procesados = 0
+
+        async def productor():
+            for i, item in enumerate(items):
+                await cola.put((i, item))
+            for _ in range(workers):
+                await cola.put(None)
+
+        async def worker():
+            nonlocal procesados
+            while True:
+                tarea = await cola.get()
+                if tarea is None:
+                    return
+
+                i, item = tarea
+                try:
+                    resultados[i] = await funcion(item)
+                except Exception as e:
+                    logger.error(f"  ✗ Error procesando item {i}: {e}")
+                    self.errores.append(f"Item {i}: {e}")
+
+                procesados += 1
+                if procesados % 20 == 0:
+                    logger.info(f"  Progreso: {procesados}/{len(items)}")
+
+        await asyncio.gather(productor(), *(worker() for _ in range(workers)))
+        return resultados
+
     async def sync_equipos_temporada(self, tournament_id: int, season_id: int):
         """Sincronizar todos los equipos de una temporada"""
         try:
@@ -793,7 +1175,6 @@ class SofascoreSyncManager:
         while fecha_actual <= fecha_fin:
             await self.sync_partidos_fecha(fecha_actual)
             fecha_actual += timedelta(days=1)
-            await asyncio.sleep(1)  # Pausa entre días
 
     # ============================================
     # MÉTODOS AUXILIARES
@@ -833,6 +1214,11 @@ class SofascoreSyncManager:
             if len(self.errores) > 10:
                 print(f"  ... y {len(self.errores) - 10} errores más")
 
+        if self.api.cache:
+            cache = self.api.cache.estadisticas()
+            print(f"\n  Caché: {cache['aciertos']} aciertos / {cache['fallos']} fallos "
+                  f"({cache['entradas']} entradas, {cache['tamano_mb']} MB)")
+
         print("=" * 60)
 
 
@@ -840,9 +1226,9 @@ class SofascoreSyncManager:
 # FUNCIONES PRINCIPALES DE SINCRONIZACIÓN
 # ============================================
 
-async def sync_partidos_hoy():
+async def sync_partidos_hoy(forzar: bool = False):
     """Sincronizar partidos de hoy"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         await manager.sync_partidos_fecha(datetime.now())
         manager.print_stats()
@@ -850,9 +1236,9 @@ async def sync_partidos_hoy():
         await manager.close()
 
 
-async def sync_partidos_ayer():
+async def sync_partidos_ayer(forzar: bool = False):
     """Sincronizar partidos de ayer"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         ayer = datetime.now() - timedelta(days=1)
         await manager.sync_partidos_fecha(ayer)
@@ -861,9 +1247,9 @@ async def sync_partidos_ayer():
         await manager.close()
 
 
-async def sync_liga_espanola(max_partidos: int = None):
+async def sync_liga_espanola(max_partidos: int = None, forzar: bool = False):
     """Sincronizar La Liga Española"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # La Liga - Temporada 2024/25
         await manager.sync_liga_completa(8, 61643, max_partidos)
@@ -872,9 +1258,9 @@ async def sync_liga_espanola(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_premier_league(max_partidos: int = None):
+async def sync_premier_league(max_partidos: int = None, forzar: bool = False):
     """Sincronizar Premier League"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # Premier League - Temporada 2024/25
         await manager.sync_liga_completa(17, 61627, max_partidos)
@@ -883,9 +1269,9 @@ async def sync_premier_league(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_champions_league(max_partidos: int = None):
+async def sync_champions_league(max_partidos: int = None, forzar: bool = False):
     """Sincronizar Champions League"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # Champions League - Temporada 2024/25
         await manager.sync_liga_completa(7, 52162, max_partidos)
@@ -894,9 +1280,9 @@ async def sync_champions_league(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_serie_a(max_partidos: int = None):
+async def sync_serie_a(max_partidos: int = None, forzar: bool = False):
     """Sincronizar Serie A de Italia"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # Serie A - Temporada 2024/25
         await manager.sync_liga_completa(23, 61644, max_partidos)
@@ -905,9 +1291,9 @@ async def sync_serie_a(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_bundesliga(max_partidos: int = None):
+async def sync_bundesliga(max_partidos: int = None, forzar: bool = False):
     """Sincronizar Bundesliga Alemana"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # Bundesliga - Temporada 2024/25
         await manager.sync_liga_completa(35, 61628, max_partidos)
@@ -916,9 +1302,9 @@ async def sync_bundesliga(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_ligue1(max_partidos: int = None):
+async def sync_ligue1(max_partidos: int = None, forzar: bool = False):
     """Sincronizar Ligue 1 Francesa"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         # Ligue 1 - Temporada 2024/25
         await manager.sync_liga_completa(34, 61645, max_partidos)
@@ -927,9 +1313,9 @@ async def sync_ligue1(max_partidos: int = None):
         await manager.close()
 
 
-async def sync_ultima_semana():
+async def sync_ultima_semana(forzar: bool = False):
     """Sincronizar última semana de partidos"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         hoy = datetime.now()
         hace_semana = hoy - timedelta(days=7)
@@ -939,9 +1325,9 @@ async def sync_ultima_semana():
         await manager.close()
 
 
-async def sync_top5_ligas(max_partidos: int = 50):
+async def sync_top5_ligas(max_partidos: int = 50, forzar: bool = False):
     """Sincronizar las 5 grandes ligas europeas"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         logger.info("\n🌍 Sincronizando TOP 5 Ligas Europeas...")
 
@@ -958,16 +1344,15 @@ async def sync_top5_ligas(max_partidos: int = 50):
             logger.info(f"Sincronizando {nombre}...")
             logger.info(f"{'='*60}")
             await manager.sync_liga_completa(tournament_id, season_id, max_partidos)
-            await asyncio.sleep(2)  # Pausa entre ligas
 
         manager.print_stats()
     finally:
         await manager.close()
 
 
-async def sync_equipo_especifico(team_id: int):
+async def sync_equipo_especifico(team_id: int, forzar: bool = False):
     """Sincronizar un equipo específico con todos sus datos"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         logger.info(f"\n👕 Sincronizando equipo {team_id}...")
         await manager.sync_equipo_completo(team_id)
@@ -976,9 +1361,9 @@ async def sync_equipo_especifico(team_id: int):
         await manager.close()
 
 
-async def sync_partido_especifico(event_id: int):
+async def sync_partido_especifico(event_id: int, forzar: bool = False):
     """Sincronizar un partido específico con todos sus detalles"""
-    manager = SofascoreSyncManager()
+    manager = SofascoreSyncManager(forzar=forzar)
     try:
         logger.info(f"\n⚽ Sincronizando partido {event_id}...")
 
@@ -1026,64 +1411,64 @@ def mostrar_menu():
     print("\n" + "=" * 60)
 
 
-async def ejecutar_opcion(opcion: str):
-    """Ejecutar la opción seleccionada"""
+async def ejecutar_opcion(opcion: str, forzar: bool = False):
+    """Ejecutar la opción seleccionada (forzar: volver a pedir los detalles definitivos)"""
 
     if opcion == '1':
-        await sync_partidos_hoy()
+        await sync_partidos_hoy(forzar=forzar)
 
     elif opcion == '2':
-        await sync_partidos_ayer()
+        await sync_partidos_ayer(forzar=forzar)
 
     elif opcion == '3':
-        await sync_ultima_semana()
+        await sync_ultima_semana(forzar=forzar)
 
     elif opcion == '4':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_liga_espanola(max_partidos)
+        await sync_liga_espanola(max_partidos, forzar=forzar)
 
     elif opcion == '5':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_premier_league(max_partidos)
+        await sync_premier_league(max_partidos, forzar=forzar)
 
     elif opcion == '6':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_champions_league(max_partidos)
+        await sync_champions_league(max_partidos, forzar=forzar)
 
     elif opcion == '7':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_serie_a(max_partidos)
+        await sync_serie_a(max_partidos, forzar=forzar)
 
     elif opcion == '8':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_bundesliga(max_partidos)
+        await sync_bundesliga(max_partidos, forzar=forzar)
 
     elif opcion == '9':
         max_partidos = input("¿Límite de partidos? (Enter para todos): ").strip()
         max_partidos = int(max_partidos) if max_partidos else None
-        await sync_ligue1(max_partidos)
+        await sync_ligue1(max_partidos, forzar=forzar)
 
     elif opcion == '10':
         max_partidos = input("¿Partidos por liga? (default 50): ").strip()
         max_partidos = int(max_partidos) if max_partidos else 50
-        await sync_top5_ligas(max_partidos)
+        await sync_top5_ligas(max_partidos, forzar=forzar)
 
     elif opcion == '11':
         team_id = input("ID del equipo: ").strip()
         if team_id.isdigit():
-            await sync_equipo_especifico(int(team_id))
+            await sync_equipo_especifico(int(team_id), forzar=forzar)
         else:
             print("❌ ID inválido")
 
     elif opcion == '12':
         event_id = input("ID del partido: ").strip()
         if event_id.isdigit():
-            await sync_partido_especifico(int(event_id))
+            await sync_partido_especifico(int(event_id), forzar=forzar)
         else:
             print("❌ ID inválido")
 
@@ -1097,13 +1482,13 @@ async def ejecutar_opcion(opcion: str):
     return True
 
 
-async def main():
+async def main(forzar: bool = False):
     """Función principal con menú interactivo"""
     while True:
         mostrar_menu()
         opcion = input("Selecciona una opción: ").strip()
 
-        continuar = await ejecutar_opcion(opcion)
+        continuar = await ejecutar_opcion(opcion, forzar)
         if not continuar:
             break
 
@@ -1114,11 +1499,20 @@ async def main():
 # EJECUCIÓN DIRECTA
 # ============================================
 
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', action='store_true',
+                        help="volver a pedir los detalles que ya son definitivos")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
+    args = parsear_argumentos()
+
     # Puedes ejecutar funciones específicas directamente:
 
     # Para menú interactivo:
-    asyncio.run(main())
+    asyncio.run(ejecutar_con_pool(main(forzar=args.force)))
 
     # O descomentar alguna de estas para ejecución directa:
     # asyncio.run(sync_partidos_hoy())
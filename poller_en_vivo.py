@@ -0,0 +1,220 @@
+"""
+Poller de partidos en vivo
+Uso: python poller_en_vivo.py [--intervalo-minimo 5] [--intervalo-maximo 60] [--ciclos N]
+
+Pide /sport/football/events/live en bucle y compara cada evento con la
+foto en memoria de la vuelta anterior:
+
+- solo escribe los campos que cambiaron (marcador, estado, minuto) con un
+  update() por partido, sin pasar por save() ni por el resto del modelo
+- solo pide los incidentes de los partidos cuyo marcador cambió
+- un partido que no existe en la BD se crea una vez con sync_partido
+- un partido que sale de la lista se consulta una última vez con
+  /event/{id} y, si terminó, se le piden los detalles finales
+
+El intervalo es adaptativo: vuelve al mínimo cuando hay cambios, crece
+x1.5 en cada vuelta sin cambios y se queda en el máximo si no hay partidos
+en vivo. El minuto avanza solo con el reloj: se escribe, pero no cuenta como
+cambio. Se para con Ctrl-C o SIGTERM.
+
+El poller va sin caché de respuestas: /events/live y los incidentes tienen
+que llegar frescos en cada vuelta.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Dict, List
+
+import django
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+django.setup()
+
+from django.utils import timezone
+
+from poblar_bd_sofascore import SofascoreSyncManager
+from futbol.escritor import en_escritor
+from futbol.ingesta import CAMPOS_EN_VIVO, campos_en_vivo
+from futbol.models import Partido
+from futbol.pool_navegador import ejecutar_con_pool
+from futbol.sofascore_api import SofascoreAPI
+
+INTERVALO_MINIMO = float(os.environ.get('SOFASCORE_VIVO_MINIMO', 5))
+INTERVALO_MAXIMO = float(os.environ.get('SOFASCORE_VIVO_MAXIMO', 60))
+CRECIMIENTO = 1.5
+
+logger = logging.getLogger(__name__)
+
+
+class PollerEnVivo:
+    """Mantiene al día los partidos en vivo con el mínimo de peticiones y escrituras"""
+
+    def __init__(self, manager: SofascoreSyncManager = None, intervalo_minimo: float = INTERVALO_MINIMO,
+                 intervalo_maximo: float = INTERVALO_MAXIMO, deporte: str = 'football'):
+        self.manager = manager or SofascoreSyncManager(api=SofascoreAPI(cache=False))
+        self.api = self.manager.api
+        self.intervalo_minimo = intervalo_minimo
+        self.intervalo_maximo = intervalo_maximo
+        self.intervalo = intervalo_minimo
+        self.deporte = deporte
+
+        # sofascore_id -> valores de CAMPOS_EN_VIVO escritos en la BD
+        self.foto: Dict[int, Dict] = {}
+        self.stats = {
+            'vueltas': 0,
+            'partidos_creados': 0,
+            'partidos_actualizados': 0,
+            'campos_escritos': 0,
+            'incidentes_pedidos': 0,
+            'partidos_terminados': 0,
+        }
+
+    async def close(self):
+        await self.manager.close()
+
+    # ============================================
+    # BD
+    # ============================================
+
+    @en_escritor
+    def _cargar_foto(self, ids: List[int]) -> Dict[int, Dict]:
+        """Valores actuales en la BD de los partidos que aún no están en la foto"""
+        filas = Partido.objects.filter(sofascore_id__in=ids).values('sofascore_id', *CAMPOS_EN_VIVO)
+        return {fila.pop('sofascore_id'): fila for fila in filas}
+
+    @en_escritor
+    def _actualizar(self, sofascore_id: int, cambios: Dict):
+        Partido.objects.filter(sofascore_id=sofascore_id).update(**cambios, fecha_actualizacion=timezone.now())
+
+    @en_escritor
+    def _partido(self, sofascore_id: int) -> Partido:
+        return Partido.objects.get(sofascore_id=sofascore_id)
+
+    # ============================================
+    # VUELTA
+    # ============================================
+
+    async def vuelta(self) -> int:
+        """Una consulta a /events/live; devuelve cuántos partidos cambiaron"""
+        self.stats['vueltas'] += 1
+        data = await self.api.get_partidos_en_vivo(self.deporte)
+        eventos = {e['id']: e for e in data.get('events', []) if e.get('id')}
+        ahora = time.time()
+
+        nuevos = [event_id for event_id in eventos if event_id not in self.foto]
+        if nuevos:
+            self.foto.update(await self._cargar_foto(nuevos))
+
+        cambiados = 0
+        for event_id, evento in eventos.items():
+            if event_id not in self.foto:
+                # No está en la BD: se crea entero una vez (con liga, equipos y detalles)
+                partido = await self.manager.sync_partido(evento)
+                if partido:
+                    self.foto[event_id] = campos_en_vivo(evento, ahora)
+                    self.stats['partidos_creados'] += 1
+                    cambiados += 1
+                continue
+
+            actual = campos_en_vivo(evento, ahora)
+            anterior = self.foto[event_id]
+            cambios = {campo: valor for campo, valor in actual.items() if anterior.get(campo) != valor}
+            if not cambios:
+                continue
+
+            await self._actualizar(event_id, cambios)
+            self.foto[event_id] = actual
+            self.stats['campos_escritos'] += len(cambios)
+            if set(cambios) == {'minuto_actual'}:
+                # Solo pasó el tiempo: no frena el crecimiento del intervalo
+                continue
+            self.stats['partidos_actualizados'] += 1
+            cambiados += 1
+
+            if 'goles_local' in cambios or 'goles_visitante' in cambios:
+                logger.info(f"⚽ {evento['homeTeam'].get('name')} {actual['goles_local']}-"
+                            f"{actual['goles_visitante']} {evento['awayTeam'].get('name')} ({actual['minuto_actual']}')")
+                self.stats['incidentes_pedidos'] += 1
+                await self.manager.sync_eventos_partido(event_id, await self._partido(event_id))
+
+        for event_id in [i for i in self.foto if i not in eventos]:
+            await self._despedir(event_id)
+            cambiados += 1
+
+        return cambiados
+
+    async def _despedir(self, event_id: int):
+        """Partido que salió de la lista en vivo: última consulta y detalles finales si terminó"""
+        del self.foto[event_id]
+        try:
+            data = await self.api.get_partido_detalles(event_id)
+        except Exception as e:
+            logger.warning(f"⚠ No se pudo consultar el partido {event_id} al salir del vivo: {e}")
+            return
+        if data.get('event'):
+            partido = await self.manager.sync_partido(data['event'])
+            if partido and partido.estado == 'finished':
+                self.stats['partidos_terminados'] += 1
+                logger.info(f"🏁 Finalizado: {partido}")
+
+    def _siguiente_intervalo(self, cambiados: int) -> float:
+        if not self.foto:
+            return self.intervalo_maximo
+        if cambiados:
+            return self.intervalo_minimo
+        return min(self.intervalo * CRECIMIENTO, self.intervalo_maximo)
+
+    async def ejecutar(self, parar: asyncio.Event, ciclos: int = None):
+        """Bucle principal hasta que se active `parar` (o tras `ciclos` vueltas)"""
+        while not parar.is_set():
+            try:
+                cambiados = await self.vuelta()
+            except Exception as e:
+                logger.error(f"✗ Error consultando partidos en vivo: {e}")
+                cambiados = 0
+            self.intervalo = self._siguiente_intervalo(cambiados)
+            logger.info(f"🔴 {len(self.foto)} en vivo, {cambiados} cambiados, "
+                        f"próxima consulta en {self.intervalo:.0f}s")
+
+            if ciclos and self.stats['vueltas'] >= ciclos:
+                break
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=self.intervalo)
+            except asyncio.TimeoutError:
+                pass
+
+    def print_stats(self):
+        print("\n" + "=" * 60)
+        print("📊 POLLER EN VIVO")
+        print("=" * 60)
+        for key, value in self.stats.items():
+            print(f"  {key.capitalize():.<30} {value:>5}")
+        print("=" * 60)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--intervalo-minimo', type=float, default=INTERVALO_MINIMO)
+    parser.add_argument('--intervalo-maximo', type=float, default=INTERVALO_MAXIMO)
+    parser.add_argument('--ciclos', type=int, help="parar tras N consultas")
+    args = parser.parse_args()
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(senal, parar.set)
+
+    poller = PollerEnVivo(intervalo_minimo=args.intervalo_minimo, intervalo_maximo=args.intervalo_maximo)
+    try:
+        await poller.ejecutar(parar, args.ciclos)
+    finally:
+        await poller.close()
+        poller.print_stats()
+
+
+if __name__ == "__main__":
+    asyncio.run(ejecutar_con_pool(main()))
@@ -0,0 +1,162 @@
+"""
+Reconstruir la BD desde el archivo de respuestas crudas, sin red
+Uso:
+    python replay_archivo.py [--directorio archivo_sofascore] [--concurrencia 32] [--bulk] [--estadisticas]
+    python replay_archivo.py --sintetico 2000    # benchmark reproducible en una BD de test
+
+Recorre las listas de eventos archivadas (scheduled-events, eventos de
+temporada y /event/{id}) y pasa cada partido por el camino normal de
+SofascoreSyncManager (sync_partido, que pide los detalles de los finalizados,
+o sync_partidos_bulk con --bulk); con --estadisticas los partidos finalizados
+pasan además por EstadisticasSyncer. Todas las peticiones las contesta
+TransporteArchivo, así que no hay límite de peticiones y la concurrencia solo
+la marca la BD.
+
+Con --sintetico N se genera un archivo temporal con N partidos de
+futbol/datos_sinteticos.py y se reproduce sobre una BD de test: sirve de
+benchmark de ingesta de punta a punta.
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
+
+import django
+django.setup()
+
+from django.db import connection
+from django.test.utils import setup_test_environment
+
+from futbol import datos_sinteticos
+from futbol.archivo_respuestas import ArchivoRespuestas, DIRECTORIO
+from futbol.escritor import en_escritor
+from futbol.models import Partido, EventoPartido, Alineacion, EstadisticaPartido
+from futbol.sofascore_api import SofascoreAPI
+from futbol.transportes import TransporteArchivo
+
+# Respuestas de las que salen partidos
+PATRON_EVENTOS = r'(/scheduled-events/|/season/\d+/events/|^/event/\d+$)'
+
+
+def eventos_archivados(archivo: ArchivoRespuestas) -> list:
+    """Todos los eventos del archivo, uno por id (gana la versión más reciente)"""
+    eventos = {}
+    for registro in archivo.registros(patron=PATRON_EVENTOS):
+        datos = registro['datos'] or {}
+        for evento in datos.get('events', []) + ([datos['event']] if datos.get('event') else []):
+            if evento.get('id'):
+                eventos[evento['id']] = evento
+    return list(eventos.values())
+
+
+def generar_archivo_sintetico(directorio: str, partidos: int, por_dia: int = 10):
+    """Archivo con N partidos finalizados repartidos en scheduled-events de `por_dia` partidos"""
+    archivo = ArchivoRespuestas(directorio)
+    inicio = datetime(2024, 8, 15)
+    ids = list(range(1, partidos + 1))
+
+    for dia, desde in enumerate(range(0, partidos, por_dia)):
+        fecha = (inicio + timedelta(days=dia)).strftime('%Y-%m-%d')
+        archivo.guardar(f"/sport/football/scheduled-events/{fecha}", 200,
+                        {'events': [datos_sinteticos.evento(i) for i in ids[desde:desde + por_dia]]})
+
+    for event_id in ids:
+        for detalle in ['statistics', 'incidents', 'lineups']:
+            endpoint = f"/event/{event_id}/{detalle}"
+            archivo.guardar(endpoint, *datos_sinteticos.responder(endpoint))
+    archivo.cerrar()
+
+
+@en_escritor
+def _partidos_finalizados(ids):
+    return list(Partido.objects.filter(sofascore_id__in=ids, estado='finished')
+                .select_related('equipo_local', 'equipo_visitante'))
+
+
+@en_escritor
+def _contar_filas():
+    return {
+        'partidos': Partido.objects.count(),
+        'estadisticas': EstadisticaPartido.objects.count(),
+        'eventos': EventoPartido.objects.count(),
+        'alineaciones': Alineacion.objects.count(),
+    }
+
+
+async def reproducir(directorio: str, concurrencia: int, bulk: bool, con_estadisticas: bool):
+    from poblar_bd_sofascore import SofascoreSyncManager
+    from estadisticas import EstadisticasSyncer
+
+    def crear_api():
+        transporte = TransporteArchivo(concurrencia=concurrencia, archivo=ArchivoRespuestas(directorio))
+        return SofascoreAPI(transporte, peticiones_por_segundo=0, reintentos=0, cache=False, archivo=False)
+
+    # forzar: el archivo se reproduce para volver a parsear aunque los detalles ya sean
+    # definitivos o su huella no haya cambiado
+    manager = SofascoreSyncManager(workers=concurrencia, api=crear_api(), forzar=True)
+    syncer = EstadisticasSyncer(api=crear_api(), forzar=True)
+
+    try:
+        inicio = time.perf_counter()
+        eventos = eventos_archivados(manager.api.transporte.archivo)
+        lectura = time.perf_counter() - inicio
+        print(f"\n📦 {len(eventos)} partidos en el archivo ({lectura:.2f}s de lectura)")
+
+        inicio = time.perf_counter()
+        if bulk:
+            await manager.sync_partidos_bulk(eventos)
+        else:
+            await manager.procesar_en_paralelo(eventos, manager.sync_partido)
+
+        if con_estadisticas:
+            finalizados = await _partidos_finalizados([e['id'] for e in eventos])
+            await manager.procesar_en_paralelo(finalizados, syncer.sync_detalles_partido)
+        segundos = time.perf_counter() - inicio
+
+        peticiones = sum(api.transporte.aciertos + api.transporte.fallos for api in [manager.api, syncer.api])
+        filas = await _contar_filas()
+
+        print("=" * 60)
+        print(f"  Tiempo.......................... {segundos:>8.2f} s")
+        print(f"  Partidos/s...................... {len(eventos) / segundos:>8.1f}")
+        print(f"  Peticiones/s.................... {peticiones / segundos:>8.1f}")
+        for nombre, total in filas.items():
+            print(f"  {nombre.capitalize():.<32} {total:>8}")
+        manager.print_stats()
+    finally:
+        await manager.close()
+        await syncer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--directorio', default=DIRECTORIO)
+    parser.add_argument('--concurrencia', type=int, default=32)
+    parser.add_argument('--bulk', action='store_true', help="guardar los partidos con sync_partidos_bulk")
+    parser.add_argument('--estadisticas', action='store_true', help="pasar también por EstadisticasSyncer")
+    parser.add_argument('--sintetico', type=int, metavar='N', help="benchmark con N partidos sintéticos")
+    args = parser.parse_args()
+
+    if not args.sintetico:
+        asyncio.run(reproducir(args.directorio, args.concurrencia, args.bulk, args.estadisticas))
+        return
+
+    directorio = tempfile.mkdtemp(prefix='archivo_sintetico_')
+    setup_test_environment()
+    nombre_bd = connection.creation.create_test_db(verbosity=0)
+    try:
+        generar_archivo_sintetico(directorio, args.sintetico)
+        asyncio.run(reproducir(directorio, args.concurrencia, args.bulk, args.estadisticas))
+    finally:
+        connection.creation.destroy_test_db(nombre_bd, verbosity=0)
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Navegador Chromium persistente al que se conectan los scripts por CDP
+Uso: python servidor_navegador.py [--puerto 9222] [--host 127.0.0.1]
+
+Deja un Chromium corriendo con el puerto de depuración abierto. Con
+SOFASCORE_CDP_URL apuntando a él, poblar_bd_sofascore.py, estadisticas.py,
+sync_top5_ligas.py (o un cron que refresca partidos en vivo cada minuto)
+se conectan en milisegundos en vez de arrancar su propio navegador. Si el
+navegador se cae se vuelve a arrancar.
+"""
+
+import argparse
+import asyncio
+import signal
+
+from playwright.async_api import async_playwright
+
+COMPROBAR_CADA = 5  # segundos entre comprobaciones de que el navegador sigue vivo
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--puerto', type=int, default=9222)
+    parser.add_argument('--host', default='127.0.0.1')
+    args = parser.parse_args()
+
+    parar = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for senal in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(senal, parar.set)
+
+    async with async_playwright() as playwright:
+        browser = None
+        while not parar.is_set():
+            if browser is None or not browser.is_connected():
+                browser = await playwright.chromium.launch(headless=True, args=[
+                    f'--remote-debugging-port={args.puerto}',
+                    f'--remote-debugging-address={args.host}',
+                ])
+                print(f"🌐 Chromium escuchando en http://{args.host}:{args.puerto}")
+                print(f"   export SOFASCORE_CDP_URL=http://{args.host}:{args.puerto}")
+
+            try:
+                await asyncio.wait_for(parar.wait(), timeout=COMPROBAR_CADA)
+            except asyncio.TimeoutError:
+                pass
+
+        print("\nCerrando navegador...")
+        if browser:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -5,17 +5,36 @@ Script para sincronizar SOLO las 5 grandes ligas europeas
 - Serie A (Italia)
 - Bundesliga (Alemania)
 - Ligue 1 (Francia)
+
+Uso: python sync_top5_ligas.py [--force]
+Con --force se vuelven a pedir los detalles de los partidos que ya los tienen definitivos.
+
+La sincronización completa guarda su progreso en checkpoints/sync_todas_las_ligas.json:
+si se corta, la siguiente ejecución sigue por donde iba.
 """
 
+import argparse
 import asyncio
+import functools
 import os
+from datetime import timedelta
+
 import django
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'sofascore_project.settings')
 django.setup()
 
+from django.utils import timezone
+
 from poblar_bd_sofascore import SofascoreSyncManager
+from futbol.checkpoints import Checkpoint
+from futbol.escritor import confirmar_escrituras, tras_confirmar
 from futbol.models import Liga, Temporada, Partido
+from futbol.pool_navegador import ejecutar_con_pool
+from futbol.sofascore_api import SofascoreAPI
+
+# Días que se fían las plantillas en una sincronización incremental
+DIAS_PLANTILLAS = int(os.environ.get('SOFASCORE_DIAS_PLANTILLAS', 7))
 
 # Configuración de las 5 grandes ligas
 TOP_5_LIGAS = {
@@ -67,9 +86,18 @@ TOP_5_LIGAS = {
 }
 
 
-async def sync_liga_completa_con_estadisticas(liga_config: dict, temporadas: list = None):
-    """Sincronizar una liga completa con todas sus estadísticas"""
-    manager = SofascoreSyncManager()
+async def sync_liga_completa_con_estadisticas(liga_config: dict, temporadas: list = None, incremental: bool = True,
+                                              checkpoint: Checkpoint = None, api: SofascoreAPI = None,
+                                              forzar: bool = False):
+    """
+    Sincronizar una liga completa con todas sus estadísticas. En modo
+    incremental solo se piden los partidos nuevos, en juego o recién
+    finalizados, y las plantillas cada DIAS_PLANTILLAS días. Con
+    `checkpoint` se saltan las temporadas y partidos ya hechos; `api`
+    permite usar una SofascoreAPI propia (se cierra al terminar) y
+    `forzar` vuelve a pedir los detalles definitivos
+    """
+    manager = SofascoreSyncManager(api=api, forzar=forzar)
 
     try:
         nombre = liga_config['nombre']
@@ -87,6 +115,10 @@ async def sync_liga_completa_con_estadisticas(liga_config: dict, temporadas: lis
             print(f"\n📅 Temporada {i}/{len(temporadas_list)}: {temp_nombre}")
             print("-" * 70)
 
+            if checkpoint and checkpoint.hecho(f"temporada/{season_id}"):
+                print(f"✓ Ya sincronizada (checkpoint)")
+                continue
+
             # 1. Sincronizar liga y temporada
             torneo_data = await manager.api.get_torneo_info(tournament_id)
             liga = await manager.sync_liga(torneo_data.get('uniqueTournament', {}))
@@ -104,74 +136,80 @@ async def sync_liga_completa_con_estadisticas(liga_config: dict, temporadas: lis
                 }, liga)
 
             print(f"✓ Liga y temporada configuradas")
+            estado = await manager.estado_sincronizacion(temporada) if incremental and temporada else None
+
+            # 2. Sincronizar equipos (en incremental, solo si las plantillas están viejas)
+            plantillas = estado is None or estado.plantillas_sincronizadas is None or (
+                timezone.now() - estado.plantillas_sincronizadas > timedelta(days=DIAS_PLANTILLAS)
+            )
+            if not plantillas:
+                print(f"✓ Plantillas al día (sincronizadas {estado.plantillas_sincronizadas:%Y-%m-%d})")
+            else:
+                try:
+                    equipos_data = await manager.api.get_equipos_temporada_info(tournament_id, season_id)
+                    equipos = equipos_data.get('teams', [])
+                    print(f"✓ Sincronizando {len(equipos)} equipos...")
 
-            # 2. Sincronizar equipos
-            try:
-                equipos_data = await manager.api.get_equipos_temporada_info(tournament_id, season_id)
-                equipos = equipos_data.get('teams', [])
-                print(f"✓ Sincronizando {len(equipos)} equipos...")
-
-                for team_data in equipos:
-                    equipo = await manager.sync_equipo(team_data.get('team', {}))
-                    if equipo:
-                        try:
-                            await manager.sync_jugadores_equipo(equipo.sofascore_id, equipo)
-                        except:
-                            pass
-
-                print(f"✓ Equipos y jugadores sincronizados")
-                await asyncio.sleep(1)
-            except Exception as e:
-                print(f"⚠ Error con equipos: {str(e)[:50]}")
+                    equipos_temporada = []
+                    for team_data in equipos:
+                        equipo = await manager.sync_equipo(team_data.get('team', {}))
+                        if equipo:
+                            equipos_temporada.append(equipo)
 
-            # 3. Sincronizar TODOS los partidos
-            try:
-                partidos_data = await manager.api.get_torneo_partidos(tournament_id, season_id)
-                eventos = partidos_data.get('events', [])
+                    # Plantillas de todos los equipos a la vez y un solo upsert de jugadores
+                    await manager.sync_jugadores_equipos(equipos_temporada)
 
-                # Obtener también próximos partidos
-                try:
-                    proximos_data = await manager.api.get_torneo_proximos_partidos(tournament_id, season_id)
-                    eventos.extend(proximos_data.get('events', []))
-                except:
-                    pass
-
-                print(f"✓ Sincronizando {len(eventos)} partidos...")
-
-                sincronizados = 0
-                con_detalles = 0
-
-                for idx, evento in enumerate(eventos, 1):
-                    try:
-                        partido = await manager.sync_partido(evento)
-
-                        if partido:
-                            sincronizados += 1
-
-                            # Sincronizar detalles si está finalizado
-                            if partido.estado == 'finished':
-                                try:
-                                    await manager.sync_detalles_partido(partido.sofascore_id, partido)
-                                    con_detalles += 1
-                                except:
-                                    pass
-
-                            # Progreso cada 20 partidos
-                            if idx % 20 == 0:
-                                print(f"  Progreso: {idx}/{len(eventos)} ({con_detalles} con estadísticas)")
-                                await asyncio.sleep(1)
-                    except:
-                        continue
+                    print(f"✓ Equipos y jugadores sincronizados")
+                except Exception as e:
+                    plantillas = False
+                    print(f"⚠ Error con equipos: {str(e)[:50]}")
+
+            # 3. Sincronizar TODOS los partidos (jugados y próximos a la vez)
+            try:
+                eventos = await manager.listar_partidos_temporada(tournament_id, season_id)
+                listados = len(eventos)
+                if estado:
+                    eventos = await manager.eventos_incrementales(estado, eventos)
+                if checkpoint:
+                    eventos = [e for e in eventos if not checkpoint.hecho(f"{season_id}/{e.get('id')}")]
+
+                print(f"✓ Sincronizando {len(eventos)} de {listados} partidos con {manager.workers} workers...")
+
+                async def sincronizar_evento(evento):
+                    # Los detalles de los finalizados (si no son definitivos) se piden aparte
+                    # para saber si llegaron: un partido con detalles fallidos no está hecho
+                    partido = await manager.sync_partido(evento, con_detalles=False)
+                    completo = partido is not None
+                    if partido and partido.estado in ['finished', 'inprogress']:
+                        completo = await manager.sync_detalles_partido(partido.sofascore_id, partido)
+                    if checkpoint and completo:
+                        # Se marca cuando el escritor confirme el lote con este partido
+                        clave = f"{season_id}/{partido.sofascore_id}"
+                        await tras_confirmar(functools.partial(checkpoint.marcar, clave))
+                    return partido, bool(partido and partido.tiene_estadisticas), completo
+
+                resultados = await manager.procesar_en_paralelo(eventos, sincronizar_evento)
+
+                sincronizados = sum(1 for r in resultados if r and r[2])
+                con_detalles = sum(1 for r in resultados if r and r[1])
 
                 print(f"✓ Partidos sincronizados: {sincronizados}/{len(eventos)}")
                 print(f"✓ Con estadísticas completas: {con_detalles}")
 
+                if estado:
+                    # La marca de agua solo avanza con los partidos ya en disco (lanza si se perdió un lote)
+                    await confirmar_escrituras()
+                    await manager.guardar_estado_sincronizacion(
+                        estado, eventos, [r[0] for r in resultados if r and r[2]], plantillas=plantillas
+                    )
+                if checkpoint and sincronizados == len(eventos):
+                    # Temporada cerrada: sus partidos se resumen en una sola clave
+                    await confirmar_escrituras()
+                    checkpoint.compactar(f"{season_id}/", f"temporada/{season_id}")
+
             except Exception as e:
                 print(f"✗ Error sincronizando partidos: {str(e)[:100]}")
 
-            if i < len(temporadas_list):
-                await asyncio.sleep(3)
-
         print(f"\n{'=' * 70}")
         print(f"✅ {nombre} COMPLETADA")
         print(f"{'=' * 70}")
@@ -180,7 +218,7 @@ async def sync_liga_completa_con_estadisticas(liga_config: dict, temporadas: lis
         await manager.close()
 
 
-async def sync_todas_las_ligas():
+async def sync_todas_las_ligas(forzar: bool = False):
     """Sincronizar las 5 grandes ligas completas"""
 
     print("\n" + "=" * 70)
@@ -198,9 +236,22 @@ async def sync_todas_las_ligas():
 
     inicio = asyncio.get_event_loop().time()
 
-    for key, liga_config in TOP_5_LIGAS.items():
-        await sync_liga_completa_con_estadisticas(liga_config)
-        await asyncio.sleep(5)  # Pausa entre ligas
+    with Checkpoint('sync_todas_las_ligas') as checkpoint:
+        if checkpoint.reanudado:
+            print(f"↻ Reanudando desde el checkpoint ({len(checkpoint.completados)} tareas ya hechas)")
+
+        for key, liga_config in TOP_5_LIGAS.items():
+            if checkpoint.hecho(f"liga/{key}"):
+                print(f"✓ {liga_config['nombre']} ya sincronizada (checkpoint)")
+                continue
+            await sync_liga_completa_con_estadisticas(liga_config, checkpoint=checkpoint, forzar=forzar)
+            if all(checkpoint.hecho(f"temporada/{t['season_id']}") for t in liga_config['temporadas']):
+                checkpoint.marcar(f"liga/{key}")
+
+        if all(checkpoint.hecho(f"liga/{key}") for key in TOP_5_LIGAS):
+            checkpoint.terminar()
+        else:
+            print("⚠ Quedaron partidos con errores: la próxima ejecución los reintenta")
 
     fin = asyncio.get_event_loop().time()
     tiempo_total = (fin - inicio) / 60
@@ -222,7 +273,7 @@ async def sync_todas_las_ligas():
     print(f"  Jugadores: {resumen['jugadores']}")
 
 
-async def sync_solo_temporada_actual():
+async def sync_solo_temporada_actual(forzar: bool = False):
     """Sincronizar solo la temporada actual de cada liga"""
 
     print("\n" + "=" * 70)
@@ -231,13 +282,12 @@ async def sync_solo_temporada_actual():
 
     for key, liga_config in TOP_5_LIGAS.items():
         temporada_actual = [liga_config['temporadas'][0]]  # Solo la primera
-        await sync_liga_completa_con_estadisticas(liga_config, temporada_actual)
-        await asyncio.sleep(3)
+        await sync_liga_completa_con_estadisticas(liga_config, temporada_actual, forzar=forzar)
 
     print("\n✅ Temporadas actuales sincronizadas")
 
 
-async def sync_liga_especifica():
+async def sync_liga_especifica(forzar: bool = False):
     """Sincronizar una liga específica"""
 
     print("\nSelecciona la liga:")
@@ -278,7 +328,7 @@ async def sync_liga_especifica():
     else:
         temporadas = liga_config['temporadas']
 
-    await sync_liga_completa_con_estadisticas(liga_config, temporadas)
+    await sync_liga_completa_con_estadisticas(liga_config, temporadas, forzar=forzar)
 
 
 async def limpiar_otras_ligas():
@@ -291,17 +341,17 @@ async def limpiar_otras_ligas():
         print("Operación cancelada")
         return
 
-    from asgiref.sync import sync_to_async
+    from futbol.escritor import en_escritor
 
     # IDs de las Top 5
     top5_ids = [config['tournament_id'] for config in TOP_5_LIGAS.values()]
 
     # Buscar ligas en BD
-    @sync_to_async
+    @en_escritor
     def get_ligas_top5():
         return list(Liga.objects.filter(sofascore_id__in=top5_ids).values_list('id', flat=True))
 
-    @sync_to_async
+    @en_escritor
     def eliminar_partidos_otras_ligas(top5_liga_ids):
         count = Partido.objects.exclude(liga_id__in=top5_liga_ids).delete()
         return count[0]
@@ -314,7 +364,7 @@ async def limpiar_otras_ligas():
 
 async def verificar_datos_top5():
     """Verificar datos de las Top 5 ligas"""
-    from asgiref.sync import sync_to_async
+    from futbol.escritor import en_escritor
 
     print("\n" + "=" * 70)
     print("📊 DATOS DE LAS TOP 5 LIGAS")
@@ -324,7 +374,7 @@ async def verificar_datos_top5():
         tournament_id = liga_config['tournament_id']
         nombre = liga_config['nombre']
 
-        @sync_to_async
+        @en_escritor
         def get_liga_stats(tid):
             try:
                 liga = Liga.objects.get(sofascore_id=tid)
@@ -354,7 +404,7 @@ async def verificar_datos_top5():
             print(f"  ✗ No sincronizada")
 
 
-async def main():
+async def main(forzar: bool = False):
     print("\n" + "=" * 70)
     print("⚽ SINCRONIZACIÓN TOP 5 LIGAS EUROPEAS")
     print("=" * 70)
@@ -369,11 +419,11 @@ async def main():
     opcion = input("\nSelecciona opción (1-6): ").strip()
 
     if opcion == '1':
-        await sync_todas_las_ligas()
+        await sync_todas_las_ligas(forzar=forzar)
     elif opcion == '2':
-        await sync_solo_temporada_actual()
+        await sync_solo_temporada_actual(forzar=forzar)
     elif opcion == '3':
-        await sync_liga_especifica()
+        await sync_liga_especifica(forzar=forzar)
     elif opcion == '4':
         await verificar_datos_top5()
     elif opcion == '5':
@@ -385,5 +435,13 @@ async def main():
         print("Opción inválida")
 
 
+def parsear_argumentos():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--force', action='store_true',
+                        help="volver a pedir los detalles que ya son definitivos")
+    return parser.parse_args()
+
+
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    args = parsear_argumentos()
+    asyncio.run(ejecutar_con_pool(main(forzar=args.force)))
\ No newline at end of file